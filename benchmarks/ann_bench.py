@@ -0,0 +1,112 @@
+"""
+Recall and latency of the approximate vector indexes against exact search.
+
+    py -m benchmarks.ann_bench                         # 10k, 100k and 1M chunks
+    py -m benchmarks.ann_bench --sizes 10000,100000 --nprobe 4,16,64
+
+Embeddings of real manuals are clustered by topic, so the synthetic corpus is
+drawn around random topic centres; queries are noisy copies of corpus
+vectors. recall@k is the share of the exact top k that the index returns.
+Each index is then reopened from its files, as on the next launch, and must
+give the same results.
+"""
+import time
+import shutil
+import argparse
+import tempfile
+
+import numpy as np
+
+from core.vector_store import VectorStore
+from core.ann import IVFIndex, HNSWIndex
+
+BLOCK_ROWS = 65536
+
+
+def _corpus(store, size, dim, topics, rng):
+    centres = rng.standard_normal((topics, dim), dtype=np.float32)
+    writer = store.writer()
+    for start in range(0, size, BLOCK_ROWS):
+        n = min(BLOCK_ROWS, size - start)
+        vectors = centres[rng.integers(0, topics, n)] + 1.0 * rng.standard_normal((n, dim), dtype=np.float32)
+        writer.add([{"id": str(start + i), "text": "", "metadata": {}} for i in range(n)], vectors)
+    writer.commit()
+
+
+def _queries(store, count, rng):
+    picks = np.sort(rng.choice(store.count, count, replace=False))
+    queries = np.asarray(store.vectors[picks]) + 0.05 * rng.standard_normal((count, store.dim), dtype=np.float32)
+    return queries / np.linalg.norm(queries, axis=1, keepdims=True)
+
+
+def _measure(search, queries, truth, k):
+    times, recall = [], []
+    for q, exact in zip(queries, truth):
+        start = time.perf_counter()
+        found = search(q)
+        times.append(time.perf_counter() - start)
+        recall.append(len({row for row, _ in found} & exact) / k)
+    return float(np.mean(recall)), np.percentile(np.asarray(times) * 1000, 50)
+
+
+def _check_reopen(kind, index, store, queries, truth, k, recall):
+    """Load the saved index the way VectorStore.open() does and compare it with the one just built."""
+    reopened = (IVFIndex if kind == "ivf" else HNSWIndex)(index.path, min_chunks=0)
+    if kind == "ivf":
+        reopened.nprobe = index.nprobe
+    reopened.open(store)
+    reloaded, _ = _measure(lambda q: reopened.search(store, q, k), queries, truth, k)
+    status = "ok" if abs(reloaded - recall) < 1e-9 else "MISMATCH"
+    print(f"  {kind} reopened       recall@{k} {reloaded:.3f}  •  {status}")
+    if status != "ok":
+        raise SystemExit(f"{kind} index gives different results after reopening")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--nprobe", default="4,16,64", help="IVF lists scanned per query")
+    args = parser.parse_args()
+
+    try:
+        import hnswlib  # noqa: F401
+        kinds = ["ivf", "hnsw"]
+    except ImportError:
+        kinds = ["ivf"]
+        print("hnswlib not installed — benchmarking IVF only")
+
+    rng = np.random.default_rng(0)
+    for size in [int(s) for s in args.sizes.split(",")]:
+        path = tempfile.mkdtemp(prefix="zigsy-ann-")
+        try:
+            store = VectorStore(path).open()
+            _corpus(store, size, args.dim, max(16, size // 500), rng)
+            queries = _queries(store, args.queries, rng)
+            truth = [{row for row, _ in store.search(q, args.k, exact=True)} for q in queries]
+            _, exact_ms = _measure(lambda q: store.search(q, args.k, exact=True), queries, truth, args.k)
+            print(f"\n{size:,} chunks  •  exact search p50 {exact_ms:.2f} ms")
+
+            for kind in kinds:
+                index = (IVFIndex if kind == "ivf" else HNSWIndex)(path, min_chunks=0)
+                start = time.perf_counter()
+                index.add(store, 0, store.count)
+                print(f"  {kind} build {time.perf_counter() - start:.1f}s")
+                settings = [int(n) for n in args.nprobe.split(",")] if kind == "ivf" else [None]
+                for nprobe in settings:
+                    if nprobe is not None:
+                        index.nprobe = nprobe
+                    recall, ann_ms = _measure(lambda q: index.search(store, q, args.k), queries, truth, args.k)
+                    label = f"{kind} nprobe={nprobe}" if nprobe is not None else kind
+                    print(f"  {label:<16} recall@{args.k} {recall:.3f}  •  p50 {ann_ms:.2f} ms  •  "
+                          f"{exact_ms / ann_ms:.1f}x exact")
+                _check_reopen(kind, index, store, queries, truth, args.k, recall)
+            store.close()
+        finally:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+A stand-in Ollama server for benchmarks: answers /api/chat with a canned
+reply streamed as NDJSON, one token every token_latency seconds, so the
+client side of core.llm can be measured without a model.
+
+Like Ollama, it "loads" the model on first use (sleeping load_latency
+seconds), keeps it for the request's keep_alive (default 5m, -1 forever,
+0 unloads at once) and loads it without generating for a chat with no
+messages. /api/ps lists the loaded model.
+
+    server = FakeOllamaServer(token_latency=0.02).start()
+    set_host(server.url)
+    ...
+    server.stop()
+"""
+import re
+import json
+import time
+import threading
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+DEFAULT_REPLY = (
+    "To connect to WiFi, click the network icon in the bottom right corner of the screen. "
+    "Choose your network from the list, type the password and press Connect. "
+    "The icon will change to show the signal bars once you are online."
+)
+
+
+DEFAULT_KEEP_ALIVE = 300
+
+_DURATION = re.compile(r"^(-?[0-9.]+)(ms|s|m|h)?$")
+_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, None: 1}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _keep_alive_seconds(value) -> float:
+    """Ollama's keep_alive: seconds as a number, or a duration such as "30m"; negative means forever."""
+    if value is None:
+        return DEFAULT_KEEP_ALIVE
+    m = _DURATION.match(str(value).strip())
+    if not m:
+        return DEFAULT_KEEP_ALIVE
+    seconds = float(m.group(1)) * _UNITS[m.group(2)]
+    return float("inf") if seconds < 0 else seconds
+
+
+class FakeOllamaServer:
+    def __init__(self, host="127.0.0.1", port=0, token_latency=0.02, first_token_latency=0.0,
+                 load_latency=0.0, reply=DEFAULT_REPLY):
+        self.token_latency       = token_latency
+        self.first_token_latency = first_token_latency
+        self.load_latency        = load_latency
+        self.tokens   = [w + " " for w in reply.split()]
+        self.requests = []      # request bodies, newest last
+        self.loads    = 0       # times the model was loaded
+        self._expires = 0.0     # monotonic time the loaded model is dropped; 0 = not loaded
+        self._model_lock = threading.Lock()
+        self._server  = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    @property
+    def loaded(self) -> bool:
+        return time.monotonic() < self._expires
+
+    def _use_model(self, keep_alive) -> float:
+        """Load the model if needed, then keep it for keep_alive. Returns the seconds spent loading."""
+        with self._model_lock:
+            waited = 0.0
+            if not self.loaded:
+                time.sleep(self.load_latency)
+                self.loads += 1
+                waited = self.load_latency
+            self._expires = time.monotonic() + _keep_alive_seconds(keep_alive)
+            return waited
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, payload, status=200):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path == "/api/version":
+                    self._send_json({"version": "0.0.0-fake"})
+                elif self.path == "/api/tags":
+                    self._send_json({"models": []})
+                elif self.path == "/api/ps":
+                    self._send_json({"models": [{"name": "fake", "model": "fake"}] if fake.loaded else []})
+                else:
+                    self._send_json({"error": "not found"}, 404)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                fake.requests.append(body)
+                if self.path != "/api/chat":
+                    self._send_json({"error": "not found"}, 404)
+                    return
+                model = body.get("model", "")
+                started = time.perf_counter_ns()
+                if _keep_alive_seconds(body.get("keep_alive")) == 0 and not body.get("messages"):
+                    fake._expires = 0.0
+                    self._send_json({"model": model, "created_at": _now(), "done": True, "done_reason": "unload",
+                                     "message": {"role": "assistant", "content": ""}})
+                    return
+                load = fake._use_model(body.get("keep_alive"))
+                if not body.get("messages"):
+                    self._send_json({"model": model, "created_at": _now(), "done": True, "done_reason": "load",
+                                     "message": {"role": "assistant", "content": ""},
+                                     "load_duration": int(load * 1e9)})
+                    return
+                time.sleep(fake.first_token_latency)
+
+                if not body.get("stream", True):
+                    time.sleep(fake.token_latency * len(fake.tokens))
+                    self._send_json({
+                        "model": model, "created_at": _now(), "done": True, "done_reason": "stop",
+                        "message": {"role": "assistant", "content": "".join(fake.tokens).strip()},
+                        "total_duration": time.perf_counter_ns() - started,
+                        "eval_count": len(fake.tokens),
+                    })
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                try:
+                    for token in fake.tokens:
+                        time.sleep(fake.token_latency)
+                        self._chunk({"model": model, "created_at": _now(), "done": False,
+                                     "message": {"role": "assistant", "content": token}})
+                    self._chunk({"model": model, "created_at": _now(), "done": True, "done_reason": "stop",
+                                 "message": {"role": "assistant", "content": ""},
+                                 "total_duration": time.perf_counter_ns() - started,
+                                 "eval_count": len(fake.tokens)})
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    pass   # the client cancelled — just like Ollama, stop generating
+
+            def _chunk(self, payload):
+                data = (json.dumps(payload) + "\n").encode("utf-8")
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Run a stand-in Ollama server")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--token-latency", type=float, default=0.02)
+    parser.add_argument("--load-latency", type=float, default=2.0)
+    args = parser.parse_args()
+    server = FakeOllamaServer(port=args.port, token_latency=args.token_latency, load_latency=args.load_latency).start()
+    print(f"Fake Ollama listening on {server.url} — set OLLAMA_HOST to use it")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,144 @@
+"""
+Routing latency and LLM-avoidance rate of the intent router.
+
+    py -m benchmarks.router_bench            # patterns only
+    py -m benchmarks.router_bench --embed    # with the embedding fallback (loads the model)
+
+Each message is labelled with the intent it should reach; "chat" means the
+model really is needed. The old substring rules from ui/app.py are run on the
+same messages for comparison. With --embed, the short messages no pattern
+matches are also scored against the intent examples at several thresholds,
+to check INTENT_THRESHOLD against the near misses below.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from core.router import IntentRouter
+
+MESSAGES = [
+    # Commands as the old exact-match rules expected them
+    ("status", "status"), ("status", "vitals"), ("status", "system status"),
+    ("ghost", "ghost"), ("ghost", "ghost mode"), ("stash", "stash this"), ("stash", "stash"),
+    ("explain", "explain"), ("explain", "yes"), ("startup", "startup"),
+    ("remember", "remember that my grandson is called Arjun"),
+    ("find", "find resume.pdf"), ("find", "find me budget.xlsx"), ("find", "locate holiday photos"),
+    # Commands spelled differently
+    ("status", "show status"), ("status", "check system status"), ("status", "what's my pc health?"),
+    ("status", "Status."), ("ghost", "turn on ghost mode"), ("ghost", "toggle ghost"),
+    ("stash", "stash my clipboard"), ("explain", "explain this"), ("explain", "yes, explain please"),
+    ("startup", "show startup times"), ("remember", "Please remember that I take tea without sugar"),
+    ("find", "find my resume pdf"), ("find", "search for the tax return"), ("find", "look for invoice.docx"),
+    ("find", "can you find my notes"),
+    # Paraphrases only the embedding fallback can catch
+    ("status", "how is my computer doing"), ("status", "how's the battery"),
+    ("ghost", "make yourself transparent"), ("stash", "save what i copied"),
+    ("explain", "explain what i copied"),
+    # Real questions
+    ("chat", "How do I make a video call on WhatsApp?"), ("chat", "How do I connect to WiFi?"),
+    ("chat", "what am i looking at"), ("chat", "tell me a joke"), ("chat", "explain recursion"),
+    ("chat", "where is python installed"), ("chat", "find where is python installed"),
+    ("chat", "search for that file i think it was about taxes"),
+    ("chat", "what is the capital of france"), ("chat", "why is my laptop fan so loud"),
+    # Near misses — short questions that sound like a command but are for the model
+    ("chat", "what is my health"), ("chat", "health"), ("chat", "stats"), ("chat", "find me"),
+    ("chat", "how is my heart doing"), ("chat", "how is my grandson doing"), ("chat", "how are you doing"),
+    ("chat", "is my blood pressure high"), ("chat", "make yourself comfortable"),
+    ("chat", "save the date for sunday"), ("chat", "keep this between us"), ("chat", "what does vertigo mean"),
+    ("chat", "tell me about the war"), ("chat", "why is the bus so slow"), ("chat", "how fast do snails move"),
+    ("chat", "how long do eggs take to boil"), ("chat", "show me a recipe"), ("chat", "i can't see very well"),
+    ("chat", "my battery of tests is tomorrow"), ("chat", "what did i copy down"),
+]
+
+THRESHOLDS = [0.70, 0.75, 0.78, 0.82, 0.86, 0.90]
+
+_OLD_FIND_TRIGGERS = ["find me", "search for", "locate", "find"]
+
+
+def old_route(text: str) -> str:
+    """The exact-match command checks send_message used before the router."""
+    from tools.system_tools import is_vague_query, is_natural_language
+    lower = text.lower().strip()
+    if lower.startswith("remember that"):
+        return "remember"
+    if lower in ["ghost", "ghost mode"]:
+        return "ghost"
+    if lower in ["status", "vitals", "system status"]:
+        return "status"
+    if lower == "startup":
+        return "startup"
+    if lower in ["stash", "stash this"]:
+        return "stash"
+    if lower in ["explain", "yes explain", "yes"]:
+        return "explain"
+    q = lower.rstrip("?!.")
+    if not (is_vague_query(q) or is_natural_language(q)) and any(q.startswith(t) for t in _OLD_FIND_TRIGGERS):
+        return "find"
+    return "chat"
+
+
+def _summarise(label, predictions):
+    commands = [(want, got) for (want, _), got in zip(MESSAGES, predictions) if want != "chat"]
+    avoided = sum(got != "chat" for _, got in commands)
+    correct = sum(want == got for (want, _), got in zip(MESSAGES, predictions))
+    wrongly_handled = sum(want == "chat" and got != "chat" for (want, _), got in zip(MESSAGES, predictions))
+    print(f"{label:<22} LLM avoided {avoided}/{len(commands)} ({avoided / len(commands):.0%})  •  "
+          f"correct {correct}/{len(MESSAGES)}  •  questions misrouted {wrongly_handled}")
+
+
+def _embedding_precision(router):
+    """Precision and recall of the embedding fallback alone, on the messages it would see."""
+    scored = []
+    for want, text in MESSAGES:
+        if router.route(text, embed=False).via != "pending":
+            continue
+        intent, score = router.closest_example(text)
+        scored.append((want, intent, score, text))
+    print(f"embedding fallback     {len(scored)} short messages no pattern matched")
+    commands = sum(want != "chat" for want, _, _, _ in scored)
+    for threshold in THRESHOLDS:
+        taken = [(want, intent) for want, intent, score, _ in scored if score >= threshold]
+        right = sum(want == intent for want, intent in taken)
+        precision = f"{right / len(taken):.0%}" if taken else "—"
+        marker = "  <- INTENT_THRESHOLD" if threshold == router.threshold else ""
+        print(f"    threshold {threshold:.2f}  precision {precision:>4} ({right}/{len(taken)})  •  "
+              f"recall {right}/{commands}{marker}")
+    for want, intent, score, text in sorted(scored, key=lambda s: -s[2]):
+        if want != intent and score >= min(THRESHOLDS):
+            print(f"    near miss {score:.2f}: {text!r} -> {intent} (wanted {want})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--embed", action="store_true", help="enable the embedding fallback")
+    parser.add_argument("--repeat", type=int, default=2000, help="timing iterations per message")
+    args = parser.parse_args()
+
+    router = IntentRouter()
+    if args.embed:
+        from core.rag import embed_texts
+        router.prepare(embed_texts)
+
+    _summarise("old substring rules", [old_route(text) for _, text in MESSAGES])
+    routes = [router.route(text) for _, text in MESSAGES]
+    _summarise("intent router", [r.intent for r in routes])
+    for (want, text), route in zip(MESSAGES, routes):
+        if route.intent != want:
+            print(f"    miss: {text!r} -> {route.intent} (wanted {want})")
+    if args.embed:
+        _embedding_precision(router)
+
+    repeat = args.repeat if not args.embed else max(1, args.repeat // 100)
+    samples = []
+    for _, text in MESSAGES:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            router.route(text)
+        samples.append((time.perf_counter() - start) / repeat * 1e6)
+    print(f"routing latency        p50 {np.percentile(samples, 50):.1f} µs  •  "
+          f"p95 {np.percentile(samples, 95):.1f} µs  •  max {max(samples):.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+"""
+Headless benchmark suite — no window, microphone or model needed.
+
+    py -m benchmarks.run                          # everything, results to benchmark_results.json
+    py -m benchmarks.run --only rag,memory --quick
+    py -m benchmarks.run --out after.json --compare before.json
+
+Timings ending in _ms or _s are lower-is-better, rates ending in _per_s are
+higher-is-better; --compare reports every metric that moved by more than
+--threshold. The exit status is 1 if any benchmark stopped with an error or,
+with --compare, if any metric got worse.
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime
+
+# Run as a script (python benchmarks/run.py) only benchmarks/ is on the path
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+import numpy as np
+
+EMBED_DIM = 384   # bge-small-en-v1.5
+WORDS = ("wifi zoom whatsapp call video settings password network printer screen "
+         "battery update camera message folder document install restart keyboard").split()
+
+
+def _stats(samples) -> dict:
+    samples = np.asarray(samples) * 1000
+    return {"p50_ms": round(float(np.percentile(samples, 50)), 3),
+            "p95_ms": round(float(np.percentile(samples, 95)), 3),
+            "mean_ms": round(float(samples.mean()), 3)}
+
+
+def _sentence(rng, words=40) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+# ── LLM ───────────────────────────────────────────────────────────────────────
+
+def bench_llm(args) -> dict:
+    from benchmarks.fake_ollama import FakeOllamaServer
+    try:
+        import ollama  # noqa: F401
+    except ImportError as e:
+        return {"skipped": f"ollama client not installed ({e})"}
+    from core import llm
+
+    server = FakeOllamaServer(token_latency=args.token_latency, load_latency=args.load_latency).start()
+    llm.set_host(server.url)
+    try:
+        # The first question loads the model; warm_up() does that ahead of time
+        start = time.perf_counter()
+        next(iter(llm.stream_chat("Hello", [])))
+        cold_first = time.perf_counter() - start
+        llm.unload()
+        warm_up = llm.warm_up()
+
+        first, total, tokens = [], [], 0
+        for _ in range(args.llm_runs):
+            start = time.perf_counter()
+            got_first = None
+            for _ in llm.stream_chat("How do I connect to WiFi?", [], context="Click the network icon."):
+                if got_first is None:
+                    got_first = time.perf_counter() - start
+                tokens += 1
+            first.append(got_first)
+            total.append(time.perf_counter() - start)
+    finally:
+        llm.set_host(None)
+        server.stop()
+    # Client overhead is what's left after the server's deliberate delays
+    simulated = args.token_latency * len(server.tokens)
+    return {
+        "token_latency_ms": args.token_latency * 1000,
+        "load_latency_ms": args.load_latency * 1000,
+        "cold_first_token_ms": round(cold_first * 1000, 3),
+        "warm_up_ms": round(warm_up * 1000, 3),
+        "model_loads": server.loads,
+        "first_token": _stats(first),
+        "total": _stats(total),
+        "overhead": _stats([t - simulated for t in total]),
+        "tokens_per_s": round(tokens / sum(total), 1),
+    }
+
+
+# ── RAG ───────────────────────────────────────────────────────────────────────
+
+def bench_rag(args) -> dict:
+    from core.vector_store import VectorStore
+    from core.rag import get_context, build_lexical, lexical_search
+
+    results = {}
+    rng = np.random.default_rng(0)
+    text_rng = random.Random(0)
+    for size in args.rag_sizes:
+        path = tempfile.mkdtemp(prefix="zigsy-rag-")
+        try:
+            start = time.perf_counter()
+            store = VectorStore(path).open()
+            writer = store.writer()
+            for offset in range(0, size, 4096):
+                n = min(4096, size - offset)
+                records = [{"id": f"doc#{offset + i}", "text": _sentence(text_rng),
+                            "metadata": {"file_name": f"manual_{(offset + i) // 100}.pdf"}}
+                           for i in range(n)]
+                writer.add(records, rng.standard_normal((n, EMBED_DIM), dtype=np.float32))
+            writer.commit()
+            build = time.perf_counter() - start
+            store.close()
+
+            start = time.perf_counter()
+            store = VectorStore(path).open()
+            open_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            lexical = build_lexical(store)
+            lexical_build = time.perf_counter() - start
+
+            queries = rng.standard_normal((args.queries, EMBED_DIM), dtype=np.float32)
+            samples, keyword, hybrid = [], [], []
+            for q in queries:
+                start = time.perf_counter()
+                get_context("how do i connect to wifi", store, query_embedding=q, lexical_hits=[])
+                samples.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                hits = lexical_search("how do i connect to wifi", lexical)
+                keyword.append(time.perf_counter() - start)
+                get_context("how do i connect to wifi", store, query_embedding=q, lexical_hits=hits)
+                hybrid.append(time.perf_counter() - start)
+            store.close()
+            results[str(size)] = {"build_s": round(build, 3), "open_ms": round(open_time * 1000, 3),
+                                  "keyword_build_s": round(lexical_build, 3),
+                                  "get_context": _stats(samples), "keyword_search": _stats(keyword),
+                                  "get_context_hybrid": _stats(hybrid)}
+        finally:
+            shutil.rmtree(path, ignore_errors=True)
+    return results
+
+
+# ── File search ───────────────────────────────────────────────────────────────
+
+def _make_tree(root: str, files: int, fanout: int = 8, per_dir: int = 40):
+    """Nested folders of empty files; returns the name of one file near the bottom."""
+    rng = random.Random(files)
+    dirs, made, target = [root], 0, None
+    while made < files:
+        parent = dirs.pop(0)
+        for d in range(fanout):
+            path = os.path.join(parent, f"folder_{d}")
+            os.makedirs(path, exist_ok=True)
+            dirs.append(path)
+        for _ in range(min(per_dir, files - made)):
+            name = f"{rng.choice(WORDS)}_{made}.{rng.choice(['txt', 'pdf', 'docx', 'jpg'])}"
+            open(os.path.join(parent, name), "w").close()
+            target = name
+            made += 1
+    return target
+
+
+def bench_find_file(args) -> dict:
+    from tools.system_tools import find_file, matches, SKIP_DIRS
+    from tools.file_index import FileIndex
+
+    results = {}
+    for size in args.tree_sizes:
+        root = tempfile.mkdtemp(prefix="zigsy-tree-")
+        try:
+            target = _make_tree(root, size)
+            start = time.perf_counter()
+            found = find_file(target, roots=[root])
+            walk_hit = time.perf_counter() - start
+            start = time.perf_counter()
+            find_file("no_such_file_anywhere.xyz", roots=[root])
+            walk_miss = time.perf_counter() - start
+
+            index = FileIndex(os.path.join(root, "index.json"), SKIP_DIRS)
+            start = time.perf_counter()
+            index.refresh([root])
+            index_build = time.perf_counter() - start
+            start = time.perf_counter()
+            index.refresh([root])
+            index_refresh = time.perf_counter() - start
+            samples = []
+            for _ in range(args.queries):
+                start = time.perf_counter()
+                index.search(target, matches, 15)
+                samples.append(time.perf_counter() - start)
+            results[str(size)] = {
+                "found": bool(found and found[1]),
+                "walk_hit_ms": round(walk_hit * 1000, 3), "walk_miss_ms": round(walk_miss * 1000, 3),
+                "index_build_ms": round(index_build * 1000, 3), "index_refresh_ms": round(index_refresh * 1000, 3),
+                "index_search": _stats(samples),
+            }
+        finally:
+            shutil.rmtree(root, ignore_errors=True)
+    return results
+
+
+# ── Memory ────────────────────────────────────────────────────────────────────
+
+def bench_memory(args) -> dict:
+    from core.memory import MemoryStore, get_memory_context
+
+    results = {}
+    text_rng = random.Random(1)
+    for size in args.memory_sizes:
+        path = tempfile.mkdtemp(prefix="zigsy-memory-")
+        try:
+            store = MemoryStore(os.path.join(path, "memory.json"), os.path.join(path, "memory.journal")).load()
+            start = time.perf_counter()
+            for i in range(size):
+                store.add_note(f"note {i}: {_sentence(text_rng, 12)}")
+            add = (time.perf_counter() - start) / size
+
+            start = time.perf_counter()
+            store.compact()
+            compact = time.perf_counter() - start
+
+            start = time.perf_counter()
+            store = MemoryStore(os.path.join(path, "memory.json"), os.path.join(path, "memory.journal")).load()
+            load = time.perf_counter() - start
+
+            samples = []
+            for _ in range(args.queries):
+                query = _sentence(text_rng, 8)
+                start = time.perf_counter()
+                get_memory_context(store, query)
+                samples.append(time.perf_counter() - start)
+            results[str(size)] = {"add_note_ms": round(add * 1000, 3), "compact_ms": round(compact * 1000, 3),
+                                  "load_ms": round(load * 1000, 3), "context": _stats(samples)}
+        finally:
+            shutil.rmtree(path, ignore_errors=True)
+    return results
+
+
+# ── Cold import ───────────────────────────────────────────────────────────────
+
+IMPORT_MODULES = ["core.llm", "core.rag", "core.memory", "core.router", "tools.system_tools", "ui.app"]
+
+
+def bench_cold_import(args) -> dict:
+    """Each module imported in a fresh interpreter; best of three runs."""
+    results = {}
+    for module in IMPORT_MODULES:
+        code = ("import time, importlib; t = time.perf_counter(); "
+                f"importlib.import_module({module!r}); print(time.perf_counter() - t)")
+        times, error = [], None
+        for _ in range(3):
+            proc = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True)
+            if proc.returncode != 0:
+                error = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"
+                break
+            times.append(float(proc.stdout.strip().splitlines()[-1]))
+        results[module] = {"error": error} if error else {"import_ms": round(min(times) * 1000, 1)}
+    return results
+
+
+BENCHMARKS = {
+    "llm": bench_llm,
+    "rag": bench_rag,
+    "find_file": bench_find_file,
+    "memory": bench_memory,
+    "cold_import": bench_cold_import,
+}
+
+
+# ── Comparison ────────────────────────────────────────────────────────────────
+
+def _flatten(tree, prefix=""):
+    for key, value in tree.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            yield from _flatten(value, name)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield name, value
+
+
+def _errors(tree, prefix=""):
+    """Names of every result that stored an error instead of numbers."""
+    for key, value in tree.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if key == "error":
+            yield prefix or name
+        elif isinstance(value, dict):
+            yield from _errors(value, name)
+
+
+def compare(old: dict, new: dict, threshold: float) -> bool:
+    """Print metrics that moved by more than threshold; True if none got worse."""
+    before = dict(_flatten(old["results"]))
+    ok = True
+    for name, value in _flatten(new["results"]):
+        if name not in before or not before[name]:
+            continue
+        higher_is_better = name.endswith("_per_s")
+        if not (higher_is_better or name.endswith("_ms") or name.endswith("_s")):
+            continue
+        change = (value - before[name]) / before[name]
+        if abs(change) < threshold:
+            continue
+        worse = change < 0 if higher_is_better else change > 0
+        ok = ok and not worse
+        print(f"{'REGRESSION' if worse else 'improved':<10}  {name:<45} {before[name]:>10} -> {value:<10} ({change:+.0%})")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Zigsy benchmark suite")
+    parser.add_argument("--only", help="comma-separated subset of: " + ", ".join(BENCHMARKS))
+    parser.add_argument("--quick", action="store_true", help="smaller inputs for a fast smoke run")
+    parser.add_argument("--out", default="benchmark_results.json")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change worth reporting")
+    parser.add_argument("--token-latency", type=float, default=0.02, help="fake Ollama seconds per token")
+    parser.add_argument("--load-latency", type=float, default=1.0, help="fake Ollama seconds to load the model")
+    args = parser.parse_args()
+
+    args.llm_runs = 3 if args.quick else 10
+    args.queries = 20 if args.quick else 100
+    args.rag_sizes = [1000, 10000] if args.quick else [1000, 10000, 100000]
+    args.tree_sizes = [2000] if args.quick else [2000, 20000]
+    args.memory_sizes = [500] if args.quick else [1000, 5000]
+
+    names = args.only.split(",") if args.only else list(BENCHMARKS)
+    results = {}
+    for name in names:
+        print(f"[Benchmark] {name}...")
+        start = time.perf_counter()
+        try:
+            results[name] = BENCHMARKS[name](args)
+        except Exception as e:
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+        print(f"[Benchmark] {name} done in {time.perf_counter() - start:.1f}s")
+
+    report = {
+        "meta": {"timestamp": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+                 "platform": platform.platform(), "machine": platform.machine(),
+                 "cpu_count": os.cpu_count(), "quick": args.quick},
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(results, indent=2))
+    print(f"Results written to {args.out}")
+
+    ok = True
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            old = json.load(f)
+        ok = compare(old, report, args.threshold)
+    failed = list(_errors(results))
+    for name in failed:
+        print(f"{'ERROR':<10}  {name}")
+    if failed or not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
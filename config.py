@@ -18,6 +18,21 @@
 # MODEL_NAME = "tenali:latest"
 MODEL_NAME = "qwen2.5:1.5b"
 # MODEL_NAME="Gemma2:2b"
+
+# Ollama server to use — None means the client default (the OLLAMA_HOST
+# environment variable, else http://localhost:11434)
+OLLAMA_HOST = None
+
+# How long Ollama keeps the model loaded between questions (loading it again
+# takes several seconds on a small machine):
+#   "always" — keep it loaded for as long as Ollama runs
+#   "idle"   — unload it after KEEP_ALIVE_IDLE_MINUTES without a question
+#   "memory" — keep it loaded, but unload it when free RAM drops below
+#              KEEP_ALIVE_MIN_FREE_MB so other programs don't start swapping
+KEEP_ALIVE_POLICY = "idle"
+KEEP_ALIVE_IDLE_MINUTES = 30
+KEEP_ALIVE_MIN_FREE_MB = 800
+
 SYSTEM_PROMPT = """Your name is Tenali and ashish created you
 You are a warm and patient assistant designed to help elderly people use their computer.
 
@@ -32,4 +47,39 @@ Your behavior:
 - When instructions are provided to you before the user's question, follow them exactly and precisely — do not add, remove, or change any steps
 - Do not use your own knowledge for technical tasks if instructions are already provided
 - If you are unsure about something, say so honestly rather than guessing
-- Never assume the user knows technical terms"""
\ No newline at end of file
+- Never assume the user knows technical terms"""
+
+# Re-index knowledge_base/raw in the background when files are added, changed or removed
+WATCH_KNOWLEDGE_BASE = True
+
+# Semantic answer cache — a new question reuses a stored answer when its meaning
+# is this close (cosine similarity) to one asked before
+RESPONSE_CACHE_PATH = "response_cache.json"
+RESPONSE_CACHE_MAX_ENTRIES = 200
+RESPONSE_CACHE_THRESHOLD = 0.93
+
+# Conversation history sent with each question — the last few turns are kept
+# word for word within the budget, older ones are folded into a short summary
+HISTORY_TOKEN_BUDGET = 1200
+HISTORY_KEEP_TURNS = 6
+HISTORY_SUMMARY_MAX_TOKENS = 200
+
+# How many requests may use the model at once. Ollama serves one generation at
+# a time on small machines, so more only queues them inside Ollama instead of
+# here, where a newer question can jump the queue and stale ones are cancelled
+MODEL_CONCURRENCY = 1
+
+# Per-stage timing of each answer (file search, retrieval, first token, speech...).
+# Written as JSON lines to TRACE_PATH, which rolls over at TRACE_MAX_BYTES;
+# the "perf" command shows this session's p50/p95 per stage
+TRACE_ENABLED = True
+TRACE_PATH = "logs/trace.jsonl"
+TRACE_MAX_BYTES = 1_000_000
+TRACE_BACKUPS = 3
+
+# Knowledge-base search. "exact" compares the question with every chunk, which
+# is fastest up to tens of thousands of chunks. "ivf" (built in) or "hnsw"
+# (needs `pip install hnswlib`) build an approximate index at ingestion once
+# the knowledge base holds ANN_MIN_CHUNKS chunks, for thousands of manuals
+VECTOR_INDEX = "exact"
+ANN_MIN_CHUNKS = 50_000
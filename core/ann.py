@@ -0,0 +1,296 @@
+import os
+import json
+import math
+
+import numpy as np
+
+from config import ANN_MIN_CHUNKS
+
+ANN_META = "ann.json"   # kind and rows covered — written last, so it is the commit point
+
+# IVF: vectors are clustered into about sqrt(n) lists; a query scans the
+# IVF_NPROBE lists with the nearest centroids using int8 codes, then the best
+# candidates are re-scored against the exact float32 vectors
+IVF_NPROBE = 16
+IVF_TRAIN_ITERATIONS = 10
+IVF_TRAIN_PER_LIST = 32      # k-means sample size per list
+IVF_RERANK = 4               # exact re-scoring of k * IVF_RERANK candidates
+IVF_RETRAIN_GROWTH = 4       # retrain once the store is this many times larger than at training
+ASSIGN_BLOCK_ROWS = 16384
+
+# HNSW (hnswlib)
+HNSW_M = 16
+HNSW_EF_CONSTRUCTION = 200
+HNSW_EF_SEARCH = 64
+
+
+def _quantise(vectors):
+    """Symmetric int8 per vector, a block at a time: vector ≈ codes * scale."""
+    codes = np.empty(vectors.shape, dtype=np.int8)
+    scales = np.empty(len(vectors), dtype=np.float32)
+    for start in range(0, len(vectors), ASSIGN_BLOCK_ROWS):
+        block = np.asarray(vectors[start:start + ASSIGN_BLOCK_ROWS], dtype=np.float32)
+        scale = np.abs(block).max(axis=1) / 127
+        scale[scale == 0] = 1.0
+        codes[start:start + len(block)] = np.rint(block / scale[:, None])
+        scales[start:start + len(block)] = scale
+    return codes, scales
+
+
+def _assign(vectors, centroids):
+    """Nearest centroid (by inner product) for every vector, a block at a time."""
+    lists = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), ASSIGN_BLOCK_ROWS):
+        block = np.asarray(vectors[start:start + ASSIGN_BLOCK_ROWS], dtype=np.float32)
+        lists[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return lists
+
+
+def _train(vectors, nlist: int, seed=0):
+    """Spherical k-means on a sample of the vectors."""
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), nlist * IVF_TRAIN_PER_LIST)
+    sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))], dtype=np.float32)
+    centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+    for _ in range(IVF_TRAIN_ITERATIONS):
+        lists = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, lists, sample)
+        counts = np.bincount(lists, minlength=nlist)
+        empty = counts == 0
+        # Empty lists are re-seeded from random sample vectors
+        sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        centroids = sums / norms
+    return centroids.astype(np.float32)
+
+
+class _AnnIndex:
+    kind = None
+
+    def __init__(self, path, min_chunks=ANN_MIN_CHUNKS):
+        """
+        Approximate nearest-neighbour search over a VectorStore's rows, saved
+        in the store's folder. It stays untrained — and the store searches
+        exactly — until the store holds min_chunks rows. Deleted rows are
+        filtered with the store's tombstones; compaction rebuilds the index.
+        """
+        self.path       = path
+        self.min_chunks = min_chunks
+        self.count      = 0          # store rows covered
+        self.trained    = False
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _write_meta(self, **extra):
+        meta = {"kind": self.kind, "count": self.count, **extra}
+        tmp = self._file(ANN_META + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._file(ANN_META))
+
+    def _read_meta(self):
+        try:
+            with open(self._file(ANN_META), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return meta if meta.get("kind") == self.kind else None
+
+    def open(self, store):
+        """Load the saved index if it covers the store's rows, else rebuild it."""
+        meta = self._read_meta()
+        if meta and meta["count"] == store.count and store.count:
+            try:
+                self._load(meta)
+                self.count, self.trained = meta["count"], True
+                return self
+            except Exception as e:
+                print(f"[ANN] Saved {self.kind} index unreadable, rebuilding it: {e}")
+        self.reset()
+        self.add(store, 0, store.count)
+        return self
+
+    def reset(self):
+        self.count, self.trained = 0, False
+        if os.path.exists(self._file(ANN_META)):
+            os.remove(self._file(ANN_META))
+
+    def add(self, store, start: int, end: int):
+        """Index store rows start..end-1, which have just been committed."""
+        if not self.trained:
+            if store.live_count == 0 or store.live_count < self.min_chunks:
+                return
+            print(f"[ANN] Building {self.kind} index over {store.count} chunks...")
+            self._build(store)
+        else:
+            self._insert(store, start, end)
+        self.count, self.trained = store.count, True
+        self._save()
+
+    def delete(self, rows):
+        pass
+
+    def search(self, store, query, k: int):
+        """(row, score) pairs best first, or None if the index isn't trained yet."""
+        if not self.trained or self.count != store.count:
+            return None
+        return self._search(store, query, k)
+
+
+class IVFIndex(_AnnIndex):
+    kind = "ivf"
+
+    def __init__(self, path, nprobe=IVF_NPROBE, **kwargs):
+        super().__init__(path, **kwargs)
+        self.nprobe     = nprobe
+        self.centroids  = None
+        self.offsets    = None     # int64 (nlist + 1,) list boundaries in rows/codes
+        self.rows       = None     # int64 store row of each entry, grouped by list
+        self.codes      = None     # int8 (entries, dim)
+        self.scales     = None     # float32 (entries,)
+        self.trained_on = 0
+
+    def _build(self, store):
+        live = np.array([r for r in range(store.count) if r not in store.deleted], dtype=np.int64)
+        vectors = store.vectors[live] if store.deleted else store.vectors
+        nlist = max(1, min(len(live), int(math.sqrt(len(live)))))
+        self.centroids = _train(vectors, nlist)
+        self.trained_on = len(live)
+        self._set_lists(live, _assign(vectors, self.centroids), *_quantise(vectors))
+
+    def _insert(self, store, start, end):
+        if store.live_count > IVF_RETRAIN_GROWTH * self.trained_on:
+            self._build(store)
+            return
+        vectors = store.vectors[start:end]
+        old_lists = np.repeat(np.arange(len(self.centroids), dtype=np.int32), np.diff(self.offsets))
+        codes, scales = _quantise(vectors)
+        self._set_lists(
+            np.concatenate([self.rows, np.arange(start, end, dtype=np.int64)]),
+            np.concatenate([old_lists, _assign(vectors, self.centroids)]),
+            np.concatenate([self.codes, codes]),
+            np.concatenate([self.scales, scales]),
+        )
+
+    def _set_lists(self, rows, lists, codes, scales):
+        order = np.argsort(lists, kind="stable")
+        self.rows, self.codes, self.scales = rows[order], codes[order], scales[order]
+        self.offsets = np.zeros(len(self.centroids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(lists, minlength=len(self.centroids)), out=self.offsets[1:])
+
+    def _save(self):
+        for name, array in (("centroids", self.centroids), ("offsets", self.offsets), ("rows", self.rows),
+                            ("codes", self.codes), ("scales", self.scales)):
+            tmp = self._file(f"ann_{name}.tmp.npy")
+            np.save(tmp, array)
+            os.replace(tmp, self._file(f"ann_{name}.npy"))
+        self._write_meta(trained_on=self.trained_on)
+
+    def _load(self, meta):
+        self.centroids = np.load(self._file("ann_centroids.npy"))
+        self.offsets = np.load(self._file("ann_offsets.npy"))
+        self.rows = np.load(self._file("ann_rows.npy"), mmap_mode="r")
+        self.codes = np.load(self._file("ann_codes.npy"), mmap_mode="r")
+        self.scales = np.load(self._file("ann_scales.npy"), mmap_mode="r")
+        self.trained_on = meta.get("trained_on", len(self.rows))
+
+    def _search(self, store, query, k):
+        q = np.asarray(query, dtype=np.float32).reshape(-1)
+        nprobe = min(self.nprobe, len(self.centroids))
+        probe = np.argpartition(-(self.centroids @ q), nprobe - 1)[:nprobe]
+        spans = [(self.offsets[i], self.offsets[i + 1]) for i in probe]
+        rows = np.concatenate([self.rows[a:b] for a, b in spans])
+        if len(rows) == 0:
+            return []
+        codes = np.concatenate([self.codes[a:b] for a, b in spans])
+        scales = np.concatenate([self.scales[a:b] for a, b in spans])
+        approx = (codes.astype(np.float32) @ q) * scales
+        if store.deleted:
+            approx[np.isin(rows, list(store.deleted))] = -np.inf
+        n = min(len(rows), k * IVF_RERANK)
+        best = np.argpartition(-approx, n - 1)[:n]
+        best = best[np.isfinite(approx[best])]
+        candidates = np.sort(rows[best])
+        exact = np.asarray(store.vectors[candidates], dtype=np.float32) @ q
+        top = np.argsort(-exact)[:k]
+        return [(int(candidates[i]), float(exact[i])) for i in top]
+
+
+class HNSWIndex(_AnnIndex):
+    kind = "hnsw"
+
+    def __init__(self, path, **kwargs):
+        super().__init__(path, **kwargs)
+        self._index = None
+
+    def _new_index(self, dim, capacity):
+        import hnswlib
+        index = hnswlib.Index(space="ip", dim=dim)
+        index.init_index(max_elements=capacity, ef_construction=HNSW_EF_CONSTRUCTION, M=HNSW_M)
+        index.set_ef(HNSW_EF_SEARCH)
+        return index
+
+    def _build(self, store):
+        self._index = self._new_index(store.dim, max(store.count, 1))
+        for start in range(0, store.count, ASSIGN_BLOCK_ROWS):
+            end = min(start + ASSIGN_BLOCK_ROWS, store.count)
+            rows = [r for r in range(start, end) if r not in store.deleted]
+            if rows:
+                self._index.add_items(np.asarray(store.vectors[rows], dtype=np.float32), rows)
+
+    def _insert(self, store, start, end):
+        if end > self._index.get_max_elements():
+            self._index.resize_index(max(end, 2 * self._index.get_max_elements()))
+        self._index.add_items(np.asarray(store.vectors[start:end], dtype=np.float32), list(range(start, end)))
+
+    def delete(self, rows):
+        if not self.trained:
+            return
+        for row in rows:
+            try:
+                self._index.mark_deleted(int(row))
+            except RuntimeError:
+                pass   # never indexed
+        self._save()
+
+    def _save(self):
+        tmp = self._file("ann_hnsw.tmp.bin")
+        self._index.save_index(tmp)
+        os.replace(tmp, self._file("ann_hnsw.bin"))
+        # hnswlib doesn't store the dimension in its file — it must be given to load it
+        self._write_meta(dim=self._index.dim)
+
+    def _load(self, meta):
+        import hnswlib
+        index = hnswlib.Index(space="ip", dim=meta["dim"])
+        self._index = index
+        index.load_index(self._file("ann_hnsw.bin"))
+        index.set_ef(HNSW_EF_SEARCH)
+
+    def _search(self, store, query, k):
+        # Deleted rows are marked in the graph, so they never come back
+        n = min(k, store.live_count)
+        if n == 0:
+            return []
+        self._index.set_ef(max(HNSW_EF_SEARCH, n))
+        labels, distances = self._index.knn_query(np.asarray(query, dtype=np.float32).reshape(1, -1), k=n)
+        return [(int(row), 1.0 - float(d)) for row, d in zip(labels[0], distances[0])]
+
+
+def make_ann(kind, path):
+    """The ANN index named in config.VECTOR_INDEX, or None for exact search."""
+    if kind in (None, "", "exact"):
+        return None
+    if kind == "ivf":
+        return IVFIndex(path)
+    if kind == "hnsw":
+        try:
+            import hnswlib  # noqa: F401
+        except ImportError:
+            print("[ANN] hnswlib is not installed — using the built-in IVF index instead")
+            return IVFIndex(path)
+        return HNSWIndex(path)
+    raise ValueError(f"Unknown VECTOR_INDEX {kind!r} — use 'exact', 'ivf' or 'hnsw'")
@@ -0,0 +1,185 @@
+import os
+import re
+import math
+from collections import Counter
+
+import numpy as np
+
+K1 = 1.2
+B = 0.75
+
+# Words too common in questions and manuals to say anything about a chunk
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "does", "for", "from", "how",
+    "i", "if", "in", "is", "it", "its", "me", "my", "of", "on", "or", "so", "that", "the", "then",
+    "this", "to", "was", "what", "when", "where", "which", "will", "with", "you", "your",
+}
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def _stem(word: str) -> str:
+    # Plurals only — enough for "messages" to find "message" without a stemmer's surprises
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def tokenize(text: str) -> list:
+    return [_stem(w) for w in _TOKEN.findall(text.lower()) if w not in STOP_WORDS]
+
+
+class BM25Index:
+    def __init__(self):
+        """
+        Inverted index over the vector store's chunks, addressed by the same
+        row numbers. Each term maps to parallel arrays of rows and term
+        counts, so scoring a query is a few vectorised adds per query term.
+        Deleted rows are masked until compact() renumbers them with the store.
+        """
+        self.count     = 0                              # rows covered, deleted included
+        self.lengths   = np.zeros(0, dtype=np.float32)  # tokens per row, 0 once deleted
+        self.deleted   = set()
+        self._postings = {}                             # term -> (rows int32, counts float32)
+
+    @property
+    def live_count(self) -> int:
+        return self.count - len(self.deleted)
+
+    # ── Updates ───────────────────────────────────────────────────────────────
+
+    def _grow(self, end: int):
+        if end > self.count:
+            self.lengths = np.concatenate([self.lengths, np.zeros(end - self.count, dtype=np.float32)])
+            self.count = end
+
+    def add(self, rows, texts):
+        new = {}
+        lengths = {}
+        for row, text in zip(rows, texts):
+            counts = Counter(tokenize(text))
+            lengths[row] = sum(counts.values())
+            for term, n in counts.items():
+                postings = new.setdefault(term, ([], []))
+                postings[0].append(row)
+                postings[1].append(n)
+        if not lengths:
+            return
+        self._grow(max(lengths) + 1)
+        for row, length in lengths.items():
+            self.lengths[row] = length
+        for term, (term_rows, term_counts) in new.items():
+            term_rows = np.asarray(term_rows, dtype=np.int32)
+            term_counts = np.asarray(term_counts, dtype=np.float32)
+            old = self._postings.get(term)
+            if old is not None:
+                term_rows = np.concatenate([old[0], term_rows])
+                term_counts = np.concatenate([old[1], term_counts])
+            self._postings[term] = (term_rows, term_counts)
+
+    def delete(self, rows):
+        rows = [int(r) for r in rows]
+        if not rows:
+            return
+        self._grow(max(rows) + 1)
+        self.deleted.update(rows)
+        self.lengths[rows] = 0
+
+    def compact(self, remap: dict):
+        """Apply the store's {old row: new row} after it dropped its deleted rows."""
+        mapping = np.full(self.count, -1, dtype=np.int64)
+        for old, new in remap.items():
+            if old < self.count:
+                mapping[old] = new
+        postings = {}
+        for term, (rows, counts) in self._postings.items():
+            moved = mapping[rows]
+            keep = moved >= 0
+            if keep.any():
+                postings[term] = (moved[keep].astype(np.int32), counts[keep])
+        lengths = np.zeros(len(remap), dtype=np.float32)
+        kept = mapping >= 0
+        lengths[mapping[kept]] = self.lengths[kept]
+        self._postings, self.lengths = postings, lengths
+        self.count, self.deleted = len(remap), set()
+
+    # ── Search ────────────────────────────────────────────────────────────────
+
+    def search(self, query: str, k: int):
+        """
+        Up to k (row, score, matched) triples, best first, where matched is how
+        many of the query's distinct terms the chunk contains.
+        """
+        terms = set(tokenize(query))
+        live = self.live_count
+        if not terms or live <= 0:
+            return []
+        avg_length = float(self.lengths.sum()) / live or 1.0
+        scores = np.zeros(self.count, dtype=np.float32)
+        matched = np.zeros(self.count, dtype=np.int16)
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            rows, counts = postings
+            # Document frequency still counts deleted rows until the next
+            # compaction — close enough for ranking
+            df = len(rows)
+            idf = math.log(1 + (live - df + 0.5) / (df + 0.5))
+            norm = K1 * (1 - B + B * self.lengths[rows] / avg_length)
+            scores[rows] += idf * counts * (K1 + 1) / (counts + norm)
+            matched[rows] += 1
+        if self.deleted:
+            scores[list(self.deleted)] = 0
+        hits = np.flatnonzero(scores)
+        if len(hits) == 0:
+            return []
+        if len(hits) > k:
+            hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+        hits = hits[np.argsort(-scores[hits])]
+        return [(int(row), float(scores[row]), int(matched[row])) for row in hits]
+
+    # ── Persistence ───────────────────────────────────────────────────────────
+
+    def save(self, path: str):
+        terms = sorted(self._postings)
+        sizes = [len(self._postings[t][0]) for t in terms]
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=offsets[1:])
+        empty_rows, empty_counts = np.zeros(0, np.int32), np.zeros(0, np.float32)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            np.savez(
+                f,
+                count=np.int64(self.count),
+                deleted=np.array(sorted(self.deleted), dtype=np.int64),
+                lengths=self.lengths,
+                terms=np.array(terms, dtype=str),
+                offsets=offsets,
+                rows=np.concatenate([self._postings[t][0] for t in terms]) if terms else empty_rows,
+                counts=np.concatenate([self._postings[t][1] for t in terms]) if terms else empty_counts,
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str):
+        """The saved index, or None if there is none or it can't be read."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                index = cls()
+                index.count = int(data["count"])
+                index.deleted = set(int(r) for r in data["deleted"])
+                index.lengths = data["lengths"]
+                offsets, rows, counts = data["offsets"], data["rows"], data["counts"]
+                for i, term in enumerate(data["terms"].tolist()):
+                    start, end = offsets[i], offsets[i + 1]
+                    index._postings[term] = (rows[start:end], counts[start:end])
+            return index
+        except Exception as e:
+            print(f"Keyword index unreadable, rebuilding it: {e}")
+            return None
@@ -0,0 +1,337 @@
+import os
+import re
+import sys
+import json
+import mmap
+import struct
+import threading
+from collections import OrderedDict
+
+DICTIONARY_DIR = "dictionary"
+SOURCE_PATH = os.path.join(DICTIONARY_DIR, "words.tsv")     # hand-written word list: word<TAB>definition
+WORDNET_PATH = os.path.join(DICTIONARY_DIR, "wordnet.tsv")  # single words from WordNet 3.0, see --export-wordnet
+SOURCE_PATHS = [SOURCE_PATH, WORDNET_PATH]                  # an earlier list's definition wins
+INDEX_PATH = os.path.join(DICTIONARY_DIR, "words.idx")      # built from the sources, memory-mapped at runtime
+DEFINITION_CACHE_PATH = "definition_cache.json"
+DEFINITION_CACHE_MAX_ENTRIES = 500
+
+# words.idx:  MAGIC | uint32 count | uint32 offsets[count + 1] | records
+# Records are "word\tdefinition" in UTF-8, sorted by word, so a lookup is a
+# binary search over the mapped file without loading it.
+MAGIC = b"ZDICT1\0\0"
+_HEADER = struct.Struct("<8sI")
+
+_NON_WORD = re.compile(r"[^\w\s'-]+")
+_VOWELS = set("aeiou")
+# An -ed/-ing WordNet lemma seen fewer times than this in the tagged corpus
+# ("saved", "using") is read as the inflected verb rather than its own sense
+_RARE_LEMMA_COUNT = 5
+
+
+def normalise_term(term: str) -> str:
+    term = _NON_WORD.sub("", term.lower().replace("’", "'")).strip(" '-")
+    return " ".join(term.split())
+
+
+def _verb_bases(stem: str) -> list:
+    """Base forms of what is left after stripping -ed or -ing, likeliest first."""
+    # After consonant-vowel-consonant a silent e was usually dropped (hoped,
+    # coding); a doubled final consonant was usually added (running)
+    if len(stem) == 2:
+        return [stem + "e", stem]
+    if stem[-1] not in _VOWELS and stem[-1] not in "wxy" and stem[-2] in _VOWELS and stem[-3] not in _VOWELS:
+        bases = [stem + "e", stem]
+    else:
+        bases = [stem, stem + "e"]
+    if len(stem) >= 4 and stem[-1] == stem[-2] and stem[-1] not in _VOWELS:
+        bases.append(stem[:-1])
+    return bases
+
+
+def _plural(word: str) -> str:
+    if word.endswith(("s", "x", "z", "ch", "sh")):
+        return word + "es"
+    if word.endswith("y") and word[-2] not in _VOWELS:
+        return word[:-1] + "ies"
+    return word + "s"
+
+
+def _variants(term: str):
+    """The term, then guesses at its base form for plurals and verb endings."""
+    yield term
+    if " " in term:
+        yield term.replace(" ", "-")
+        return
+    # The plain -s form first: "notes" is "note" and "cookies" is "cookie";
+    # only "boxes" and "stories" need more taken off
+    for suffix, replacement in (("s", ""), ("ies", "y"), ("es", ""), ("ied", "y")):
+        if term.endswith(suffix) and len(term) - len(suffix) >= 3:
+            yield term[:-len(suffix)] + replacement
+    for suffix in ("ed", "ing"):
+        if term.endswith(suffix) and len(term) - len(suffix) >= 2:
+            yield from _verb_bases(term[:-len(suffix)])
+    if term.endswith("'s") and len(term) >= 5:
+        yield term[:-2]
+
+
+# ── Building ──────────────────────────────────────────────────────────────────
+
+def read_tsv(path: str) -> dict:
+    entries = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip() or line.startswith("#") or "\t" not in line:
+                continue
+            word, definition = line.rstrip("\n").split("\t", 1)
+            word = normalise_term(word)
+            if word and definition.strip():
+                entries.setdefault(word, definition.strip())
+    return entries
+
+
+def read_sources(paths) -> dict:
+    """
+    Merge word lists; a word keeps the definition from the first list that
+    has it. A later list's inflection of an earlier list's word ("files" when
+    words.tsv has "file") is left out so lookups reach the earlier word.
+    """
+    entries = {}
+    for i, path in enumerate(paths):
+        if not os.path.exists(path):
+            continue
+        earlier = set(entries) if i else set()
+        for word, definition in read_tsv(path).items():
+            if word in entries or any(base in earlier for base in _variants(word) if base != word):
+                continue
+            entries[word] = definition
+    return entries
+
+
+def read_wordnet(single_words: bool = False) -> dict:
+    """
+    The commonest sense of every WordNet lemma (needs nltk and its wordnet
+    corpus). single_words leaves out phrases, proper nouns and anything with
+    digits or hyphens — the subset bundled as WORDNET_PATH.
+
+    Inflected forms get the sense their ending implies: a rarely seen -ed or
+    -ing lemma takes its base verb's definition ("saved" is "save", not
+    "rescued from sin") and a plural not in WordNet takes the noun sense when
+    the commonest sense is a verb ("notes" is "a brief written record").
+    """
+    from nltk.corpus import wordnet
+    senses = {}  # word -> {pos: (count, definition)}, pos "" for the commonest overall
+    for name in wordnet.all_lemma_names():
+        if single_words and not name.isalpha():
+            continue
+        # synsets() lists senses most frequent first within each part of
+        # speech; the tagged-corpus count picks between parts of speech
+        best = {}
+        for synset in wordnet.synsets(name):
+            for lemma in synset.lemmas():
+                if lemma.name().lower() != name or (single_words and not lemma.name().islower()):
+                    continue
+                sense = (lemma.count(), synset.definition())
+                for pos in ("", synset.pos()):
+                    if pos in ("", "n", "v") and (pos not in best or sense[0] > best[pos][0]):
+                        best[pos] = sense
+        word = normalise_term(name.replace("_", " "))
+        if word and best.get("", (0, ""))[1]:
+            senses[word] = best
+
+    definitions = {word: best[""][1] for word, best in senses.items()}
+    for word, best in senses.items():
+        for suffix in ("ed", "ing"):
+            if not word.endswith(suffix) or len(word) - len(suffix) < 2 or best[""][0] >= _RARE_LEMMA_COUNT:
+                continue
+            for base in _verb_bases(word[:-len(suffix)]):
+                verb = senses.get(base, {}).get("v")
+                if verb and verb[0] > best[""][0]:
+                    definitions[word] = verb[1]
+                    break
+        noun = best.get("n")
+        if noun and noun[0] > 0 and noun[1] != best[""][1] and _plural(word) not in senses:
+            definitions[_plural(word)] = noun[1]
+    return {word: definition[0].upper() + definition[1:] + "." for word, definition in definitions.items()}
+
+
+def write_tsv(entries: dict, path: str, header: str = "") -> int:
+    """Write entries {word: definition} as a word list, header lines commented out. Returns the word count."""
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8", newline="\n") as f:
+        for line in header.splitlines():
+            f.write(f"# {line}".rstrip() + "\n")
+        for word, definition in sorted(entries.items()):
+            f.write(f"{word}\t{' '.join(definition.split())}\n")
+    os.replace(tmp, path)
+    return len(entries)
+
+
+def build_index(entries: dict, path: str = INDEX_PATH) -> int:
+    """Write entries {word: definition} as a sorted, offset-indexed file. Returns the word count."""
+    records = [f"{word}\t{' '.join(definition.split())}".encode("utf-8") for word, definition in sorted(entries.items())]
+    offsets, position = [], 0
+    for record in records:
+        offsets.append(position)
+        position += len(record)
+    offsets.append(position)
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(records)))
+        f.write(struct.pack(f"<{len(offsets)}I", *offsets))
+        for record in records:
+            f.write(record)
+    os.replace(tmp, path)
+    return len(records)
+
+
+# ── Lookup ────────────────────────────────────────────────────────────────────
+
+class Dictionary:
+    def __init__(self, path=INDEX_PATH, sources=SOURCE_PATHS):
+        """
+        Read-only word -> definition index. Opening maps the file; each lookup
+        is a binary search touching a handful of pages, so it takes
+        microseconds rather than a model generation.
+        """
+        self.path    = path
+        self.sources = [source for source in sources if os.path.exists(source)]
+        self.count   = 0
+        self._file   = None
+        self._map    = None
+        self._offsets = None
+        self._data_start = 0
+        self._lock   = threading.Lock()
+
+    def _stale(self) -> bool:
+        if not os.path.exists(self.path):
+            return True
+        built = os.path.getmtime(self.path)
+        return any(os.path.getmtime(source) > built for source in self.sources)
+
+    def open(self):
+        """Map the index, building it from the bundled word lists first if it is missing or older."""
+        with self._lock:
+            if self._map is not None:
+                return self
+            if self._stale() and self.sources:
+                count = build_index(read_sources(self.sources), self.path)
+                print(f"[Dictionary] Built index of {count} words from {', '.join(self.sources)}")
+            if not os.path.exists(self.path):
+                print(f"[Dictionary] No word list in {DICTIONARY_DIR} — definitions will come from the model")
+                return self
+            self._file = open(self.path, "rb")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, self.count = _HEADER.unpack_from(self._map, 0)
+            if magic != MAGIC:
+                raise ValueError(f"{self.path} is not a dictionary index")
+            table = _HEADER.size + 4 * (self.count + 1)
+            self._offsets = memoryview(self._map)[_HEADER.size:table].cast("I")
+            self._data_start = table
+        return self
+
+    def close(self):
+        with self._lock:
+            if self._offsets is not None:
+                self._offsets.release()
+                self._offsets = None
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _record(self, i: int):
+        start = self._data_start + self._offsets[i]
+        end = self._data_start + self._offsets[i + 1]
+        tab = self._map.find(b"\t", start, end)
+        return self._map[start:tab], start, tab, end
+
+    def _find(self, word: str):
+        key = word.encode("utf-8")
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._record(mid)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count:
+            found, _, tab, end = self._record(lo)
+            if found == key:
+                return self._map[tab + 1:end].decode("utf-8")
+        return None
+
+    def lookup(self, term: str):
+        """Definition of term, trying simple base forms of it; None if the word list lacks it."""
+        if self._map is None:
+            return None
+        term = normalise_term(term)
+        for variant in _variants(term):
+            definition = self._find(variant)
+            if definition:
+                return definition
+        return None
+
+    def __contains__(self, term) -> bool:
+        return self.lookup(term) is not None
+
+
+class DefinitionCache:
+    def __init__(self, path=DEFINITION_CACHE_PATH, max_entries=DEFINITION_CACHE_MAX_ENTRIES):
+        """Model-written definitions for terms the dictionary lacks, least recently used evicted first."""
+        self.path        = path
+        self.max_entries = max_entries
+        self._entries    = OrderedDict()
+        self._lock       = threading.Lock()
+        if os.path.exists(path):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    self._entries.update(json.load(f))
+            except Exception as e:
+                print(f"[Dictionary] Could not read {path}: {e}")
+
+    def get(self, term: str):
+        key = normalise_term(term)
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, term: str, definition: str):
+        key = normalise_term(term)
+        if not key or not definition.strip():
+            return
+        with self._lock:
+            self._entries[key] = definition.strip()
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            data = dict(self._entries)
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=1)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            print(f"[Dictionary] Could not save {self.path}: {e}")
+
+
+if __name__ == "__main__":
+    # py -m core.dictionary [--wordnet] [extra.tsv ...]  — rebuild words.idx
+    # py -m core.dictionary --export-wordnet             — regenerate the bundled dictionary/wordnet.tsv
+    if sys.argv[1:] == ["--export-wordnet"]:
+        from nltk.corpus import wordnet
+        header = (f"Single words from WordNet {wordnet.get_version()}, built by py -m core.dictionary "
+                  f"--export-wordnet.\n\n{wordnet.license()}")
+        print(f"Wrote {write_tsv(read_wordnet(single_words=True), WORDNET_PATH, header)} words to {WORDNET_PATH}")
+        sys.exit()
+    entries = read_sources(SOURCE_PATHS)
+    for arg in sys.argv[1:]:
+        extra = read_wordnet() if arg == "--wordnet" else read_tsv(arg)
+        for word, definition in extra.items():
+            entries.setdefault(word, definition)
+    print(f"Wrote {build_index(entries)} words to {INDEX_PATH}")
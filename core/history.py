@@ -0,0 +1,92 @@
+import threading
+
+from config import HISTORY_TOKEN_BUDGET, HISTORY_KEEP_TURNS, HISTORY_SUMMARY_MAX_TOKENS
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count — about four characters per token for English text."""
+    return len(text) // 4 + 1
+
+
+class ConversationHistory:
+    def __init__(self, summarize, token_budget=HISTORY_TOKEN_BUDGET, keep_turns=HISTORY_KEEP_TURNS):
+        """
+        Chat history with a bounded prompt size.
+
+        The most recent turns are kept word for word as long as they fit in
+        token_budget (and there are at most keep_turns of them). Older turns
+        are folded into a short running summary by summarize(previous_summary,
+        turns) on a background thread, so the history sent to the model stays
+        the same size no matter how long the session runs.
+        """
+        self.summarize    = summarize
+        self.token_budget = token_budget
+        self.keep_turns   = keep_turns
+        self.summary      = ""
+        self.version      = 0    # bumped by every add_turn
+        self._turns       = []   # [(user, assistant)] kept verbatim
+        self._to_fold     = []   # turns dropped from _turns, not yet in the summary
+        self._lock        = threading.Lock()
+        self._folding     = False
+
+    @staticmethod
+    def _turn_tokens(turn) -> int:
+        user, assistant = turn
+        return estimate_tokens(user) + estimate_tokens(assistant) + 8
+
+    def token_count(self) -> int:
+        with self._lock:
+            return estimate_tokens(self.summary) + sum(self._turn_tokens(t) for t in self._turns)
+
+    def messages(self) -> list:
+        """History in Ollama message format: the summary, then the recent turns."""
+        with self._lock:
+            messages = []
+            if self.summary:
+                messages.append({
+                    "role": "system",
+                    "content": f"Summary of the earlier conversation with this user:\n{self.summary}"
+                })
+            for user, assistant in self._turns:
+                messages.append({"role": "user", "content": user})
+                messages.append({"role": "assistant", "content": assistant})
+            return messages
+
+    def add_turn(self, user: str, assistant: str):
+        with self._lock:
+            self.version += 1
+            self._turns.append((user, assistant))
+            budget = self.token_budget - estimate_tokens(self.summary)
+            used = sum(self._turn_tokens(t) for t in self._turns)
+            while len(self._turns) > 1 and (len(self._turns) > self.keep_turns or used > budget):
+                turn = self._turns.pop(0)
+                used -= self._turn_tokens(turn)
+                self._to_fold.append(turn)
+            start = bool(self._to_fold) and not self._folding
+            if start:
+                self._folding = True
+        if start:
+            threading.Thread(target=self._fold, daemon=True).start()
+
+    def _fold(self):
+        while True:
+            with self._lock:
+                turns = list(self._to_fold)
+                previous = self.summary
+                if not turns:
+                    self._folding = False
+                    return
+            try:
+                summary = self.summarize(previous, turns).strip()
+            except Exception as e:
+                print(f"[History] Summarization failed, keeping old summary: {e}")
+                with self._lock:
+                    del self._to_fold[:len(turns)]
+                    self._folding = False
+                return
+            max_chars = HISTORY_SUMMARY_MAX_TOKENS * 4
+            if len(summary) > max_chars:
+                summary = summary[:max_chars].rsplit(" ", 1)[0] + "..."
+            with self._lock:
+                self.summary = summary
+                del self._to_fold[:len(turns)]
@@ -0,0 +1,182 @@
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+PAGES_PER_TASK = 4        # PDF pages parsed per worker task
+CHUNK_WORDS = 300         # target chunk length
+CHUNK_OVERLAP_WORDS = 50  # words repeated at the start of the next chunk
+EMBED_BATCH_SIZE = 64     # chunks per embedding call
+TEXT_EXTENSIONS = {".txt", ".md"}
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
+
+
+# ── Parsing (runs in worker processes) ────────────────────────────────────────
+
+def _pdf_page_count(path: str) -> int:
+    import fitz
+    with fitz.open(path) as doc:
+        return doc.page_count
+
+
+def _parse_pdf_pages(path: str, start: int, end: int) -> list:
+    """[(page label, text)] for pages start..end-1 of a PDF."""
+    import fitz
+    with fitz.open(path) as doc:
+        return [(str(i + 1), doc[i].get_text()) for i in range(start, min(end, doc.page_count))]
+
+
+def _parse_text(path: str) -> list:
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return [("1", f.read())]
+
+
+def _parse_other(path: str) -> list:
+    """Anything that isn't PDF or plain text goes through LlamaIndex's readers."""
+    from llama_index.core import SimpleDirectoryReader
+    documents = SimpleDirectoryReader(input_files=[path]).load_data()
+    return [(doc.metadata.get("page_label", str(i + 1)), doc.text) for i, doc in enumerate(documents)]
+
+
+def chunk_text(text: str, size: int = CHUNK_WORDS, overlap: int = CHUNK_OVERLAP_WORDS) -> list:
+    """Split text into chunks of about `size` words along sentence boundaries."""
+    sentences = [s.split() for s in _SENTENCE_SPLIT.split(text) if s.strip()]
+    chunks, current = [], []
+    for words in sentences:
+        if current and len(current) + len(words) > size:
+            chunks.append(" ".join(current))
+            current = current[-overlap:] if overlap else []
+        current.extend(words)
+        while len(current) > size:
+            chunks.append(" ".join(current[:size]))
+            current = current[size - overlap:] if overlap else current[size:]
+    if current and (not chunks or len(current) > overlap):
+        chunks.append(" ".join(current))
+    return chunks
+
+
+# ── Pipeline ──────────────────────────────────────────────────────────────────
+
+class IngestStats:
+    def __init__(self, total_pages: int):
+        self.total_pages = total_pages
+        self.pages       = 0
+        self.chunks      = 0
+        self.started     = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        return max(time.perf_counter() - self.started, 1e-6)
+
+    @property
+    def pages_per_sec(self) -> float:
+        return self.pages / self.elapsed
+
+    @property
+    def chunks_per_sec(self) -> float:
+        return self.chunks / self.elapsed
+
+    def status_line(self) -> str:
+        return (f"INDEXING {self.pages}/{self.total_pages} PAGES  •  "
+                f"{self.pages_per_sec:.1f} PAGES/S  •  {self.chunks_per_sec:.1f} CHUNKS/S")
+
+
+def _plan_tasks(files, failed) -> list:
+    """Split files into (name, parse function, args, page count) tasks; unreadable files go in failed."""
+    tasks = []
+    for name, path in files:
+        ext = os.path.splitext(name)[1].lower()
+        if ext == ".pdf":
+            try:
+                pages = _pdf_page_count(path)
+            except Exception as e:
+                print(f"Skipping {name}, could not open it: {e}")
+                failed.add(name)
+                continue
+            for start in range(0, pages, PAGES_PER_TASK):
+                end = min(start + PAGES_PER_TASK, pages)
+                tasks.append((name, _parse_pdf_pages, (path, start, end), end - start))
+        elif ext in TEXT_EXTENSIONS:
+            tasks.append((name, _parse_text, (path,), 1))
+        else:
+            tasks.append((name, _parse_other, (path,), 1))
+    return tasks
+
+
+def ingest_files(files, embed_texts, writer, on_progress=None, workers=None):
+    """
+    Parse, chunk and embed files, streaming the chunks into a StoreWriter.
+
+    files is [(name, path)]. PDFs are parsed a few pages at a time in a process
+    pool; only a bounded number of tasks is in flight, and chunks are embedded
+    in fixed-size batches as soon as enough have arrived, so memory stays flat
+    however large the knowledge base is.
+
+    A file that can't be read is skipped rather than failing the whole run.
+    Returns ({name: [rows]} for the files ingested, {name: [rows]} for the
+    skipped ones) — rows a skipped file wrote before failing are the caller's
+    to delete once the writer commits.
+    """
+    failed = set()
+    tasks = _plan_tasks(files, failed)
+    stats = IngestStats(sum(t[3] for t in tasks))
+    rows_by_file = {name: [] for name, _ in files}
+    pending_chunks = []
+    chunk_counters = {}
+
+    def _flush(final=False):
+        while pending_chunks and (final or len(pending_chunks) >= EMBED_BATCH_SIZE):
+            batch = pending_chunks[:EMBED_BATCH_SIZE]
+            del pending_chunks[:EMBED_BATCH_SIZE]
+            vectors = embed_texts([r["text"] for r in batch])
+            for row, record in zip(writer.add(batch, vectors), batch):
+                rows_by_file[record["metadata"]["file_name"]].append(row)
+            stats.chunks += len(batch)
+            if on_progress:
+                on_progress(stats)
+
+    workers = workers or os.cpu_count() or 2
+    # A process pool only pays for its startup on more than a handful of tasks
+    if len(tasks) > 2:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    else:
+        executor = ThreadPoolExecutor(max_workers=1)
+    max_in_flight = workers * 2
+
+    with executor:
+        todo = list(reversed(tasks))
+        in_flight = {}
+        while todo or in_flight:
+            while todo and len(in_flight) < max_in_flight:
+                name, fn, args, pages = todo.pop()
+                in_flight[executor.submit(fn, *args)] = (name, pages)
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, pages = in_flight.pop(future)
+                stats.pages += pages
+                if name in failed:
+                    continue
+                try:
+                    parsed = future.result()
+                except Exception as e:
+                    print(f"Skipping {name}, could not read it: {e}")
+                    failed.add(name)
+                    pending_chunks[:] = [c for c in pending_chunks if c["metadata"]["file_name"] != name]
+                    continue
+                for page_label, text in parsed:
+                    for chunk in chunk_text(text):
+                        n = chunk_counters.get(name, 0)
+                        chunk_counters[name] = n + 1
+                        pending_chunks.append({
+                            "id": f"{name}#{n}", "text": chunk,
+                            "metadata": {"file_name": name, "page_label": page_label},
+                        })
+            _flush()
+    _flush(final=True)
+    if on_progress:
+        on_progress(stats)
+    print(f"Ingested {stats.pages} pages into {stats.chunks} chunks in {stats.elapsed:.1f}s "
+          f"({stats.pages_per_sec:.1f} pages/s, {stats.chunks_per_sec:.1f} chunks/s)")
+    skipped = {name: rows_by_file.pop(name) for name in failed}
+    return rows_by_file, skipped
@@ -1,7 +1,112 @@
-import ollama
-from config import MODEL_NAME, SYSTEM_PROMPT
+import time
+import threading
 
-def chat(user_message: str, history: list = [], context: str = "") -> str:
+from config import (MODEL_NAME, SYSTEM_PROMPT, OLLAMA_HOST,
+                    KEEP_ALIVE_POLICY, KEEP_ALIVE_IDLE_MINUTES, KEEP_ALIVE_MIN_FREE_MB)
+from core.startup import timed
+
+MEMORY_CHECK_SECONDS = 15   # how often the "memory" policy looks at free RAM
+
+_ollama = None
+_client = None
+_host = OLLAMA_HOST
+_policy = KEEP_ALIVE_POLICY
+_loaded_until = 0.0   # when Ollama will unload the model if nothing uses it (monotonic)
+_state_lock = threading.Lock()
+_monitor = None
+
+
+def _get_ollama():
+    """Import Ollama and create its client on first use — neither is needed to show the window."""
+    global _ollama, _client
+    if _client is None:
+        if _ollama is None:
+            with timed("import ollama"):
+                import ollama
+            _ollama = ollama
+        _client = _ollama.Client(host=_host)
+    return _client
+
+
+def set_host(host):
+    """Point the client at another Ollama server, e.g. the benchmarks' stand-in."""
+    global _host, _client
+    _host = host
+    _client = None
+
+
+# ── Keep-alive ────────────────────────────────────────────────────────────────
+# Every request tells Ollama how long to keep the model afterwards, so the
+# policy here — not Ollama's 5-minute default — decides when it is unloaded
+
+def set_keep_alive_policy(policy: str):
+    global _policy
+    if policy not in ("always", "idle", "memory"):
+        raise ValueError(f"Unknown keep-alive policy {policy!r} — use 'always', 'idle' or 'memory'")
+    _policy = policy
+
+
+def keep_alive():
+    """The keep_alive value sent with each request: -1 keeps the model loaded indefinitely."""
+    if _policy == "idle":
+        return f"{KEEP_ALIVE_IDLE_MINUTES}m"
+    return -1
+
+
+def _mark_used():
+    global _loaded_until
+    with _state_lock:
+        _loaded_until = time.monotonic() + (KEEP_ALIVE_IDLE_MINUTES * 60 if _policy == "idle" else float("inf"))
+
+
+def is_model_loaded() -> bool:
+    """Whether the model should still be in Ollama's memory, going by what Zigsy last asked for."""
+    with _state_lock:
+        return time.monotonic() < _loaded_until
+
+
+def warm_up():
+    """
+    Load the model without generating anything (a chat with no messages), so
+    the first question doesn't wait for it. Returns the seconds it took.
+    """
+    start = time.perf_counter()
+    _get_ollama().chat(model=MODEL_NAME, messages=[], keep_alive=keep_alive())
+    _mark_used()
+    return time.perf_counter() - start
+
+
+def unload():
+    """Ask Ollama to drop the model from memory now."""
+    global _loaded_until
+    _get_ollama().chat(model=MODEL_NAME, messages=[], keep_alive=0)
+    with _state_lock:
+        _loaded_until = 0.0
+
+
+def start_keep_alive_monitor(interval: float = MEMORY_CHECK_SECONDS):
+    """Under the "memory" policy, unload the model whenever free RAM runs low."""
+    global _monitor
+    if _policy != "memory" or (_monitor and _monitor.is_alive()):
+        return
+
+    def _watch():
+        import psutil
+        while True:
+            time.sleep(interval)
+            try:
+                free_mb = psutil.virtual_memory().available / (1024 * 1024)
+                if free_mb < KEEP_ALIVE_MIN_FREE_MB and is_model_loaded():
+                    unload()
+                    print(f"[LLM] Only {free_mb:.0f} MB RAM free — unloaded {MODEL_NAME}")
+            except Exception as e:
+                print(f"[LLM] Keep-alive check failed: {e}")
+
+    _monitor = threading.Thread(target=_watch, daemon=True)
+    _monitor.start()
+
+
+def build_messages(user_message: str, history: list = [], context: str = "") -> list:
     messages = []
     messages.append({"role": "system", "content": SYSTEM_PROMPT})
     messages += history
@@ -24,15 +129,58 @@ USER QUESTION: {user_message}"""
         augmented_message = user_message
 
     messages.append({"role": "user", "content": augmented_message})
+    return messages
+
+
+def stream_chat(user_message: str, history: list = [], context: str = "", cancel=None):
+    """
+    Yield the reply piece by piece as Ollama generates it. If the cancel
+    event is set the stream is closed at the next token, which drops the
+    connection and stops Ollama generating.
+    """
+    messages = build_messages(user_message, history, context)
+    stream = _get_ollama().chat(model=MODEL_NAME, messages=messages, stream=True, keep_alive=keep_alive())
+    _mark_used()
+    try:
+        for chunk in stream:
+            if cancel is not None and cancel.is_set():
+                break
+            text = chunk['message']['content']
+            if text:
+                yield text
+    finally:
+        close = getattr(stream, "close", None)
+        if close:
+            close()
 
-    stream = ollama.chat(model=MODEL_NAME, messages=messages, stream=True)
 
+def chat(user_message: str, history: list = [], context: str = "", on_token=None, cancel=None) -> str:
+    """
+    Return the full reply. If on_token is given it is called with each piece
+    of text as soon as it arrives, so callers can show the reply while it is
+    still being generated. A cancelled reply is returned as far as it got.
+    """
     full_response = ""
-    print("\nAssistant: ", end="", flush=True)
-    for chunk in stream:
-        text = chunk['message']['content']
-        print(text, end="", flush=True)
+    for text in stream_chat(user_message, history, context, cancel=cancel):
+        if on_token:
+            on_token(text)
         full_response += text
+    return full_response
+
+
+def summarize_conversation(previous_summary: str, turns: list) -> str:
+    """Fold (user, assistant) turns into the running summary of the conversation."""
+    transcript = "\n".join(f"User: {user}\nAssistant: {assistant}" for user, assistant in turns)
+    prompt = f"""Update the summary of a conversation between a user and their computer assistant.
+Keep names, facts about the user, what they were trying to do and what has already been explained.
+Write at most 120 words. Reply with the summary only.
+
+CURRENT SUMMARY:
+{previous_summary or "(none yet)"}
 
-    print("\n")
-    return full_response
\ No newline at end of file
+NEW CONVERSATION:
+{transcript}"""
+    response = _get_ollama().chat(model=MODEL_NAME, messages=[{"role": "user", "content": prompt}],
+                                  keep_alive=keep_alive())
+    _mark_used()
+    return response['message']['content']
@@ -34,40 +34,203 @@
 #     return "\n".join(parts)
 
 import json
+import math
 import os
-
-MEMORY_FILE = "memory.json"
-
-def load_memory() -> dict:
-    if os.path.exists(MEMORY_FILE):
-        with open(MEMORY_FILE, "r") as f:
-            return json.load(f)
-    return {"confusion_points": [], "user_name": None, "user_notes": []}
-
-def save_memory(memory: dict):
-    with open(MEMORY_FILE, "w") as f:
-        json.dump(memory, f, indent=2)
-
-def add_confusion(memory: dict, topic: str):
-    if topic not in memory["confusion_points"]:
-        memory["confusion_points"].append(topic)
-        save_memory(memory)
-
-def add_note(memory: dict, note: str):
-    if note not in memory["user_notes"]:
-        memory["user_notes"].append(note)
-        save_memory(memory)
-
-def get_memory_context(memory: dict) -> str:
+import re
+import threading
+
+MEMORY_FILE = "memory.json"        # compacted snapshot
+JOURNAL_FILE = "memory.journal"    # one JSON change per line since the snapshot
+COMPACT_EVERY = 200                # journal entries before the snapshot is rewritten
+MAX_CONTEXT_NOTES = 5
+MAX_CONTEXT_TOPICS = 5
+
+STOP_WORDS = {
+    "a", "an", "the", "and", "or", "is", "are", "was", "to", "of", "in", "on",
+    "my", "me", "i", "it", "do", "how", "what", "for", "with", "can", "you", "this", "that"
+}
+
+
+def _tokens(text: str) -> set:
+    return {w for w in re.findall(r"[a-z0-9']+", text.lower()) if w not in STOP_WORDS}
+
+
+class MemoryStore:
+    def __init__(self, path=MEMORY_FILE, journal_path=JOURNAL_FILE):
+        """
+        What Zigsy remembers about the user, saved as a snapshot plus an
+        append-only journal.
+
+        Each change is one fsynced line appended to the journal, so a crash can
+        at most lose the line being written; the snapshot is only ever replaced
+        atomically during compaction. Notes are deduplicated with sets and
+        indexed by word, so the notes relevant to a question are found without
+        scanning them all.
+        """
+        self.path             = path
+        self.journal_path     = journal_path
+        self.user_name        = None
+        self.confusion_points = []
+        self.user_notes       = []
+        self._confusion_set   = set()
+        self._note_set        = set()
+        self._postings        = {}   # word -> {note position}
+        self._journal_entries = 0
+        self._lock            = threading.Lock()
+
+    # ── Loading ───────────────────────────────────────────────────────────────
+
+    def load(self):
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            self.user_name = snapshot.get("user_name")
+            for topic in snapshot.get("confusion_points", []):
+                self._apply({"op": "confusion", "value": topic})
+            for note in snapshot.get("user_notes", []):
+                self._apply({"op": "note", "value": note})
+        torn = False
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        self._apply(json.loads(line))
+                    except ValueError:
+                        torn = True  # last line cut short by a crash mid-write
+                        break
+                    self._journal_entries += 1
+        # Rewrite the snapshot rather than appending after a torn line
+        if torn or self._journal_entries >= COMPACT_EVERY:
+            self._compact()
+        return self
+
+    def _apply(self, entry) -> bool:
+        op, value = entry["op"], entry["value"]
+        if op == "note":
+            if value in self._note_set:
+                return False
+            self._note_set.add(value)
+            position = len(self.user_notes)
+            self.user_notes.append(value)
+            for word in _tokens(value):
+                self._postings.setdefault(word, set()).add(position)
+        elif op == "confusion":
+            if value in self._confusion_set:
+                return False
+            self._confusion_set.add(value)
+            self.confusion_points.append(value)
+        elif op == "name":
+            if value == self.user_name:
+                return False
+            self.user_name = value
+        return True
+
+    # ── Writing ───────────────────────────────────────────────────────────────
+
+    def _record(self, op: str, value: str) -> bool:
+        entry = {"op": op, "value": value}
+        with self._lock:
+            if not self._apply(entry):
+                return False
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._journal_entries += 1
+            if self._journal_entries >= COMPACT_EVERY:
+                self._compact()
+        return True
+
+    def _compact(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        # Replaying the old journal over the new snapshot is harmless (every
+        # change is idempotent), so truncating after the swap is crash safe
+        open(self.journal_path, "w").close()
+        self._journal_entries = 0
+
+    def compact(self):
+        """Fold the journal into the snapshot."""
+        with self._lock:
+            self._compact()
+
+    def add_note(self, note: str) -> bool:
+        return self._record("note", note)
+
+    def add_confusion(self, topic: str) -> bool:
+        return self._record("confusion", topic)
+
+    def set_user_name(self, name: str) -> bool:
+        return self._record("name", name)
+
+    def to_dict(self) -> dict:
+        return {
+            "confusion_points": list(self.confusion_points),
+            "user_name": self.user_name,
+            "user_notes": list(self.user_notes),
+        }
+
+    # ── Recall ────────────────────────────────────────────────────────────────
+
+    def relevant_notes(self, query: str, limit: int = MAX_CONTEXT_NOTES) -> list:
+        """
+        The notes sharing the most (rarest) words with the query, topped up
+        with the most recent notes, in the order they were saved.
+        """
+        with self._lock:
+            total = len(self.user_notes)
+            scores = {}
+            for word in _tokens(query):
+                postings = self._postings.get(word)
+                if not postings:
+                    continue
+                idf = math.log(1 + total / len(postings))
+                for position in postings:
+                    scores[position] = scores.get(position, 0.0) + idf
+            ranked = sorted(scores, key=lambda p: (-scores[p], -p))[:limit]
+            chosen = set(ranked)
+            for position in range(total - 1, -1, -1):
+                if len(chosen) >= limit:
+                    break
+                chosen.add(position)
+            return [self.user_notes[p] for p in sorted(chosen)]
+
+    def relevant_topics(self, query: str, limit: int = MAX_CONTEXT_TOPICS) -> list:
+        q = query.lower()
+        mentioned = [t for t in self.confusion_points if t in q]
+        recent = [t for t in reversed(self.confusion_points) if t not in mentioned]
+        return (mentioned + recent)[:limit]
+
+
+# ── Module-level API ──────────────────────────────────────────────────────────
+
+def load_memory() -> MemoryStore:
+    return MemoryStore().load()
+
+def save_memory(memory: MemoryStore):
+    memory.compact()
+
+def add_confusion(memory: MemoryStore, topic: str):
+    memory.add_confusion(topic)
+
+def add_note(memory: MemoryStore, note: str):
+    memory.add_note(note)
+
+def get_memory_context(memory: MemoryStore, query: str = "") -> str:
     parts = []
 
-    if memory.get("confusion_points"):
-        topics = ", ".join(memory["confusion_points"])
-        parts.append(f"Topics this user has struggled with: {topics}. Be extra patient about these.")
+    topics = memory.relevant_topics(query)
+    if topics:
+        parts.append(f"Topics this user has struggled with: {', '.join(topics)}. Be extra patient about these.")
 
-    if memory.get("user_notes"):
+    notes = memory.relevant_notes(query)
+    if notes:
         notes_formatted = "\n".join(
-            f"  - {note}" for note in memory["user_notes"]
+            f"  - {note}" for note in notes
         )
         parts.append(
             f"IMPORTANT FACTS about this user — treat each one as separate and distinct:\n{notes_formatted}"
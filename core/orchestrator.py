@@ -0,0 +1,179 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from config import MODEL_CONCURRENCY
+
+PRIORITY_INTERACTIVE = 0   # questions the user typed or spoke
+PRIORITY_CLIPBOARD = 1     # dictionary lookups for copied words
+PRIORITY_IDLE = 2          # history summaries and other work nobody is waiting on
+
+JOB_WORKERS = 4   # jobs also do non-model work (file search, retrieval) off the Tk thread
+
+
+class RequestCancelled(Exception):
+    pass
+
+
+class Request:
+    def __init__(self, orchestrator, fn, priority: int, group, seq: int):
+        """
+        One unit of work. fn(request) runs on a worker thread; it should call
+        model_slot() around model calls and pass cancel_event down to them so
+        a superseded request stops generating at the next token.
+        """
+        self.orchestrator = orchestrator
+        self.fn           = fn
+        self.priority     = priority
+        self.group        = group
+        self.seq          = seq
+        self.cancel_event = threading.Event()
+        self.future       = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def cancel(self):
+        """Safe from any thread. A request still waiting for the model never reaches it."""
+        if not self.cancel_event.is_set():
+            self.cancel_event.set()
+            self.orchestrator._loop.call_soon_threadsafe(self.orchestrator._slots.drop, self)
+
+    def promote(self, priority: int):
+        """Raise the request to priority, moving it up the queue if it is waiting for the model."""
+        if priority < self.priority:
+            self.priority = priority
+            self.orchestrator._loop.call_soon_threadsafe(self.orchestrator._slots.reorder, self)
+
+    def result(self, timeout=None):
+        return self.future.result(timeout)
+
+    @contextmanager
+    def model_slot(self):
+        """Hold one of the model's slots; raises RequestCancelled if superseded while waiting."""
+        orchestrator = self.orchestrator
+        granted = asyncio.run_coroutine_threadsafe(
+            orchestrator._slots.acquire(self), orchestrator._loop
+        ).result()
+        if not granted:
+            raise RequestCancelled()
+        try:
+            yield
+        finally:
+            orchestrator._loop.call_soon_threadsafe(orchestrator._slots.release)
+
+
+class _ModelSlots:
+    def __init__(self, slots: int):
+        """
+        A semaphore for model calls that wakes waiters by priority, newest
+        first within a priority — the latest question is what the user is
+        looking at.
+        """
+        self.free     = slots
+        self._waiting = []   # heap of (priority, -seq, request, future)
+
+    async def acquire(self, request) -> bool:
+        if request.cancelled:
+            return False
+        if self.free and not self._waiting:
+            self.free -= 1
+            return True
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiting, (request.priority, -request.seq, request, future))
+        return await future
+
+    def release(self):
+        self.free += 1
+        self._grant()
+
+    def _grant(self):
+        while self.free and self._waiting:
+            _, _, request, future = heapq.heappop(self._waiting)
+            if future.done():
+                continue
+            if request.cancelled:
+                future.set_result(False)
+                continue
+            self.free -= 1
+            future.set_result(True)
+
+    def reorder(self, request):
+        """Re-queue request after its priority changed."""
+        self._waiting = [(request.priority if waiting is request else priority, seq, waiting, future)
+                         for priority, seq, waiting, future in self._waiting]
+        heapq.heapify(self._waiting)
+
+    def drop(self, request):
+        for _, _, waiting, future in self._waiting:
+            if waiting is request and not future.done():
+                future.set_result(False)
+
+
+class Orchestrator:
+    def __init__(self, model_slots: int = MODEL_CONCURRENCY):
+        """
+        Coordinates everything that talks to the model from one asyncio loop
+        on a background thread, so the Tk thread only ever submits work.
+
+        At most model_slots requests use the model at once. A request can
+        cancel older ones by group: a new question supersedes the answer and
+        the definition still being generated, and a new clipboard word
+        replaces the one before it instead of queueing behind it.
+        """
+        self.model_slots = model_slots
+        self._loop     = None
+        self._slots    = None
+        self._active   = set()
+        self._seq      = itertools.count()
+        self._executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="zigsy-job")
+
+    def start(self):
+        if self._loop is not None:
+            return self
+        self._loop = asyncio.new_event_loop()
+        self._slots = _ModelSlots(self.model_slots)
+        threading.Thread(target=self._loop.run_forever, daemon=True).start()
+        return self
+
+    def submit(self, fn, priority: int = PRIORITY_INTERACTIVE, group=None, cancels=()) -> Request:
+        """Run fn(request) on a worker thread, first cancelling active requests whose group is in cancels."""
+        request = Request(self, fn, priority, group, next(self._seq))
+        request.future = asyncio.run_coroutine_threadsafe(self._run(request, cancels), self._loop)
+        return request
+
+    def run(self, fn, priority: int = PRIORITY_IDLE):
+        """Submit fn and wait for its result (from a thread other than the loop's)."""
+        return self.submit(fn, priority).result()
+
+    def cancel_group(self, group):
+        self._loop.call_soon_threadsafe(self._cancel_groups, (group,))
+
+    def _cancel_groups(self, groups):
+        for other in list(self._active):
+            if other.group in groups:
+                other.cancel()
+
+    async def _run(self, request, cancels):
+        self._cancel_groups(cancels)
+        self._active.add(request)
+        try:
+            return await self._loop.run_in_executor(self._executor, self._call, request)
+        finally:
+            self._active.discard(request)
+
+    def _call(self, request):
+        if request.cancelled:
+            return None
+        try:
+            return request.fn(request)
+        except RequestCancelled:
+            return None
+        except Exception:
+            traceback.print_exc()
+            raise
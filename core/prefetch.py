@@ -0,0 +1,147 @@
+import time
+import threading
+
+from core.orchestrator import PRIORITY_IDLE
+
+PREFETCH_CLIPBOARD = "prefetch-clipboard"   # explanation of the phrase just copied
+PREFETCH_HOVER = "prefetch-hover"           # answer to the quick action under the mouse
+PREFETCH_TTL = 120                          # seconds a finished speculation may still be served
+
+
+class Speculation:
+    def __init__(self, key, question, group, context=None):
+        """
+        An answer being generated before anyone asked for it. Tokens are
+        buffered as they arrive; follow() replays them and then streams the
+        rest, so a user who asks mid-generation picks up where it has got to.
+        """
+        self.key       = key
+        self.question  = question
+        self.group     = group
+        self.context   = context    # what the answer was based on, see Prefetcher
+        self.request   = None
+        self.text      = ""
+        self.failed    = False
+        self.finished_at = None
+        self.query_embedding = None   # set by the producer if it embedded the question
+        self._listeners = []
+        self._done     = threading.Event()
+        self._lock     = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def feed(self, text: str):
+        with self._lock:
+            self.text += text
+            for listener in self._listeners:
+                listener(text)
+
+    def finish(self, text=None):
+        """Mark the answer complete; None means it was cancelled or failed. Later calls are ignored."""
+        with self._lock:
+            if self._done.is_set():
+                return
+            if text is None:
+                self.failed = True
+            else:
+                self.text = text
+            self.finished_at = time.monotonic()
+            self._done.set()
+
+    def follow(self, on_token, cancel=None):
+        """
+        Call on_token with everything generated so far, then with each new
+        piece until the answer is complete. Returns the full answer, or None
+        if the speculation failed or cancel was set.
+        """
+        with self._lock:
+            if self.text:
+                on_token(self.text)
+            self._listeners.append(on_token)
+        try:
+            while not self._done.wait(0.1):
+                if cancel is not None and cancel.is_set():
+                    return None
+            return None if self.failed else self.text
+        finally:
+            with self._lock:
+                self._listeners.remove(on_token)
+
+
+class Prefetcher:
+    def __init__(self, orchestrator, context=lambda: None):
+        """
+        Runs speculative answers at idle priority, one per group, keyed so
+        the real request can find them: a copied phrase by its clipboard key,
+        a hovered quick action by its question. Starting a speculation
+        cancels the one before it in the same group.
+
+        context() describes what an answer depends on, e.g. the conversation
+        and knowledge-base versions. A speculation started under another
+        context, or finished more than PREFETCH_TTL seconds ago, is stale: it
+        is never handed over and a new start() replaces it.
+        """
+        self.orchestrator  = orchestrator
+        self.context       = context
+        self._speculations = {}   # key -> Speculation
+        self._lock         = threading.Lock()
+
+    def _usable(self, speculation, context) -> bool:
+        if speculation.failed or speculation.context != context:
+            return False
+        return speculation.finished_at is None or time.monotonic() - speculation.finished_at <= PREFETCH_TTL
+
+    def start(self, key, question, produce, group) -> Speculation:
+        """
+        Speculate on question. produce(speculation, request) runs on a worker
+        thread, feeds tokens to the speculation and returns the answer.
+        """
+        def _job(request):
+            answer = produce(speculation, request)
+            speculation.finish(None if request.cancelled else answer)
+
+        context = self.context()
+        with self._lock:
+            existing = self._speculations.get(key)
+            if existing is not None and self._usable(existing, context):
+                return existing
+            for other in [s for s in self._speculations.values() if s.group == group]:
+                del self._speculations[other.key]
+            speculation = Speculation(key, question, group, context)
+            self._speculations[key] = speculation
+            speculation.request = self.orchestrator.submit(_job, priority=PRIORITY_IDLE, group=group,
+                                                           cancels=(group,))
+        # A request cancelled before it started never calls _job
+        speculation.request.future.add_done_callback(lambda _: speculation.finish(None))
+        return speculation
+
+    def take(self, key, priority=None):
+        """
+        Hand over the speculation for key, or None if there is none or it is
+        stale. It leaves its group, so new speculation no longer cancels it —
+        whoever took it cancels it — and is raised to priority, since someone
+        is now waiting for it.
+        """
+        context = self.context()
+        with self._lock:
+            speculation = self._speculations.pop(key, None)
+        if speculation is None:
+            return None
+        if not self._usable(speculation, context):
+            speculation.request.cancel()
+            return None
+        speculation.request.group = None
+        if priority is not None:
+            speculation.request.promote(priority)
+        return speculation
+
+    def cancel(self, group, keep=None):
+        """Cancel the group's speculation unless its key is keep, e.g. when the clipboard changes."""
+        with self._lock:
+            stale = [s for s in self._speculations.values() if s.group == group and s.key != keep]
+            for speculation in stale:
+                del self._speculations[speculation.key]
+        for speculation in stale:
+            speculation.request.cancel()
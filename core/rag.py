@@ -1,30 +1,445 @@
 import os
-from llama_index.core import VectorStoreIndex, SimpleDirectoryReader, StorageContext, load_index_from_storage
-from llama_index.embeddings.huggingface import HuggingFaceEmbedding
-from llama_index.core import Settings
+import json
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from config import VECTOR_INDEX
+from core.startup import timed
+from core.vector_store import VectorStore
+from core.bm25 import BM25Index, tokenize
+from core.ingest import ingest_files
 
 INDEX_PATH = "knowledge_base/index"
 RAW_PATH = "knowledge_base/raw"
+MANIFEST_PATH = os.path.join(INDEX_PATH, "manifest.json")
+LEXICAL_PATH = os.path.join(INDEX_PATH, "bm25.npz")
+EMBED_MODEL_NAME = "BAAI/bge-small-en-v1.5"
+TOP_K = 2
+
+# Hybrid retrieval: each retriever proposes CANDIDATES chunks and the two
+# rankings are merged by reciprocal rank fusion
+CANDIDATES = 10
+RRF_K = 60
+# A keyword match is decisive — and the query is never embedded — when the
+# best chunk holds every term of a question of at least LEXICAL_MIN_TERMS
+# terms and outscores the runner-up by LEXICAL_MARGIN
+LEXICAL_MIN_TERMS = 2
+LEXICAL_MARGIN = 1.5
+
+QUERY_CACHE_SIZE = 256   # query embeddings kept, least recently used dropped first
+
+MANIFEST_VERSION = 2
+COMPACT_RATIO = 0.25   # rewrite the store once this share of its rows are deleted
+
+# Written by LlamaIndex's VectorStoreIndex before the binary store existed
+LEGACY_DOCSTORE = os.path.join(INDEX_PATH, "docstore.json")
+LEGACY_VECTORS = os.path.join(INDEX_PATH, "default__vector_store.json")
+
+# The embedding model pulls in torch, so it is only loaded on first use
+_embed_model = None
+_embed_lock = threading.Lock()
+
+# Held while the store is being read or changed, so a background sync never
+# races a retrieval
+_index_lock = threading.RLock()
+_sync_lock = threading.Lock()
+_manifest = None
+_lexical = None
+_watcher = None
+
+
+def _get_embed_model():
+    global _embed_model
+    with _embed_lock:
+        if _embed_model is None:
+            with timed("import llama_index"):
+                from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+            # Use a lightweight local embedding model — no internet needed after first download
+            with timed("load embedding model"):
+                _embed_model = HuggingFaceEmbedding(model_name=EMBED_MODEL_NAME)
+    return _embed_model
+
+
+# ── Query embeddings ──────────────────────────────────────────────────────────
+# Quick actions and retried questions send the same text again and again, so
+# query embeddings are remembered by their normalised text
+
+class QueryCache:
+    def __init__(self, max_entries=QUERY_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.hits        = 0
+        self.misses      = 0
+        self._entries    = OrderedDict()
+        self._lock       = threading.Lock()
+
+    @staticmethod
+    def key(query: str) -> str:
+        return " ".join(query.lower().split()).rstrip("?!. ")
+
+    def get(self, query: str):
+        key = self.key(query)
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def put(self, query: str, vector):
+        with self._lock:
+            self._entries[self.key(query)] = vector
+            self._entries.move_to_end(self.key(query))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __contains__(self, query) -> bool:
+        with self._lock:
+            return self.key(query) in self._entries
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+_query_cache = QueryCache()
+
+
+def embed_query(query: str):
+    vector = _query_cache.get(query)
+    if vector is None:
+        vector = _get_embed_model().get_query_embedding(query)
+        _query_cache.put(query, vector)
+    return vector
+
+
+def precompute_queries(queries):
+    """Embed questions the user is likely to send (the quick actions) ahead of time."""
+    model = _get_embed_model()
+    for query in queries:
+        if query not in _query_cache:
+            _query_cache.put(query, model.get_query_embedding(query))
+
+
+def query_cache_stats() -> dict:
+    return _query_cache.stats()
+
+
+def embed_texts(texts: list):
+    return _get_embed_model().get_text_embedding_batch(texts)
+
+
+# ── Manifest ──────────────────────────────────────────────────────────────────
+# Maps each file in RAW_PATH to its content hash and the store rows holding its
+# chunks:  {"version": 2, "files": {name: {"hash", "size", "mtime", "rows"}}}
+
+def _load_manifest():
+    if os.path.exists(MANIFEST_PATH):
+        try:
+            with open(MANIFEST_PATH, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            if manifest.get("version") == MANIFEST_VERSION:
+                return manifest
+        except Exception as e:
+            print(f"Manifest unreadable, rebuilding it: {e}")
+    return None
+
+
+def _save_manifest(manifest):
+    os.makedirs(INDEX_PATH, exist_ok=True)
+    tmp = MANIFEST_PATH + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, MANIFEST_PATH)
+
+
+def _file_hash(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _raw_files():
+    """name -> (path, size, mtime) for every indexable file in RAW_PATH."""
+    files = {}
+    if not os.path.isdir(RAW_PATH):
+        return files
+    for entry in os.scandir(RAW_PATH):
+        if entry.is_file() and not entry.name.startswith('.'):
+            st = entry.stat()
+            files[entry.name] = (entry.path, st.st_size, st.st_mtime)
+    return files
+
+
+def _manifest_matches(manifest, store) -> bool:
+    rows = [r for entry in manifest["files"].values() for r in entry["rows"]]
+    return all(0 <= r < store.count for r in rows)
 
-# Use a lightweight local embedding model — no internet needed after first download
-Settings.embed_model = HuggingFaceEmbedding(model_name="BAAI/bge-small-en-v1.5")
-Settings.llm = None  # We handle LLM separately via Ollama
 
-def load_or_build_index():
-    if os.path.exists(INDEX_PATH) and os.listdir(INDEX_PATH):
-        print("Loading existing index...")
-        storage_context = StorageContext.from_defaults(persist_dir=INDEX_PATH)
-        index = load_index_from_storage(storage_context)
+# ── Migration ─────────────────────────────────────────────────────────────────
+
+def _migrate_legacy(store):
+    """
+    Copy an index written by LlamaIndex's VectorStoreIndex (JSON docstore and
+    vector store) into the binary store, reusing its embeddings. Returns the
+    manifest for it, or None if there is nothing to migrate.
+    """
+    if not (os.path.exists(LEGACY_DOCSTORE) and os.path.exists(LEGACY_VECTORS)):
+        return None
+    print("Converting existing index to the binary store...")
+    with open(LEGACY_DOCSTORE, "r", encoding="utf-8") as f:
+        nodes = json.load(f).get("docstore/data", {})
+    with open(LEGACY_VECTORS, "r", encoding="utf-8") as f:
+        embeddings = json.load(f).get("embedding_dict", {})
+
+    records, vectors = [], []
+    for node_id, vector in embeddings.items():
+        node = nodes.get(node_id, {}).get("__data__")
+        if not node:
+            continue
+        records.append({"id": node_id, "text": node.get("text", ""), "metadata": node.get("metadata", {})})
+        vectors.append(vector)
+    rows = store.add(records, vectors)
+
+    raw = _raw_files()
+    files = {}
+    for row, record in zip(rows, records):
+        name = record["metadata"].get("file_name")
+        if not name:
+            continue
+        entry = files.setdefault(name, {"hash": None, "size": None, "mtime": None, "rows": []})
+        entry["rows"].append(row)
+    for name, entry in files.items():
+        # Files that are gone keep hash None, so the next sync drops their rows
+        if name in raw:
+            path, size, mtime = raw[name]
+            entry.update(hash=_file_hash(path), size=size, mtime=mtime)
+    return {"version": MANIFEST_VERSION, "files": files}
+
+
+# ── Index ─────────────────────────────────────────────────────────────────────
+
+def sync_index(store, manifest, on_progress=None) -> bool:
+    """
+    Embed only new or changed files in RAW_PATH and drop the chunks of deleted
+    ones. A file is re-hashed only if its size or mtime moved. Returns True if
+    the store changed.
+    """
+    with _sync_lock:
+        raw = _raw_files()
+        known = manifest["files"]
+        to_remove, to_add = [], []
+
+        for name in known:
+            if name not in raw:
+                to_remove.append(name)
+        for name, (path, size, mtime) in raw.items():
+            entry = known.get(name)
+            if entry and entry["size"] == size and entry["mtime"] == mtime:
+                continue
+            digest = _file_hash(path)
+            if entry and entry["hash"] == digest:
+                entry.update(size=size, mtime=mtime)
+                continue
+            if entry:
+                to_remove.append(name)
+            to_add.append((name, path, size, mtime, digest))
+
+        if not to_remove and not to_add:
+            return False
+
+        # Parse and embed into pending files; retrieval keeps using the store meanwhile
+        writer = store.writer()
+        try:
+            rows_by_file, skipped = ingest_files(
+                [(name, path) for name, path, _, _, _ in to_add],
+                embed_texts, writer, on_progress=on_progress
+            )
+        except Exception:
+            writer.abort()
+            raise
+
+        with _index_lock:
+            # A file that couldn't be read stays out of the manifest (or keeps
+            # its previous version) so the next sync tries it again
+            to_remove = [name for name in to_remove if name not in skipped]
+            to_add = [entry for entry in to_add if entry[0] not in skipped]
+            for name in to_remove:
+                rows = known.pop(name)["rows"]
+                store.delete(rows)
+                if _lexical is not None:
+                    _lexical.delete(rows)
+                print(f"Removed from index: {name}")
+            writer.commit()
+            orphans = [r for rows in skipped.values() for r in rows]
+            if orphans:
+                store.delete(orphans)
+                if _lexical is not None:
+                    _lexical.delete(orphans)
+            for name, path, size, mtime, digest in to_add:
+                known[name] = {"hash": digest, "size": size, "mtime": mtime, "rows": rows_by_file[name]}
+                if _lexical is not None:
+                    rows = rows_by_file[name]
+                    _lexical.add(rows, [store.get(r)["text"] for r in rows])
+            if store.count and len(store.deleted) > COMPACT_RATIO * store.count:
+                remap = store.compact()
+                for entry in known.values():
+                    entry["rows"] = [remap[r] for r in entry["rows"]]
+                if _lexical is not None:
+                    _lexical.compact(remap)
+            _save_manifest(manifest)
+            _save_lexical()
+        return bool(to_remove or to_add)
+
+
+# ── Keyword index ─────────────────────────────────────────────────────────────
+# A BM25 index over the same chunks, kept in step with the store by
+# sync_index and saved next to it
+
+def _save_lexical():
+    if _lexical is not None:
+        _lexical.save(LEXICAL_PATH)
+
+
+def build_lexical(store) -> BM25Index:
+    """Index every chunk in the store from scratch."""
+    lexical = BM25Index()
+    live = [r for r in range(store.count) if r not in store.deleted]
+    for start in range(0, len(live), 4096):
+        rows = live[start:start + 4096]
+        lexical.add(rows, [store.get(r)["text"] for r in rows])
+    lexical.delete(store.deleted)
+    return lexical
+
+
+def _open_lexical(store) -> BM25Index:
+    lexical = BM25Index.load(LEXICAL_PATH)
+    if lexical is None or lexical.count != store.count or lexical.deleted != store.deleted:
+        with timed("build keyword index"):
+            lexical = build_lexical(store)
+        lexical.save(LEXICAL_PATH)
+    return lexical
+
+
+def load_or_build_index(on_progress=None):
+    """
+    Open the knowledge-base vector store, bringing it up to date with RAW_PATH.
+    on_progress(IngestStats) is called as new files are indexed.
+    """
+    global _manifest, _lexical
+    with timed("open vector store"):
+        store = VectorStore(INDEX_PATH, ann=VECTOR_INDEX).open()
+    manifest = None
+    if VectorStore.exists(INDEX_PATH):
+        manifest = _load_manifest()
+        if manifest is None or not _manifest_matches(manifest, store):
+            print("Index and manifest disagree — re-indexing knowledge base...")
+            if store.count:
+                store.delete(range(store.count))
+                store.compact()
+            manifest = None
     else:
+        manifest = _migrate_legacy(store)
+    if manifest is None:
         print("Building index from knowledge base...")
-        documents = SimpleDirectoryReader(RAW_PATH).load_data()
-        index = VectorStoreIndex.from_documents(documents)
-        index.storage_context.persist(persist_dir=INDEX_PATH)
-    return index
-
-def get_context(query: str, index) -> str:
-    retriever = index.as_retriever(similarity_top_k=2)
-    results = retriever.retrieve(query)
+        manifest = {"version": MANIFEST_VERSION, "files": {}}
+    with timed("open keyword index"):
+        _lexical = _open_lexical(store)
+
+    if not sync_index(store, manifest, on_progress=on_progress):
+        _save_manifest(manifest)
+    _manifest = manifest
+    _get_embed_model()  # warm up now so the first question doesn't pay for it
+    return store
+
+
+def watch_knowledge_base(index, interval: float = 5, on_change=None, on_progress=None):
+    """Poll RAW_PATH and sync the index whenever a file is added, changed or removed."""
+    global _watcher
+    if _watcher and _watcher.is_alive():
+        return
+
+    def _signature():
+        return sorted((name, size, mtime) for name, (_, size, mtime) in _raw_files().items())
+
+    def _watch():
+        last = _signature()
+        while True:
+            time.sleep(interval)
+            try:
+                current = _signature()
+                if current == last:
+                    continue
+                last = current
+                if sync_index(index, _manifest, on_progress=on_progress) and on_change:
+                    on_change()
+            except Exception as e:
+                print(f"Knowledge base sync failed: {e}")
+
+    _watcher = threading.Thread(target=_watch, daemon=True)
+    _watcher.start()
+
+
+def get_kb_version() -> str:
+    """Hash of every indexed file's content hash — changes whenever the knowledge base does."""
+    if not _manifest:
+        return ""
+    files = sorted((name, entry["hash"] or "") for name, entry in _manifest["files"].items())
+    return hashlib.sha256(json.dumps(files).encode("utf-8")).hexdigest()[:16]
+
+
+# ── Retrieval ─────────────────────────────────────────────────────────────────
+
+def lexical_search(query: str, lexical=None) -> list:
+    """BM25 (row, score, matched) hits for the query, best first; [] without a keyword index."""
+    lexical = lexical or _lexical
+    if lexical is None:
+        return []
+    with _index_lock:
+        return lexical.search(query, CANDIDATES)
+
+
+def is_decisive(query: str, hits) -> bool:
+    """True if the keyword ranking alone can be trusted, so the query needn't be embedded."""
+    terms = len(set(tokenize(query)))
+    if terms < LEXICAL_MIN_TERMS or not hits or hits[0][2] < terms:
+        return False
+    return len(hits) == 1 or hits[0][1] >= LEXICAL_MARGIN * hits[1][1]
+
+
+def fuse(*rankings) -> list:
+    """Merge ranked row lists by reciprocal rank fusion; rows that rank well in both come first."""
+    scores = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking):
+            scores[row] = scores.get(row, 0.0) + 1.0 / (RRF_K + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+def get_context(query: str, index, query_embedding=None, lexical_hits=None, lexical=None) -> str:
+    """
+    The TOP_K chunks most relevant to the query. A decisive keyword match is
+    used as is when no embedding was supplied; otherwise keyword and vector
+    results are fused.
+    """
+    if lexical_hits is None:
+        lexical_hits = lexical_search(query, lexical)
+    keyword_rows = [row for row, _, _ in lexical_hits]
+    if query_embedding is None and is_decisive(query, lexical_hits):
+        rows = keyword_rows[:TOP_K]
+    else:
+        if query_embedding is None:
+            query_embedding = embed_query(query)
+        with _index_lock:
+            vector_rows = [row for row, _ in index.search(query_embedding, CANDIDATES)]
+        rows = fuse(vector_rows, keyword_rows)[:TOP_K]
+    with _index_lock:
+        results = [index.get(row)["text"] for row in rows]
     if not results:
         return ""
-    return "\n\n".join([r.text for r in results])
\ No newline at end of file
+    return "\n\n".join(results)
@@ -0,0 +1,127 @@
+import os
+import json
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from config import RESPONSE_CACHE_PATH, RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_THRESHOLD
+
+
+def context_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, path=RESPONSE_CACHE_PATH, max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+                 threshold=RESPONSE_CACHE_THRESHOLD):
+        """
+        Persistent cache of LLM answers, looked up by meaning rather than exact text.
+
+        An entry matches when its query embedding is the nearest neighbour of
+        the new query with cosine similarity >= threshold, and it was produced
+        against the same knowledge-base version and memory context. Entries are
+        kept in least-recently-used order and the oldest is evicted past
+        max_entries.
+        """
+        self.path        = path
+        self.max_entries = max_entries
+        self.threshold   = threshold
+        self.hits        = 0
+        self.misses      = 0
+        self._entries    = OrderedDict()   # key -> {query, embedding, kb_version, memory_hash, response, created}
+        self._lock       = threading.Lock()
+        self._load()
+
+    # ── Persistence ───────────────────────────────────────────────────────────
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for entry in json.load(f):
+                    entry["embedding"] = np.asarray(entry["embedding"], dtype=np.float32)
+                    self._entries[self._key(entry)] = entry
+        except Exception as e:
+            print(f"[Response Cache] Could not read {self.path}: {e}")
+            self._entries.clear()
+
+    def _save(self):
+        data = [dict(e, embedding=e["embedding"].tolist()) for e in self._entries.values()]
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+        except Exception as e:
+            print(f"[Response Cache] Could not save {self.path}: {e}")
+
+    @staticmethod
+    def _key(entry) -> str:
+        query = " ".join(entry["query"].lower().split())
+        return context_hash(f"{query}|{entry['kb_version']}|{entry['memory_hash']}")
+
+    # ── Lookup / store ────────────────────────────────────────────────────────
+
+    def lookup(self, embedding, kb_version: str, memory_hash: str):
+        """Return the cached response for the nearest matching query, or None."""
+        query = np.asarray(embedding, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        with self._lock:
+            candidates = [
+                (key, e) for key, e in self._entries.items()
+                if e["kb_version"] == kb_version and e["memory_hash"] == memory_hash
+            ]
+            if candidates:
+                matrix = np.stack([e["embedding"] for _, e in candidates])
+                scores = matrix @ query
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    key, entry = candidates[best]
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry["response"]
+            self.misses += 1
+            return None
+
+    def lookup_text(self, query: str, kb_version: str, memory_hash: str):
+        """Return the cached response for exactly this question (case and spacing aside), or None."""
+        key = self._key({"query": query, "kb_version": kb_version, "memory_hash": memory_hash})
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["response"]
+
+    def store(self, query: str, embedding, kb_version: str, memory_hash: str, response: str):
+        if not response.strip():
+            return
+        vector = np.asarray(embedding, dtype=np.float32)
+        vector = vector / (np.linalg.norm(vector) or 1.0)
+        entry = {
+            "query": query, "embedding": vector, "kb_version": kb_version,
+            "memory_hash": memory_hash, "response": response, "created": time.time(),
+        }
+        with self._lock:
+            key = self._key(entry)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._save()
+
+    def invalidate(self, kb_version: str):
+        """Drop every entry that was answered against a different knowledge base."""
+        with self._lock:
+            stale = [k for k, e in self._entries.items() if e["kb_version"] != kb_version]
+            for key in stale:
+                del self._entries[key]
+            if stale:
+                self._save()
+                print(f"[Response Cache] Knowledge base changed — dropped {len(stale)} cached answers")
@@ -0,0 +1,196 @@
+import re
+
+import numpy as np
+
+from tools.system_tools import is_vague_query, is_natural_language
+
+# ── Commands ──────────────────────────────────────────────────────────────────
+# Each pattern must match the whole (lower-cased, trimmed) message. They are
+# compiled into one alternation, so a message is matched against every command
+# in a single pass; the first alternative that matches wins.
+
+COMMAND_PATTERNS = [
+    ("remember", r"(?:please\s+)?remember\s+that\s+(?P<note>.+)"),
+    ("ghost",    r"(?:toggle\s+|turn\s+(?:on\s+|off\s+)?)?ghost(?:\s+mode)?(?:\s+(?:on|off))?"),
+    # "stats" and "health" only with the machine named — "my health" means the user
+    ("status",   r"(?:show\s+|check\s+|get\s+|what(?:'s|\s+is)\s+)?(?:(?:my|the)\s+)?"
+                 r"(?:(?:system\s+|pc\s+|computer\s+)?(?:status|vitals)|(?:system|pc|computer)\s+(?:stats|health))"
+                 r"(?:\s+please)?"),
+    ("startup",  r"(?:show\s+)?startup(?:\s+(?:report|timing|times))?"),
+    ("perf",     r"(?:show\s+)?perf(?:ormance)?(?:\s+(?:report|stats|timing|times))?"),
+    ("stash",    r"stash(?:\s+(?:this|it|that|clipboard|my\s+clipboard))?"),
+    ("explain",  r"(?:yes\s*,?\s*)?(?:explain(?:\s+(?:this|that|it|clipboard|my\s+clipboard))?|yes)(?:\s+please)?"),
+    ("find",     r"(?:please\s+)?(?:can\s+you\s+)?(?:find|search\s+for|locate|look\s+for)\s+(?:me\s+)?(?P<term>(?!me$).+)"),
+]
+
+FILLER_WORDS = {"my", "the", "a", "an", "this", "that", "some", "any", "of", "mine"}
+FILE_TYPE_WORDS = {"pdf", "doc", "docx", "txt", "xlsx", "pptx", "jpg", "png", "mp3", "mp4", "zip"}
+
+# ── Question flags ────────────────────────────────────────────────────────────
+# Messages that reach the model: does the answer need the knowledge base, or
+# the window the user is looking at?
+
+TASK_KEYWORDS = [
+    "how to", "how do i", "help me", "steps to",
+    "whatsapp", "wifi", "zoom", "call", "message",
+    "settings", "connect", "send", "open", "install",
+    "shortcut", "keyboard", "unity", "editor"
+]
+SCREEN_KEYWORDS = [
+    "which screen", "what screen", "where am i", "which app",
+    "what is open", "what am i looking at", "what is this",
+    "i am confused", "i'm confused", "lost", "what do i see"
+]
+
+# ── Embedding fallback ────────────────────────────────────────────────────────
+# Short messages no pattern matched are compared with these examples; a close
+# enough match still skips the model. Only commands without arguments are
+# listed — a file search needs its search term.
+
+INTENT_EXAMPLES = {
+    "ghost":   ["make yourself transparent", "make the window see-through", "fade out the window",
+                "i can't see behind you"],
+    "status":  ["how is my computer doing", "how much memory is free", "is my pc running slow",
+                "check battery and cpu", "how's the battery"],
+    "startup": ["how long did you take to start", "show load times"],
+    "perf":    ["why are your answers slow", "show response times", "how fast are you answering"],
+    "stash":   ["save what i copied", "keep my clipboard for later", "save the clipboard to a file"],
+    "explain": ["what does the copied text mean", "explain what i copied", "tell me about the copied text"],
+}
+INTENT_THRESHOLD = 0.82     # cosine similarity needed to trust an example match
+FALLBACK_MAX_WORDS = 6      # longer messages are questions, not commands
+
+
+def _named(name: str, pattern: str) -> str:
+    # Prefix inner group names so they stay unique across the alternation
+    return f"(?P<{name}>{re.sub(r'[(][?]P<', f'(?P<{name}__', pattern)})"
+
+
+_COMMANDS = re.compile("|".join(_named(n, p) for n, p in COMMAND_PATTERNS))
+_FLAGS = re.compile("|".join([
+    "(?P<screen>" + "|".join(re.escape(k) for k in SCREEN_KEYWORDS) + ")",
+    "(?P<task>" + "|".join(re.escape(k) for k in TASK_KEYWORDS) + ")",
+]))
+
+
+def _normalise(text: str) -> str:
+    """Trim trailing punctuation and collapse whitespace, keeping the user's case."""
+    return " ".join(text.strip().rstrip("?!.").split())
+
+
+def _search_term(term: str) -> str:
+    words = term.split()
+    while words and words[0].lower() in FILLER_WORDS:
+        words.pop(0)
+    # "resume pdf" — the type word would stop the name matching resume.pdf
+    if len(words) > 1 and words[-1].lower() in FILE_TYPE_WORDS:
+        words.pop()
+    return " ".join(words)
+
+
+class Route:
+    def __init__(self, intent, args=None, needs_rag=False, needs_screen=False, via="pattern"):
+        """
+        Where a message goes. intent is a command name, or "chat" for the
+        model. via is "pattern", "embedding", "default" (nothing matched) or
+        "pending" (only the embedding fallback could still match — see route()).
+        """
+        self.intent       = intent
+        self.args         = args or {}
+        self.needs_rag    = needs_rag
+        self.needs_screen = needs_screen
+        self.via          = via
+
+    @property
+    def needs_llm(self) -> bool:
+        return self.intent == "chat"
+
+    def __repr__(self):
+        return f"Route({self.intent!r}, {self.args}, rag={self.needs_rag}, screen={self.needs_screen}, via={self.via!r})"
+
+
+class IntentRouter:
+    def __init__(self, threshold: float = INTENT_THRESHOLD):
+        """
+        Sends each message to a command handler or to the model.
+
+        Commands are matched by one compiled pattern; if none matches, a short
+        message is compared with precomputed example vectors (once prepare()
+        has been called with an embedding function).
+        """
+        self.embed_texts = None
+        self.threshold   = threshold
+        self._vectors    = None
+        self._labels     = []
+
+    def prepare(self, embed_texts):
+        """
+        Embed the intent examples once. Messages are embedded with the same
+        function (as documents, not queries) so both sides compare like with like.
+        """
+        labels, texts = [], []
+        for intent, examples in INTENT_EXAMPLES.items():
+            labels.extend([intent] * len(examples))
+            texts.extend(examples)
+        vectors = np.asarray(embed_texts(texts), dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        self._labels, self._vectors = labels, vectors
+        self.embed_texts = embed_texts
+
+    def _match_command(self, text: str, display: str):
+        m = _COMMANDS.fullmatch(text)
+        if not m:
+            return None
+        intent = m.lastgroup
+        # Arguments are sliced from the un-lowered message to keep the user's case
+        args = {k.split("__", 1)[1]: display[m.start(k):m.end(k)]
+                for k, v in m.groupdict().items() if k.startswith(intent + "__") and v}
+        if intent == "find":
+            if is_vague_query(text) or is_natural_language(text):
+                return None
+            args["term"] = _search_term(args["term"])
+            if not args["term"]:
+                return None
+        return Route(intent, args)
+
+    def _can_match_example(self, text: str) -> bool:
+        return self._vectors is not None and len(text.split()) <= FALLBACK_MAX_WORDS
+
+    def closest_example(self, text: str):
+        """(intent, cosine similarity) of the example nearest to text, or None if it can't be compared."""
+        text = _normalise(text).lower()
+        if not self._can_match_example(text):
+            return None
+        query = np.asarray(self.embed_texts([text])[0], dtype=np.float32)
+        scores = self._vectors @ (query / (np.linalg.norm(query) or 1.0))
+        best = int(np.argmax(scores))
+        return self._labels[best], float(scores[best])
+
+    def _match_example(self, text: str):
+        closest = self.closest_example(text)
+        if closest is None or closest[1] < self.threshold:
+            return None
+        return Route(closest[0], via="embedding")
+
+    def route(self, message: str, embed: bool = True) -> Route:
+        """
+        Route message. embed=False skips the embedding fallback, which embeds
+        the message; a message only it could still match gets via="pending",
+        to be routed again with embed=True off the UI thread.
+        """
+        display = _normalise(message)
+        text = display.lower()
+        route = self._match_command(text, display)
+        if route:
+            return route
+
+        flags = {m.lastgroup for m in _FLAGS.finditer(text)}
+        if not flags:
+            if not embed:
+                if self._can_match_example(text):
+                    return Route("chat", via="pending")
+            else:
+                route = self._match_example(text)
+                if route:
+                    return route
+        return Route("chat", needs_rag="task" in flags, needs_screen="screen" in flags, via="default")
@@ -0,0 +1,41 @@
+import time
+import threading
+from contextlib import contextmanager
+
+# Taken as early as possible — main.py imports this module before anything heavy
+_process_start = time.perf_counter()
+_timings = []   # (label, seconds, seconds since start when it finished)
+_lock = threading.Lock()
+
+
+def record(label: str, seconds: float):
+    with _lock:
+        _timings.append((label, seconds, time.perf_counter() - _process_start))
+
+
+@contextmanager
+def timed(label: str):
+    """Time an import or initialisation step for the startup report."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(label, time.perf_counter() - start)
+
+
+def mark(label: str):
+    """Record a milestone, e.g. the window becoming visible, as time since launch."""
+    record(label, 0.0)
+
+
+def startup_report() -> str:
+    with _lock:
+        timings = list(_timings)
+    lines = ["── STARTUP TIMING ─────────────────"]
+    for label, seconds, at in timings:
+        if seconds:
+            lines.append(f"{label:<28} {seconds * 1000:8.0f} ms   (done at {at:6.2f}s)")
+        else:
+            lines.append(f"{label:<28} {'':>8}      (at {at:6.2f}s)")
+    lines.append("───────────────────────────────────")
+    return "\n".join(lines)
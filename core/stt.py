@@ -0,0 +1,153 @@
+import threading
+
+import numpy as np
+
+from core.startup import timed
+
+SAMPLE_RATE = 16000
+BLOCK_SIZE = 1024
+RING_SECONDS = 120        # buffer capacity; audio is consumed as it goes, so recordings can be longer
+SEGMENT_SECONDS = 10      # transcribe in pieces of about this length while still recording
+CUT_SEARCH_SECONDS = 1.0  # look this far back for a quiet spot to cut a piece at
+MIN_TAIL_SECONDS = 0.3    # shorter leftovers are silence or a click, not speech
+WHISPER_MODEL = "tiny"
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def load_model():
+    """Load Whisper once — called during idle warm-up so VOX is ready when pressed."""
+    global _model
+    with _model_lock:
+        if _model is None:
+            with timed("import whisper"):
+                import whisper
+            with timed("load whisper model"):
+                _model = whisper.load_model(WHISPER_MODEL)
+    return _model
+
+
+def is_model_loaded() -> bool:
+    return _model is not None
+
+
+class RingBuffer:
+    def __init__(self, capacity: int):
+        """Preallocated float32 audio buffer addressed by absolute sample position."""
+        self.capacity = capacity
+        self.data     = np.zeros(capacity, dtype=np.float32)
+        self.written  = 0   # total samples ever written
+        self._lock    = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self.written = 0
+
+    def write(self, samples):
+        n = len(samples)
+        with self._lock:
+            if n >= self.capacity:
+                samples, n = samples[-self.capacity:], self.capacity
+            start = self.written % self.capacity
+            first = min(n, self.capacity - start)
+            self.data[start:start + first] = samples[:first]
+            self.data[:n - first] = samples[first:]
+            self.written += n
+
+    def oldest(self) -> int:
+        return max(0, self.written - self.capacity)
+
+    def read(self, start: int, end: int):
+        """Copy samples [start, end); anything already overwritten is skipped."""
+        with self._lock:
+            start = max(start, self.oldest())
+            end = min(end, self.written)
+            if end <= start:
+                return np.zeros(0, dtype=np.float32)
+            a, b = start % self.capacity, end % self.capacity
+            if a < b:
+                return self.data[a:b].copy()
+            return np.concatenate((self.data[a:], self.data[:b]))
+
+
+def _quiet_cut(audio, search: int) -> int:
+    """Index near the end of audio with the least energy, to avoid cutting a word in half."""
+    frame = SAMPLE_RATE // 50   # 20 ms
+    tail = audio[-search:]
+    frames = len(tail) // frame
+    if frames < 2:
+        return len(audio)
+    energy = (tail[:frames * frame].reshape(frames, frame) ** 2).mean(axis=1)
+    return len(audio) - len(tail) + int(np.argmin(energy)) * frame + frame // 2
+
+
+class Transcriber:
+    def __init__(self):
+        """
+        Records VOX audio into a ring buffer and transcribes it in pieces while
+        the user is still talking, so only the last few seconds remain to be
+        decoded when they release the button. Audio goes straight from the
+        buffer to Whisper as float32 — no temp file, no ffmpeg.
+        """
+        self.ring      = RingBuffer(SAMPLE_RATE * RING_SECONDS)
+        self.recording = False
+        self._stream   = None
+        self._thread   = None
+        self._texts    = []
+        self._consumed = 0
+        self._wake     = threading.Event()
+
+    def _callback(self, indata, frames, time, status):
+        self.ring.write(indata[:, 0])
+        if self.ring.written - self._consumed >= SAMPLE_RATE * SEGMENT_SECONDS:
+            self._wake.set()
+
+    def start(self):
+        import sounddevice as sd
+        self.ring.reset()
+        self._texts = []
+        self._consumed = 0
+        self._wake.clear()
+        self.recording = True
+        self._stream = sd.InputStream(samplerate=SAMPLE_RATE, channels=1, dtype="float32",
+                                      blocksize=BLOCK_SIZE, callback=self._callback)
+        self._stream.start()
+        self._thread = threading.Thread(target=self._segment_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> str:
+        """Stop recording and return the full transcript."""
+        self.recording = False
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return " ".join(t for t in self._texts if t)
+
+    def _transcribe(self, audio):
+        if len(audio) < SAMPLE_RATE * MIN_TAIL_SECONDS:
+            return
+        prompt = self._texts[-1] if self._texts else None
+        result = load_model().transcribe(audio, fp16=False, initial_prompt=prompt)
+        self._texts.append(result["text"].strip())
+
+    def _segment_loop(self):
+        segment = SAMPLE_RATE * SEGMENT_SECONDS
+        while self.recording:
+            self._wake.wait()
+            self._wake.clear()
+            while self.recording and self.ring.written - self._consumed >= segment:
+                start = max(self._consumed, self.ring.oldest())
+                audio = self.ring.read(start, start + segment)
+                cut = _quiet_cut(audio, SAMPLE_RATE * CUT_SEARCH_SECONDS)
+                self._transcribe(audio[:cut])
+                self._consumed = start + cut
+        # Button released — only the tail since the last piece is left
+        start = max(self._consumed, self.ring.oldest())
+        self._transcribe(self.ring.read(start, self.ring.written))
+        self._consumed = self.ring.written
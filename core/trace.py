@@ -0,0 +1,135 @@
+import json
+import time
+import itertools
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+from config import TRACE_ENABLED, TRACE_PATH, TRACE_MAX_BYTES, TRACE_BACKUPS
+
+SESSION_SAMPLES = 500   # most recent timings kept per stage for the perf report
+
+_ids = itertools.count(1)
+_stats = {}            # stage -> deque of milliseconds, in the order stages first appeared
+_lock = threading.Lock()
+_writer = None
+
+
+def _write(record: dict):
+    """Append one JSON line to the trace file; the file rolls over at TRACE_MAX_BYTES."""
+    global _writer
+    with _lock:
+        if _writer is None:
+            import os
+            import logging
+            from logging.handlers import RotatingFileHandler
+            os.makedirs(os.path.dirname(TRACE_PATH) or ".", exist_ok=True)
+            handler = RotatingFileHandler(TRACE_PATH, maxBytes=TRACE_MAX_BYTES,
+                                          backupCount=TRACE_BACKUPS, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            _writer = logging.getLogger("zigsy.trace")
+            _writer.addHandler(handler)
+            _writer.setLevel(logging.INFO)
+            _writer.propagate = False
+    try:
+        _writer.info(json.dumps(record))
+    except Exception as e:
+        print(f"[Trace] Could not write {TRACE_PATH}: {e}")
+
+
+def _observe(stage: str, ms: float):
+    with _lock:
+        samples = _stats.get(stage)
+        if samples is None:
+            samples = _stats[stage] = deque(maxlen=SESSION_SAMPLES)
+        samples.append(ms)
+
+
+class Trace:
+    def __init__(self, name: str, **attrs):
+        """
+        Timings for one request. span() times a stage, record() adds one
+        measured elsewhere; finish() writes the request as one JSON line.
+        A stage recorded after finish() — speech usually starts later —
+        is written as a follow-up line with the same id.
+        """
+        self.id       = next(_ids)
+        self.name     = name
+        self.attrs    = attrs
+        self.spans    = {}
+        self.start    = time.perf_counter()
+        self.finished = False
+
+    @contextmanager
+    def span(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def record(self, stage: str, seconds: float):
+        ms = round(seconds * 1000, 3)
+        _observe(stage, ms)
+        if self.finished:
+            _write({"id": self.id, "name": self.name, "spans": {stage: ms}})
+        else:
+            self.spans[stage] = self.spans.get(stage, 0) + ms
+
+    def finish(self, **attrs):
+        if self.finished:
+            return
+        self.attrs.update(attrs)
+        total = time.perf_counter() - self.start
+        _observe("total", round(total * 1000, 3))
+        self.finished = True
+        _write({"id": self.id, "name": self.name, "ts": round(time.time(), 3),
+                "total_ms": round(total * 1000, 3), "spans": self.spans, **self.attrs})
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _NullTrace:
+    """Stands in for Trace when tracing is off, so call sites need no checks."""
+    _span = _NullSpan()
+
+    def span(self, stage):
+        return self._span
+
+    def record(self, stage, seconds):
+        pass
+
+    def finish(self, **attrs):
+        pass
+
+
+NULL_TRACE = _NullTrace()
+
+
+def start_trace(name: str, **attrs):
+    return Trace(name, **attrs) if TRACE_ENABLED else NULL_TRACE
+
+
+def _percentile(ordered: list, q: float) -> float:
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def perf_report() -> str:
+    if not TRACE_ENABLED:
+        return "Tracing is off — set TRACE_ENABLED = True in config.py to time each request."
+    with _lock:
+        stats = {stage: sorted(samples) for stage, samples in _stats.items()}
+    if not stats:
+        return "No requests timed yet this session — ask me something first."
+    lines = ["── REQUEST TIMING (this session) ──",
+             f"{'stage':<16} {'p50':>9} {'p95':>9} {'n':>5}"]
+    for stage, ordered in stats.items():
+        lines.append(f"{stage:<16} {_percentile(ordered, 0.5):6.0f} ms {_percentile(ordered, 0.95):6.0f} ms {len(ordered):>5}")
+    lines.append("───────────────────────────────────")
+    return "\n".join(lines)
@@ -21,18 +21,142 @@
 #             engine.runAndWait()
 #     threading.Thread(target=_speak, daemon=True).start()
 
-import pyttsx3
+import itertools
+import queue
+import re
 import threading
 
-def speak(text: str):
-    def _speak():
+PRIORITY_REPLY      = 0   # answers to what the user just asked
+PRIORITY_BACKGROUND = 1   # clipboard definitions and other unprompted speech
+
+# A sentence ends at a newline, or at . ! ? followed by a space — but not
+# after a digit, so numbered steps ("1. Open WhatsApp") stay whole
+_SENTENCE_END = re.compile(r"\n+|(?<![0-9])[.!?]+(?=\s)")
+
+
+class TTSWorker:
+    def __init__(self, rate=150, volume=1.0):
+        """
+        One long-lived pyttsx3 engine on its own thread, fed from a priority queue.
+
+        Utterances play one at a time, most urgent first, so overlapping
+        replies queue up instead of talking over each other. A reply arriving
+        while background speech plays cuts that speech short, and cancel()
+        stops everything for barge-in.
+        """
+        self.rate        = rate
+        self.volume      = volume
+        self._queue      = queue.PriorityQueue()
+        self._seq        = itertools.count()
+        self._generation = 0          # bumped by cancel(); older queued items are skipped
+        self._stop       = threading.Event()
+        self._current    = None       # priority of the utterance being spoken
+        self._lock       = threading.Lock()
+        self._thread     = None
+        self._engine     = None
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def speak(self, text: str, priority: int = PRIORITY_REPLY, generation=None, on_start=None):
+        text = text.strip()
+        if not text:
+            return
+        self._ensure_started()
+        with self._lock:
+            if generation is None:
+                generation = self._generation
+            if self._current is not None and priority < self._current:
+                self._stop.set()
+        self._queue.put((priority, next(self._seq), generation, text, on_start))
+
+    def cancel(self):
+        """Stop the current utterance and drop everything queued."""
+        with self._lock:
+            self._generation += 1
+            self._stop.set()
+
+    def stream(self, priority: int = PRIORITY_REPLY, on_start=None):
+        return SpeechStream(self, priority, on_start)
+
+    def _on_word(self, name, location, length):
+        if self._stop.is_set() and self._engine:
+            self._engine.stop()
+
+    def _run(self):
         try:
-            engine = pyttsx3.init()
-            engine.setProperty("rate", 150)
-            engine.setProperty("volume", 1.0)
-            engine.say(text)
-            engine.runAndWait()
-            engine.stop()
+            import pyttsx3
+            self._engine = pyttsx3.init()
+            self._engine.setProperty("rate", self.rate)
+            self._engine.setProperty("volume", self.volume)
+            self._engine.connect("started-word", self._on_word)
         except Exception as e:
             print(f"TTS error: {e}")
-    threading.Thread(target=_speak, daemon=True).start()
\ No newline at end of file
+            return
+        while True:
+            priority, _, generation, text, on_start = self._queue.get()
+            with self._lock:
+                if generation != self._generation:
+                    continue
+                self._stop.clear()
+                self._current = priority
+            try:
+                if on_start:
+                    on_start()
+                self._engine.say(text)
+                self._engine.runAndWait()
+            except Exception as e:
+                print(f"TTS error: {e}")
+            finally:
+                with self._lock:
+                    self._current = None
+
+
+class SpeechStream:
+    def __init__(self, worker: TTSWorker, priority: int, on_start=None):
+        """
+        Speaks a reply while it is still being generated. feed() takes text
+        fragments as the model streams them and hands each finished sentence
+        to the worker; close() speaks whatever is left. on_start is called
+        on the speech thread when the first sentence starts playing.
+        """
+        self.worker     = worker
+        self.priority   = priority
+        self.generation = worker._generation
+        self.on_start   = on_start
+        self._buffer    = ""
+
+    def _speak(self, text: str):
+        if text.strip():
+            self.worker.speak(text, self.priority, self.generation, self.on_start)
+            self.on_start = None
+
+    def feed(self, text: str):
+        self._buffer += text
+        end = 0
+        for match in _SENTENCE_END.finditer(self._buffer):
+            self._speak(self._buffer[end:match.end()])
+            end = match.end()
+        self._buffer = self._buffer[end:]
+
+    def close(self):
+        self._speak(self._buffer)
+        self._buffer = ""
+
+
+_worker = TTSWorker()
+
+
+def speak(text: str, priority: int = PRIORITY_REPLY):
+    _worker.speak(text, priority)
+
+
+def speech_stream(priority: int = PRIORITY_REPLY, on_start=None) -> SpeechStream:
+    return _worker.stream(priority, on_start)
+
+
+def cancel_speech():
+    _worker.cancel()
@@ -0,0 +1,272 @@
+import os
+import json
+import mmap
+import shutil
+
+import numpy as np
+
+from core.ann import make_ann
+
+STORE_VERSION = 1
+META_FILE     = "store.json"     # dim, live row count, deleted rows — written last, so it is the commit point
+VECTORS_FILE  = "vectors.npy"    # float32 (rows, dim), L2-normalised
+OFFSETS_FILE  = "offsets.npy"    # int64 (rows + 1,) byte offsets of each record in CHUNKS_FILE
+CHUNKS_FILE   = "chunks.bin"     # UTF-8 JSON records {"id", "text", "metadata"}, back to back
+PENDING_VECTORS = "vectors.pending"
+PENDING_CHUNKS  = "chunks.pending"
+
+COPY_BLOCK_ROWS = 8192
+
+
+def _normalise(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class VectorStore:
+    def __init__(self, path, ann=None):
+        """
+        Compact on-disk vector store for the knowledge base.
+
+        Embeddings live in a memory-mapped float32 .npy matrix and chunk text
+        in an offset-indexed record file, so opening the store reads only two
+        small headers and pages are loaded as searches touch them. Top-k search
+        is one matrix-vector product over the mapped matrix, unless ann names
+        an approximate index ("ivf" or "hnsw") kept alongside — see core.ann.
+        """
+        self.path     = path
+        self.ann_kind = ann
+        self.ann      = None
+        self.dim      = None
+        self.count    = 0
+        self.deleted  = set()
+        self.vectors  = None
+        self.offsets  = None
+        self._chunks  = None
+        self._chunks_file = None
+
+    @staticmethod
+    def exists(path) -> bool:
+        return os.path.exists(os.path.join(path, META_FILE))
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    @property
+    def live_count(self) -> int:
+        return self.count - len(self.deleted)
+
+    # ── Open / close ──────────────────────────────────────────────────────────
+
+    def open(self):
+        self.close()
+        if self.exists(self.path):
+            with open(self._file(META_FILE), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            self.dim = meta["dim"]
+            self.count = meta["count"]
+            self.deleted = set(meta.get("deleted", []))
+        if self.count:
+            # The meta file is the commit point — rows past `count` belong to an
+            # interrupted write and are ignored
+            self.vectors = np.load(self._file(VECTORS_FILE), mmap_mode="r")[:self.count]
+            self.offsets = np.load(self._file(OFFSETS_FILE), mmap_mode="r")[:self.count + 1]
+            self._chunks_file = open(self._file(CHUNKS_FILE), "rb")
+            self._chunks = mmap.mmap(self._chunks_file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self.vectors = np.zeros((0, self.dim or 0), dtype=np.float32)
+            self.offsets = np.zeros(1, dtype=np.int64)
+        if self.ann is None and self.ann_kind:
+            self.ann = make_ann(self.ann_kind, self.path)
+            if self.ann is not None:
+                self.ann.open(self)
+        return self
+
+    def close(self):
+        # Mappings must be released before the files are replaced (Windows
+        # refuses to replace a mapped file)
+        self.vectors = None
+        self.offsets = None
+        if self._chunks is not None:
+            self._chunks.close()
+            self._chunks = None
+        if self._chunks_file is not None:
+            self._chunks_file.close()
+            self._chunks_file = None
+
+    def _write_meta(self):
+        os.makedirs(self.path, exist_ok=True)
+        meta = {
+            "version": STORE_VERSION, "dim": self.dim,
+            "count": self.count, "deleted": sorted(self.deleted),
+        }
+        tmp = self._file(META_FILE + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._file(META_FILE))
+
+    # ── Reads ─────────────────────────────────────────────────────────────────
+
+    def get(self, row: int) -> dict:
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return json.loads(self._chunks[start:end].decode("utf-8"))
+
+    def search(self, query, k: int, exact=False):
+        """Return up to k (row, score) pairs, best first, by cosine similarity."""
+        if self.live_count == 0:
+            return []
+        q = _normalise(query).reshape(-1)
+        if self.ann is not None and not exact:
+            hits = self.ann.search(self, q, k)
+            if hits is not None:
+                return hits
+        scores = self.vectors @ q
+        if self.deleted:
+            scores[list(self.deleted)] = -np.inf
+        k = min(k, self.live_count)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(row), float(scores[row])) for row in top]
+
+    # ── Writes ────────────────────────────────────────────────────────────────
+
+    def writer(self):
+        """Start a bulk append — see StoreWriter."""
+        return StoreWriter(self)
+
+    def add(self, records, embeddings) -> list:
+        """Append records ({"id", "text", "metadata"}) with their embeddings. Returns their rows."""
+        writer = self.writer()
+        try:
+            rows = writer.add(records, embeddings)
+        except Exception:
+            writer.abort()
+            raise
+        writer.commit()
+        return rows
+
+    def delete(self, rows):
+        """Tombstone rows — they stop matching at once and are dropped at the next compact()."""
+        rows = [int(r) for r in rows]
+        self.deleted.update(rows)
+        self._write_meta()
+        if self.ann is not None:
+            self.ann.delete(rows)
+
+    def compact(self) -> dict:
+        """Rewrite the store without deleted rows. Returns {old row: new row}."""
+        keep = [r for r in range(self.count) if r not in self.deleted]
+        remap = {old: new for new, old in enumerate(keep)}
+        records = [self.get(r) for r in keep]
+        vectors = np.array(self.vectors[keep], dtype=np.float32) if keep else np.zeros((0, self.dim or 0), np.float32)
+
+        # Commit an empty store first — if we are interrupted, the caller sees
+        # rows missing and re-indexes rather than reading mismatched files
+        self.close()
+        self.count = 0
+        self.deleted = set()
+        self._write_meta()
+        if self.ann is not None:
+            self.ann.reset()   # rebuilt by the add below
+        for name in (VECTORS_FILE, OFFSETS_FILE, CHUNKS_FILE):
+            if os.path.exists(self._file(name)):
+                os.remove(self._file(name))
+        self.open()
+        self.add(records, vectors)
+        return remap
+
+
+class StoreWriter:
+    def __init__(self, store):
+        """
+        Appends many batches to a VectorStore while it stays open for searches.
+
+        Batches are spooled to pending files next to the store; commit() then
+        copies the existing matrix and the spooled rows into the new vectors.npy
+        once, block by block, so ingesting in small batches neither rewrites the
+        matrix per batch nor holds every embedding in memory.
+        """
+        self.store     = store
+        self.base      = store.count
+        self.count     = 0
+        self._lengths  = []
+        os.makedirs(store.path, exist_ok=True)
+        self._vectors  = open(store._file(PENDING_VECTORS), "wb")
+        self._chunks   = open(store._file(PENDING_CHUNKS), "wb")
+
+    def add(self, records, embeddings) -> list:
+        if len(records) == 0:
+            return []
+        embeddings = _normalise(embeddings)
+        if self.store.dim is None:
+            self.store.dim = embeddings.shape[1]
+        self._vectors.write(embeddings.astype(np.float32).tobytes())
+        for record in records:
+            encoded = json.dumps(record, ensure_ascii=False).encode("utf-8")
+            self._chunks.write(encoded)
+            self._lengths.append(len(encoded))
+        start = self.base + self.count
+        self.count += len(records)
+        return list(range(start, start + len(records)))
+
+    def _cleanup(self):
+        self._vectors.close()
+        self._chunks.close()
+        for name in (PENDING_VECTORS, PENDING_CHUNKS):
+            path = self.store._file(name)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def abort(self):
+        self._cleanup()
+
+    def commit(self):
+        """Publish every added row. The store must not have changed since writer()."""
+        store = self.store
+        self._vectors.close()
+        self._chunks.close()
+        if self.count == 0:
+            self._cleanup()
+            return
+
+        old_count = store.count
+        new_count = old_count + self.count
+        chunk_end = int(store.offsets[-1])
+        offsets = np.empty(new_count + 1, dtype=np.int64)
+        offsets[:old_count + 1] = store.offsets
+        offsets[old_count + 1:] = chunk_end + np.cumsum(self._lengths)
+
+        pending = np.memmap(store._file(PENDING_VECTORS), dtype=np.float32, mode="r",
+                            shape=(self.count, store.dim))
+        tmp_vectors = store._file(VECTORS_FILE + ".tmp")
+        out = np.lib.format.open_memmap(tmp_vectors, mode="w+", dtype=np.float32,
+                                        shape=(new_count, store.dim))
+        for start in range(0, old_count, COPY_BLOCK_ROWS):
+            end = min(start + COPY_BLOCK_ROWS, old_count)
+            out[start:end] = store.vectors[start:end]
+        for start in range(0, self.count, COPY_BLOCK_ROWS):
+            end = min(start + COPY_BLOCK_ROWS, self.count)
+            out[old_count + start:old_count + end] = pending[start:end]
+        out.flush()
+        del out, pending
+
+        store.close()
+        chunks_path = store._file(CHUNKS_FILE)
+        with open(chunks_path, "r+b" if os.path.exists(chunks_path) else "wb") as f:
+            f.seek(chunk_end)
+            f.truncate()
+            with open(store._file(PENDING_CHUNKS), "rb") as src:
+                shutil.copyfileobj(src, f)
+        os.replace(tmp_vectors, store._file(VECTORS_FILE))
+        tmp_offsets = store._file(OFFSETS_FILE + ".tmp.npy")
+        np.save(tmp_offsets, offsets)
+        os.replace(tmp_offsets, store._file(OFFSETS_FILE))
+
+        store.count = new_count
+        store._write_meta()
+        store.open()
+        self._cleanup()
+        if store.ann is not None:
+            store.ann.add(store, old_count, new_count)
@@ -1,28 +1,94 @@
 import threading
 import queue
-import sounddevice as sd
-from vosk import Model, KaldiRecognizer
 import json
 import os
+import time
+import wave
+from collections import deque
+
+import numpy as np
 
 VOSK_MODEL_PATH = "vosk-model-small-en-us-0.15/vosk-model-small-en-us-0.15"
+SAMPLE_RATE = 16000
+BLOCK_SIZE = 1600          # 100 ms — small blocks let partial results fire sooner
+
+# Energy gate — silence never reaches the recognizer
+MIN_SPEECH_RMS = 300       # int16 RMS below this is always silence
+SPEECH_RATIO = 3.0         # speech must be this much louder than the noise floor
+NOISE_FLOOR_DECAY = 0.95   # how slowly the noise floor follows quiet blocks
+PREROLL_BLOCKS = 3         # blocks before the gate opens, so the first syllable isn't lost
+HANGOVER_BLOCKS = 5        # keep decoding this long after speech stops
+COOLDOWN_SECONDS = 2.0     # ignore the same utterance firing twice
+
+# "zigsy" is not in the small model's vocabulary, so the grammar also lists
+# in-vocabulary phrases it is usually heard as
+WAKE_VARIANTS = {
+    "hey zigsy": ["hey ziggy", "hey zig see", "hey siggy", "hey zig", "a ziggy"],
+}
+
+
+class WakeWordStats:
+    def __init__(self):
+        self.blocks         = 0
+        self.decoded_blocks = 0
+        self.detections     = 0
+        self.cpu_seconds    = 0.0
+        self.latencies      = deque(maxlen=100)   # ms from block captured to detection
+
+    @property
+    def audio_seconds(self) -> float:
+        return self.blocks * BLOCK_SIZE / SAMPLE_RATE
+
+    @property
+    def cpu_per_hour(self) -> float:
+        """CPU seconds spent per hour of audio listened to."""
+        if not self.blocks:
+            return 0.0
+        return self.cpu_seconds / (self.audio_seconds / 3600)
+
+    @property
+    def gate_ratio(self) -> float:
+        """Share of blocks that passed the energy gate and were decoded."""
+        return self.decoded_blocks / self.blocks if self.blocks else 0.0
+
+    def status_line(self) -> str:
+        latency = f"{np.mean(self.latencies):.0f} ms avg, {max(self.latencies):.0f} ms max" if self.latencies else "n/a"
+        return (f"[Wake Word] {self.audio_seconds / 60:.1f} min listened  •  "
+                f"{self.gate_ratio:.0%} decoded  •  {self.cpu_per_hour:.0f} CPU s/h  •  "
+                f"{self.detections} detections  •  latency {latency}")
+
 
 class WakeWordListener:
-    def __init__(self, wake_word="hey zigsy", on_detected=None):
+    def __init__(self, wake_word="hey zigsy", on_detected=None, model_path=VOSK_MODEL_PATH):
+        """
+        Listens for the wake phrase with as little CPU as possible: an energy
+        gate drops silent blocks before decoding, the recognizer only knows the
+        wake phrase and its variants, and detection fires on partial results
+        instead of waiting for the end of the utterance.
+        """
         self.wake_word = wake_word.lower()
+        self.phrases = [self.wake_word] + WAKE_VARIANTS.get(self.wake_word, [])
         self.on_detected = on_detected
         self.running = False
         self.audio_queue = queue.Queue()
         self.model = None
         self.recognizer = None
+        self.stats = WakeWordStats()
+
+        self._noise_floor = MIN_SPEECH_RMS / SPEECH_RATIO
+        self._preroll = deque(maxlen=PREROLL_BLOCKS)
+        self._hangover = 0
+        self._last_detection = -COOLDOWN_SECONDS
 
-        if not os.path.exists(VOSK_MODEL_PATH):
-            print(f"[Wake Word] Vosk model not found at {VOSK_MODEL_PATH}")
+        if not os.path.exists(model_path):
+            print(f"[Wake Word] Vosk model not found at {model_path}")
             return
 
         try:
-            self.model = Model(VOSK_MODEL_PATH)
-            self.recognizer = KaldiRecognizer(self.model, 16000)
+            from vosk import Model, KaldiRecognizer
+            self.model = Model(model_path)
+            grammar = json.dumps(self.phrases + ["[unk]"])
+            self.recognizer = KaldiRecognizer(self.model, SAMPLE_RATE, grammar)
             print("[Wake Word] Model loaded successfully")
         except Exception as e:
             print(f"[Wake Word] Failed to load model: {e}")
@@ -33,30 +99,104 @@ class WakeWordListener:
             return
         self.running = True
         threading.Thread(target=self._listen_loop, daemon=True).start()
-        print("[Wake Word] Listening for 'hey zigsy'...")
+        print(f"[Wake Word] Listening for '{self.wake_word}'...")
 
     def stop(self):
         self.running = False
 
-    def _audio_callback(self, indata, frames, time, status):
-        self.audio_queue.put(bytes(indata))
+    # ── Detection ─────────────────────────────────────────────────────────────
+
+    def _is_speech(self, data: bytes) -> bool:
+        samples = np.frombuffer(data, dtype=np.int16).astype(np.float32)
+        rms = float(np.sqrt(np.mean(samples * samples))) if len(samples) else 0.0
+        speech = rms > max(MIN_SPEECH_RMS, self._noise_floor * SPEECH_RATIO)
+        if not speech:
+            self._noise_floor = NOISE_FLOOR_DECAY * self._noise_floor + (1 - NOISE_FLOOR_DECAY) * rms
+        return speech
+
+    def _matches(self, text: str) -> bool:
+        return any(phrase in text for phrase in self.phrases)
+
+    def _decode(self, data: bytes) -> bool:
+        self.stats.decoded_blocks += 1
+        if self.recognizer.AcceptWaveform(data):
+            text = json.loads(self.recognizer.Result()).get("text", "")
+        else:
+            text = json.loads(self.recognizer.PartialResult()).get("partial", "")
+        return self._matches(text)
+
+    def feed(self, data: bytes, captured_at: float = None) -> bool:
+        """
+        Process one block of 16 kHz mono int16 audio. Returns True if the wake
+        phrase was detected in it. captured_at is the perf_counter() time the
+        block was recorded, for the latency counter.
+        """
+        cpu_start = time.thread_time()
+        captured_at = captured_at or time.perf_counter()
+        self.stats.blocks += 1
+        now = self.stats.audio_seconds
+        detected = False
+
+        if self._is_speech(data):
+            if self._hangover == 0:
+                # Gate opening — decode the blocks just before it as well
+                for block in self._preroll:
+                    detected = self._decode(block) or detected
+            self._hangover = HANGOVER_BLOCKS
+            detected = self._decode(data) or detected
+        elif self._hangover:
+            self._hangover -= 1
+            detected = self._decode(data) or detected
+            if self._hangover == 0:
+                self.recognizer.Reset()
+        self._preroll.append(data)
+
+        if detected:
+            self.recognizer.Reset()
+            if now - self._last_detection < COOLDOWN_SECONDS:
+                detected = False
+            else:
+                self._last_detection = now
+                self.stats.detections += 1
+                self.stats.latencies.append((time.perf_counter() - captured_at) * 1000)
+        self.stats.cpu_seconds += time.thread_time() - cpu_start
+
+        if detected and self.on_detected:
+            self.on_detected()
+        return detected
+
+    def process_wav(self, path: str) -> list:
+        """Run a recorded 16 kHz mono 16-bit WAV through the detector. Returns detection times in seconds."""
+        detections = []
+        with wave.open(path, "rb") as wav:
+            if wav.getframerate() != SAMPLE_RATE or wav.getnchannels() != 1 or wav.getsampwidth() != 2:
+                raise ValueError(f"{path}: expected 16 kHz mono 16-bit audio")
+            while True:
+                data = wav.readframes(BLOCK_SIZE)
+                if not data:
+                    break
+                if self.feed(data):
+                    detections.append(round(self.stats.audio_seconds, 2))
+        return detections
+
+    # ── Live audio ────────────────────────────────────────────────────────────
+
+    def _audio_callback(self, indata, frames, time_info, status):
+        self.audio_queue.put((bytes(indata), time.perf_counter()))
 
     def _listen_loop(self):
-        with sd.RawInputStream(samplerate=16000, blocksize=8000,
+        import sounddevice as sd
+        with sd.RawInputStream(samplerate=SAMPLE_RATE, blocksize=BLOCK_SIZE,
                                dtype='int16', channels=1,
                                callback=self._audio_callback):
             while self.running:
                 try:
-                    data = self.audio_queue.get(timeout=1)
-                    if self.recognizer.AcceptWaveform(data):
-                        result = json.loads(self.recognizer.Result())
-                        text = result.get("text", "").lower()
-                        print(f"[Wake Word] Heard: {text}")
-                        if self.wake_word in text:
-                            if self.on_detected:
-                                self.on_detected()
+                    data, captured_at = self.audio_queue.get(timeout=1)
+                    if self.feed(data, captured_at):
+                        print(f"[Wake Word] Detected '{self.wake_word}'")
+                        print(self.stats.status_line())
                 except queue.Empty:
                     continue
                 except Exception as e:
                     print(f"[Wake Word] Error: {e}")
-                    continue
\ No newline at end of file
+                    continue
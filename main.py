@@ -22,12 +22,13 @@ os.environ["TF_CPP_MIN_LOG_LEVEL"] = "3"
 import logging
 logging.getLogger("llama_index").setLevel(logging.ERROR)
 
-from core.llm import chat
-from core.rag import load_or_build_index, get_context
-from core.memory import load_memory, get_memory_context, add_confusion, add_note
-from tools.screen_context import get_active_window_info
+from core.startup import timed
 
 if __name__ == "__main__":
-    from ui.app import ZigsyApp
-    app = ZigsyApp()
+    # Heavy subsystems (LlamaIndex/torch, Whisper, Ollama, TTS) load lazily
+    # after the window is up — see ZigsyApp.load_backend
+    with timed("import ui.app"):
+        from ui.app import ZigsyApp
+    with timed("build window"):
+        app = ZigsyApp()
     app.mainloop()
\ No newline at end of file
@@ -1,48 +1,364 @@
 import pyperclip
 import threading
+import hashlib
+import os
+import sys
 import time
+import shutil
+import subprocess
 
 ZIGSY_COMMANDS = {
     "stash this", "stash", "ghost", "ghost mode", "status",
     "vitals", "system status", "explain", "yes", "yes explain"
 }
 
+DEBOUNCE_SECONDS = 0.4    # a burst of copies inside this window is one event
+IDLE_WAIT_SECONDS = 1.0   # how often the watcher wakes to check it is still running
+POLL_MIN_SECONDS = 0.25   # polling interval right after a change
+POLL_MAX_SECONDS = 2.0    # polling interval once the clipboard has been quiet a while
+POLL_BACKOFF = 1.5
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8", errors="replace")).hexdigest()
+
+
+def _clean(text: str) -> str:
+    return text.strip().rstrip("?!.,;:")
+
+
+def clipboard_key(text: str) -> str:
+    """Identifies clipboard content the way the watcher does, e.g. to key work done for it."""
+    return _digest(_clean(text))
+
+
+# ── Backends ──────────────────────────────────────────────────────────────────
+# A backend's wait(timeout) blocks until the clipboard may have changed and
+# returns its text, or returns None if nothing happened within timeout.
+
+class PollingBackend:
+    """Reads the clipboard on an interval that stretches while nothing changes."""
+    name = "polling"
+
+    def __init__(self):
+        self.interval = POLL_MIN_SECONDS
+        self._last    = None
+
+    def read(self) -> str:
+        return pyperclip.paste()
+
+    def wait(self, timeout: float):
+        time.sleep(min(self.interval, timeout))
+        try:
+            text = self.read()
+        except Exception:
+            return None
+        digest = _digest(text)
+        if digest == self._last:
+            self.interval = min(self.interval * POLL_BACKOFF, POLL_MAX_SECONDS)
+            return None
+        self._last = digest
+        self.interval = POLL_MIN_SECONDS
+        return text
+
+    def close(self):
+        pass
+
+
+class _EventBackend:
+    """Base for backends woken by an OS change notification."""
+
+    def __init__(self):
+        self._changed = threading.Event()
+
+    def read(self) -> str:
+        return pyperclip.paste()
+
+    def wait(self, timeout: float):
+        if not self._changed.wait(timeout):
+            return None
+        self._changed.clear()
+        try:
+            return self.read()
+        except Exception:
+            return None
+
+    def close(self):
+        pass
+
+
+class WindowsBackend(_EventBackend):
+    """WM_CLIPBOARDUPDATE via AddClipboardFormatListener on a message-only window."""
+    name = "windows"
+
+    def __init__(self):
+        super().__init__()
+        import ctypes
+        from ctypes import wintypes
+        self._ctypes = ctypes
+        self._user32 = ctypes.WinDLL("user32", use_last_error=True)
+        self._hwnd   = None
+        self._ready  = threading.Event()
+        self._error  = None
+        threading.Thread(target=self._run, args=(ctypes, wintypes), daemon=True).start()
+        self._ready.wait(5)
+        if self._hwnd is None:
+            raise OSError(self._error or "clipboard listener window was not created")
+
+    def _run(self, ctypes, wintypes):
+        user32 = self._user32
+        LRESULT = ctypes.c_ssize_t
+        WNDPROC = ctypes.WINFUNCTYPE(LRESULT, wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM)
+        WM_DESTROY, WM_CLOSE, WM_CLIPBOARDUPDATE = 0x0002, 0x0010, 0x031D
+        HWND_MESSAGE = wintypes.HWND(-3)
+
+        class WNDCLASSW(ctypes.Structure):
+            _fields_ = [
+                ("style", wintypes.UINT), ("lpfnWndProc", WNDPROC),
+                ("cbClsExtra", ctypes.c_int), ("cbWndExtra", ctypes.c_int),
+                ("hInstance", wintypes.HINSTANCE), ("hIcon", wintypes.HICON),
+                ("hCursor", wintypes.HANDLE), ("hbrBackground", wintypes.HBRUSH),
+                ("lpszMenuName", wintypes.LPCWSTR), ("lpszClassName", wintypes.LPCWSTR),
+            ]
+
+        user32.DefWindowProcW.argtypes = [wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM]
+        user32.DefWindowProcW.restype = LRESULT
+        user32.CreateWindowExW.argtypes = [
+            wintypes.DWORD, wintypes.LPCWSTR, wintypes.LPCWSTR, wintypes.DWORD,
+            ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int,
+            wintypes.HWND, wintypes.HMENU, wintypes.HINSTANCE, wintypes.LPVOID,
+        ]
+        user32.CreateWindowExW.restype = wintypes.HWND
+
+        def _wndproc(hwnd, msg, wparam, lparam):
+            if msg == WM_CLIPBOARDUPDATE:
+                self._changed.set()
+                return 0
+            if msg == WM_CLOSE:
+                user32.RemoveClipboardFormatListener(hwnd)
+                user32.DestroyWindow(hwnd)
+                return 0
+            if msg == WM_DESTROY:
+                user32.PostQuitMessage(0)
+                return 0
+            return user32.DefWindowProcW(hwnd, msg, wparam, lparam)
+
+        # Kept on self so the callback isn't garbage-collected while the window lives
+        self._wndproc = WNDPROC(_wndproc)
+        hinstance = ctypes.windll.kernel32.GetModuleHandleW(None)
+        wc = WNDCLASSW(lpfnWndProc=self._wndproc, hInstance=hinstance, lpszClassName="ZigsyClipboardListener")
+        user32.RegisterClassW(ctypes.byref(wc))
+        hwnd = user32.CreateWindowExW(0, wc.lpszClassName, "", 0, 0, 0, 0, 0,
+                                      HWND_MESSAGE, None, hinstance, None)
+        if not hwnd or not user32.AddClipboardFormatListener(hwnd):
+            self._error = f"WinError {ctypes.get_last_error()}"
+            self._ready.set()
+            return
+        self._hwnd = hwnd
+        self._ready.set()
+
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+
+    def close(self):
+        if self._hwnd:
+            self._user32.PostMessageW(self._hwnd, 0x0010, 0, 0)   # WM_CLOSE
+            self._hwnd = None
+
+
+class WaylandBackend(_EventBackend):
+    """`wl-paste --watch` prints a line on every selection change."""
+    name = "wayland"
+
+    def __init__(self):
+        super().__init__()
+        self._proc = subprocess.Popen(
+            ["wl-paste", "--type", "text", "--watch", "echo", "changed"],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+        )
+        threading.Thread(target=self._pump, daemon=True).start()
+
+    def _pump(self):
+        for _ in self._proc.stdout:
+            self._changed.set()
+
+    def read(self) -> str:
+        result = subprocess.run(["wl-paste", "--no-newline", "--type", "text"],
+                                capture_output=True, text=True, timeout=2)
+        return result.stdout
+
+    def close(self):
+        self._proc.terminate()
+
+
+class X11Backend(_EventBackend):
+    """XFixes selection-owner notifications on the CLIPBOARD selection."""
+    name = "x11"
+
+    def __init__(self):
+        super().__init__()
+        import ctypes
+        import ctypes.util
+        self._ctypes = ctypes
+        x11 = ctypes.cdll.LoadLibrary(ctypes.util.find_library("X11") or "libX11.so.6")
+        xfixes = ctypes.cdll.LoadLibrary(ctypes.util.find_library("Xfixes") or "libXfixes.so.3")
+        x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+        x11.XOpenDisplay.restype = ctypes.c_void_p
+        x11.XDefaultRootWindow.argtypes = [ctypes.c_void_p]
+        x11.XDefaultRootWindow.restype = ctypes.c_ulong
+        x11.XInternAtom.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_int]
+        x11.XInternAtom.restype = ctypes.c_ulong
+        x11.XConnectionNumber.argtypes = [ctypes.c_void_p]
+        x11.XPending.argtypes = [ctypes.c_void_p]
+        x11.XNextEvent.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
+        x11.XFlush.argtypes = [ctypes.c_void_p]
+        x11.XCloseDisplay.argtypes = [ctypes.c_void_p]
+        xfixes.XFixesQueryExtension.argtypes = [ctypes.c_void_p, ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int)]
+        xfixes.XFixesSelectSelectionInput.argtypes = [ctypes.c_void_p, ctypes.c_ulong, ctypes.c_ulong, ctypes.c_ulong]
+
+        display = x11.XOpenDisplay(None)
+        if not display:
+            raise OSError("cannot open X display")
+        event_base, error_base = ctypes.c_int(), ctypes.c_int()
+        if not xfixes.XFixesQueryExtension(display, ctypes.byref(event_base), ctypes.byref(error_base)):
+            x11.XCloseDisplay(display)
+            raise OSError("XFixes extension not available")
+        clipboard = x11.XInternAtom(display, b"CLIPBOARD", 0)
+        xfixes.XFixesSelectSelectionInput(display, x11.XDefaultRootWindow(display), clipboard,
+                                          1)   # XFixesSetSelectionOwnerNotifyMask
+        x11.XFlush(display)
+
+        self._x11          = x11
+        self._display      = display
+        self._notify_event = event_base.value   # + XFixesSelectionNotify (0)
+        self._running      = True
+        threading.Thread(target=self._pump, daemon=True).start()
+
+    def _pump(self):
+        import select
+        x11, display = self._x11, self._display
+        fd = x11.XConnectionNumber(display)
+        event = self._ctypes.create_string_buffer(192)   # sizeof(XEvent)
+        while self._running:
+            while x11.XPending(display):
+                x11.XNextEvent(display, event)
+                if self._ctypes.c_int.from_buffer(event).value == self._notify_event:
+                    self._changed.set()
+            select.select([fd], [], [], IDLE_WAIT_SECONDS)
+        x11.XCloseDisplay(display)
+
+    def close(self):
+        self._running = False
+
+
+class FakeBackend(_EventBackend):
+    """In-process clipboard for tests and benchmarks — copy() acts like the user copying."""
+    name = "fake"
+
+    def __init__(self, text: str = ""):
+        super().__init__()
+        self.text = text
+
+    def copy(self, text: str):
+        self.text = text
+        self._changed.set()
+
+    def read(self) -> str:
+        return self.text
+
+
+def choose_backend():
+    """The native change notification for this platform, or polling if there is none."""
+    candidates = []
+    if sys.platform == "win32":
+        candidates.append(WindowsBackend)
+    elif sys.platform.startswith("linux"):
+        if os.environ.get("WAYLAND_DISPLAY") and shutil.which("wl-paste"):
+            candidates.append(WaylandBackend)
+        if os.environ.get("DISPLAY"):
+            candidates.append(X11Backend)
+    for backend in candidates:
+        try:
+            return backend()
+        except Exception as e:
+            print(f"[Clipboard] {backend.name} backend unavailable, falling back: {e}")
+    return PollingBackend()
+
+
+# ── Watcher ───────────────────────────────────────────────────────────────────
+
 class ClipboardWatcher:
-    def __init__(self, on_word, on_phrase):
+    def __init__(self, on_word, on_phrase, backend=None, on_change=None):
         """
         on_word   — 1-2 words copied: auto explain as dictionary
         on_phrase — 3-50 words copied: prompt user to type 'explain'
+        on_change — called with the clipboard_key of every new content, first
         Ignores anything over 50 words.
+
+        Changes are detected by content hash, and a burst of copies is
+        debounced into one event for the text the burst settled on.
         """
         self.on_word   = on_word
         self.on_phrase = on_phrase
+        self.on_change = on_change
+        self.backend   = backend
         self.running   = False
-        self._last     = ""
+        self.last_hash = None
 
     def start(self):
+        if self.backend is None:
+            self.backend = choose_backend()
+        print(f"[Clipboard] Watching with {self.backend.name} backend")
         self.running = True
         threading.Thread(target=self._watch, daemon=True).start()
 
     def stop(self):
         self.running = False
+        if self.backend is not None:
+            self.backend.close()
 
     def _watch(self):
+        pending, pending_hash, deadline = None, None, None
         while self.running:
+            timeout = IDLE_WAIT_SECONDS if deadline is None else max(0.0, deadline - time.monotonic())
             try:
-                current = pyperclip.paste().strip().rstrip("?!.,;:")
-                if current and current != self._last:
-                    self._last = current
-                    if current.lower() in ZIGSY_COMMANDS:
-                        continue  # skip — it's a command not content
-                    word_count = len(current.split())
-                    if word_count <= 2 and len(current) > 1:
-                        self.on_word(current)
-                    elif 3 <= word_count <= 50:
-                        self.on_phrase(current)
-                    # Over 50 words — ignore silently
+                text = self.backend.wait(timeout)
             except Exception:
-                pass
-            time.sleep(1)
+                text = None
+                time.sleep(timeout)
+
+            if text is not None:
+                current = _clean(text)
+                digest = _digest(current)
+                if not current or digest == self.last_hash:
+                    # The burst ended back where it started — nothing to report
+                    pending, pending_hash, deadline = None, None, None
+                elif digest != pending_hash:
+                    pending, pending_hash = current, digest
+                    deadline = time.monotonic() + DEBOUNCE_SECONDS
+                continue
+
+            if deadline is not None and time.monotonic() >= deadline:
+                self.last_hash = pending_hash
+                try:
+                    if self.on_change:
+                        self.on_change(pending_hash)
+                    self._dispatch(pending)
+                except Exception:
+                    pass
+                pending, pending_hash, deadline = None, None, None
+
+    def _dispatch(self, current: str):
+        if current.lower() in ZIGSY_COMMANDS:
+            return  # skip — it's a command not content
+        word_count = len(current.split())
+        if word_count <= 2 and len(current) > 1:
+            self.on_word(current)
+        elif 3 <= word_count <= 50:
+            self.on_phrase(current)
+        # Over 50 words — ignore silently
 
 
 def get_clipboard() -> str:
@@ -50,4 +366,4 @@ def get_clipboard() -> str:
     try:
         return pyperclip.paste().strip()
     except Exception:
-        return ""
\ No newline at end of file
+        return ""
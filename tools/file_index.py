@@ -0,0 +1,189 @@
+import os
+import json
+import threading
+import time
+
+INDEX_VERSION = 1
+
+
+class FileIndex:
+    def __init__(self, path, skip_dirs):
+        """
+        On-disk filename index for find_file.
+
+        Stores, for every directory under the indexed roots, its mtime and the
+        names of its files and subfolders. A refresh stats each known folder
+        and only re-lists the ones whose mtime changed, so keeping the index
+        current costs a fraction of a full walk.
+        """
+        self.path      = path
+        self.skip_dirs = skip_dirs
+        self._dirs     = {}   # dir path -> (mtime, [subfolder names], [file names])
+        self._roots    = []
+        self._lock     = threading.Lock()
+        self._ready    = threading.Event()
+        self._wake     = threading.Event()
+        self._thread   = None
+
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    def _skip(self, name: str) -> bool:
+        return name in self.skip_dirs or name.startswith('.')
+
+    # ── Persistence ───────────────────────────────────────────────────────────
+
+    def load(self) -> bool:
+        if not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != INDEX_VERSION:
+                return False
+            dirs = {d: (mtime, subdirs, files) for d, mtime, subdirs, files in data["dirs"]}
+        except Exception as e:
+            print(f"[File Index] Could not read {self.path}: {e}")
+            return False
+        with self._lock:
+            self._dirs = dirs
+            self._roots = data.get("roots", [])
+        if self._roots:
+            self._ready.set()
+        return True
+
+    def save(self):
+        with self._lock:
+            data = {
+                "version": INDEX_VERSION,
+                "roots": self._roots,
+                "dirs": [[d, m, s, f] for d, (m, s, f) in self._dirs.items()],
+            }
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except Exception as e:
+            print(f"[File Index] Could not save {self.path}: {e}")
+
+    # ── Building / refreshing ─────────────────────────────────────────────────
+
+    def _scan_dir(self, path: str, mtime: float):
+        subdirs, files = [], []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not self._skip(entry.name):
+                                subdirs.append(entry.name)
+                        else:
+                            files.append(entry.name)
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        return (mtime, subdirs, files)
+
+    def refresh(self, roots) -> int:
+        """
+        Bring the index up to date with the given roots. Folders whose mtime
+        is unchanged keep their stored listing. Returns how many folders had
+        to be re-listed.
+        """
+        roots = [os.path.normpath(r) for r in roots]
+        with self._lock:
+            old = self._dirs
+        new = {}
+        rescanned = 0
+
+        for root in roots:
+            stack = [root]
+            while stack:
+                path = stack.pop()
+                if path in new:
+                    continue
+                try:
+                    mtime = os.stat(path).st_mtime
+                except OSError:
+                    continue
+                entry = old.get(path)
+                if entry is None or entry[0] != mtime:
+                    entry = self._scan_dir(path, mtime)
+                    rescanned += 1
+                new[path] = entry
+                for sub in reversed(entry[1]):
+                    stack.append(os.path.join(path, sub))
+
+        with self._lock:
+            self._dirs = new
+            self._roots = roots
+        self._ready.set()
+        return rescanned
+
+    def start(self, get_roots, interval: float = 600):
+        """Load the saved index, then refresh it in a background thread every `interval` seconds."""
+        if self._thread and self._thread.is_alive():
+            return
+
+        def _run():
+            self.load()
+            while True:
+                started = time.time()
+                try:
+                    rescanned = self.refresh(get_roots())
+                    if rescanned:
+                        self.save()
+                    print(f"[File Index] {len(self._dirs)} folders indexed, "
+                          f"{rescanned} re-listed in {time.time() - started:.1f}s")
+                except Exception as e:
+                    print(f"[File Index] Refresh failed: {e}")
+                self._wake.wait(interval)
+                self._wake.clear()
+
+        self._thread = threading.Thread(target=_run, daemon=True)
+        self._thread.start()
+
+    def request_refresh(self):
+        """Refresh now instead of at the next interval, e.g. when a search finds the index out of date."""
+        self._wake.set()
+
+    # ── Search ────────────────────────────────────────────────────────────────
+
+    def search(self, term: str, match, limit: int):
+        """
+        Return up to `limit` (icon, path) pairs whose names satisfy
+        match(name, term), visiting roots in priority order.
+        """
+        with self._lock:
+            dirs, roots = self._dirs, self._roots
+
+        # Every form of match() needs the term somewhere in the name, so a
+        # plain substring test filters out almost everything before the regex.
+        needle = term.lower()
+        found = []
+        visited = set()
+
+        for root in roots:
+            stack = [root]
+            while stack:
+                path = stack.pop()
+                if path in visited:
+                    continue
+                visited.add(path)
+                entry = dirs.get(path)
+                if entry is None:
+                    continue
+                _, subdirs, files = entry
+                for d in subdirs:
+                    if needle in d.lower() and match(d, term):
+                        found.append(("📁", os.path.join(path, d)))
+                for f in files:
+                    if needle in f.lower() and match(f, term):
+                        found.append(("📄", os.path.join(path, f)))
+                if len(found) >= limit:
+                    return found[:limit]
+                for sub in reversed(subdirs):
+                    stack.append(os.path.join(path, sub))
+        return found
@@ -0,0 +1,122 @@
+import os
+import queue
+import itertools
+import threading
+
+DEFAULT_WORKERS = 8   # the walk is I/O bound, so more threads than cores pays off
+
+
+class ParallelFileSearch:
+    def __init__(self, roots, term, match, skip_dirs, limit=15, workers=DEFAULT_WORKERS, on_match=None):
+        """
+        Multi-threaded os.scandir walk over several roots at once.
+
+        Folders are handed out shallowest-first across all roots, so a match on
+        the Desktop turns up before one buried deep under C:\\. Each match is
+        reported to on_match(icon, path, size) as soon as it is found, using the
+        size from the DirEntry instead of a second stat. All workers stop when
+        `limit` matches are collected or cancel() is called.
+        """
+        self.roots     = [os.path.normpath(r) for r in roots]
+        self.term      = term
+        self.match     = match
+        self.skip_dirs = skip_dirs
+        self.limit     = limit
+        self.workers   = workers
+        self.on_match  = on_match
+        self.results   = []
+        self.cancelled = False
+
+        self._needle   = term.lower()
+        self._queue    = queue.PriorityQueue()
+        self._seq      = itertools.count()
+        self._lock     = threading.Lock()
+        self._visited  = set()
+        self._found    = set()
+        self._pending  = 0
+        self._stop     = threading.Event()
+
+    def cancel(self):
+        self.cancelled = True
+        self._stop.set()
+
+    def run(self):
+        """Walk until the tree is exhausted, the limit is hit or the search is cancelled."""
+        for rank, root in enumerate(self.roots):
+            self._push(0, rank, root)
+        if self._pending == 0:
+            return self.results
+
+        threads = [threading.Thread(target=self._worker, daemon=True) for _ in range(self.workers)]
+        for t in threads:
+            t.start()
+        self._stop.wait()
+        for t in threads:
+            t.join()
+        return self.results
+
+    def _push(self, depth, rank, path):
+        with self._lock:
+            if path in self._visited:
+                return
+            self._visited.add(path)
+            self._pending += 1
+        self._queue.put((depth, rank, next(self._seq), path))
+
+    def _task_done(self):
+        with self._lock:
+            self._pending -= 1
+            if self._pending == 0:
+                self._stop.set()
+
+    def _worker(self):
+        while not self._stop.is_set():
+            try:
+                depth, rank, _, path = self._queue.get(timeout=0.05)
+            except queue.Empty:
+                continue
+            try:
+                self._scan(depth, rank, path)
+            finally:
+                self._task_done()
+
+    def _scan(self, depth, rank, path):
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if self._stop.is_set():
+                        return
+                    name = entry.name
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if is_dir:
+                        if name in self.skip_dirs or name.startswith('.'):
+                            continue
+                        if self._is_match(name):
+                            self._add("📁", entry.path, None)
+                        self._push(depth + 1, rank, entry.path)
+                    elif self._is_match(name):
+                        try:
+                            size = entry.stat().st_size
+                        except OSError:
+                            size = None
+                        self._add("📄", entry.path, size)
+        except OSError:
+            pass
+
+    def _is_match(self, name):
+        return self._needle in name.lower() and self.match(name, self.term)
+
+    def _add(self, icon, path, size):
+        path = os.path.normpath(path)
+        with self._lock:
+            if self._stop.is_set() or path in self._found:
+                return
+            self._found.add(path)
+            self.results.append((icon, path, size))
+            if self.on_match:
+                self.on_match(icon, path, size)
+            if len(self.results) >= self.limit:
+                self._stop.set()
@@ -1,8 +1,14 @@
+import os
+import sys
 import subprocess
 import threading
 import time
 
-# Stores the last known non-Zigsy window
+CACHE_SECONDS = 2.0   # answers within this long of each other reuse one query
+
+_backend = None
+_cache = (float("-inf"), "")   # (monotonic time, info)
+# The last non-Zigsy window seen, in case a later query finds none
 _last_known_window = ""
 _lock = threading.Lock()
 
@@ -46,61 +52,162 @@ def _format_window(title: str, process: str) -> str:
     return f"The user has {app_name} open on their screen"
 
 
-def _poll_active_window():
-    global _last_known_window
-    script = """
-Add-Type @"
-using System;
-using System.Runtime.InteropServices;
-using System.Text;
-public class WinAPI {
-    [DllImport("user32.dll")]
-    public static extern IntPtr GetForegroundWindow();
-    [DllImport("user32.dll")]
-    public static extern int GetWindowText(IntPtr hWnd, StringBuilder text, int count);
-    [DllImport("user32.dll")]
-    public static extern uint GetWindowThreadProcessId(IntPtr hWnd, out uint processId);
-}
-"@
-$hwnd = [WinAPI]::GetForegroundWindow()
-$title = New-Object System.Text.StringBuilder 256
-[WinAPI]::GetWindowText($hwnd, $title, 256)
-$pid = 0
-[WinAPI]::GetWindowThreadProcessId($hwnd, [ref]$pid)
-$process = Get-Process -Id $pid
-Write-Output "$($title.ToString())|$($process.Name)"
-"""
-    while True:
+def _is_own_window(title: str, process: str, pid: int) -> bool:
+    return (pid == os.getpid() or "zigsy" in title.lower()
+            or any(ig in process for ig in IGNORE_PROCESSES))
+
+
+# ── Backends ──────────────────────────────────────────────────────────────────
+# A backend's windows() yields (title, process name, pid) for top-level windows,
+# frontmost first. Zigsy itself is usually in front when a question is asked,
+# so the first window that isn't Zigsy is the one the user is looking at.
+
+class WindowsBackend:
+    """Walks the z-order from the foreground window with user32 calls — no PowerShell."""
+
+    def __init__(self):
+        import ctypes
+        from ctypes import wintypes
+        self._ctypes = ctypes
+        self._user32 = ctypes.WinDLL("user32")
+        self._kernel32 = ctypes.WinDLL("kernel32")
+        self._user32.GetForegroundWindow.restype = wintypes.HWND
+        self._user32.GetWindow.argtypes = [wintypes.HWND, wintypes.UINT]
+        self._user32.GetWindow.restype = wintypes.HWND
+        self._user32.IsWindowVisible.argtypes = [wintypes.HWND]
+        self._user32.GetWindowTextW.argtypes = [wintypes.HWND, wintypes.LPWSTR, ctypes.c_int]
+        self._user32.GetWindowThreadProcessId.argtypes = [wintypes.HWND, ctypes.POINTER(wintypes.DWORD)]
+        self._kernel32.OpenProcess.argtypes = [wintypes.DWORD, wintypes.BOOL, wintypes.DWORD]
+        self._kernel32.OpenProcess.restype = wintypes.HANDLE
+        self._kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+        self._kernel32.QueryFullProcessImageNameW.argtypes = [
+            wintypes.HANDLE, wintypes.DWORD, wintypes.LPWSTR, ctypes.POINTER(wintypes.DWORD)
+        ]
+        self._wintypes = wintypes
+
+    def _process_name(self, pid: int) -> str:
+        ctypes, wintypes = self._ctypes, self._wintypes
+        handle = self._kernel32.OpenProcess(0x1000, False, pid)   # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return ""
         try:
-            result = subprocess.run(
-                ["powershell", "-Command", script],
-                capture_output=True, text=True, timeout=3
-            )
-            output = result.stdout.strip()
-            if "|" in output:
-                title, process = output.split("|", 1)
-                title = title.strip()
-                process = process.strip().lower()
-                if any(ig in process for ig in IGNORE_PROCESSES):
-                    time.sleep(2)
-                    continue
-                if "zigsy" in title.lower():
-                    time.sleep(2)
-                    continue
-                info = _format_window(title, process)
-                if info:
-                    with _lock:
-                        _last_known_window = info
-        except Exception:
-            pass
-        time.sleep(2)
+            size = wintypes.DWORD(260)
+            buf = ctypes.create_unicode_buffer(size.value)
+            if not self._kernel32.QueryFullProcessImageNameW(handle, 0, buf, ctypes.byref(size)):
+                return ""
+            return os.path.splitext(os.path.basename(buf.value))[0].lower()
+        finally:
+            self._kernel32.CloseHandle(handle)
 
+    def windows(self):
+        ctypes, wintypes = self._ctypes, self._wintypes
+        user32 = self._user32
+        hwnd = user32.GetForegroundWindow()
+        buf = ctypes.create_unicode_buffer(256)
+        while hwnd:
+            if user32.IsWindowVisible(hwnd) and user32.GetWindowTextW(hwnd, buf, 256):
+                pid = wintypes.DWORD()
+                user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+                yield buf.value, self._process_name(pid.value), pid.value
+            hwnd = user32.GetWindow(hwnd, 2)   # GW_HWNDNEXT — the window below
 
-def get_active_window_info() -> str:
+
+class X11Backend:
+    """Reads the EWMH stacking list with xprop."""
+
+    def _xprop(self, *args) -> str:
+        return subprocess.run(["xprop", *args], capture_output=True, text=True, timeout=2).stdout
+
+    def _window(self, window_id: str):
+        out = self._xprop("-id", window_id, "_NET_WM_PID", "_NET_WM_NAME", "WM_NAME", "WM_CLASS")
+        props = {}
+        for line in out.splitlines():
+            key, _, value = line.partition("=")
+            props[key.split("(")[0].strip()] = value.strip()
+        title = (props.get("_NET_WM_NAME") or props.get("WM_NAME") or "").strip('"')
+        pid = int(props["_NET_WM_PID"]) if props.get("_NET_WM_PID", "").isdigit() else 0
+        process = ""
+        if pid:
+            try:
+                with open(f"/proc/{pid}/comm", "r") as f:
+                    process = f.read().strip().lower()
+            except OSError:
+                pass
+        if not process and props.get("WM_CLASS"):
+            process = props["WM_CLASS"].split(",")[-1].strip().strip('"').lower()
+        return title, process, pid
+
+    def windows(self):
+        out = self._xprop("-root", "_NET_CLIENT_LIST_STACKING")
+        _, _, ids = out.partition("#")
+        # The stacking list runs bottom to top
+        for window_id in reversed([w.strip() for w in ids.split(",") if w.strip()]):
+            yield self._window(window_id)
+
+
+class FakeBackend:
+    """Fixed list of (title, process, pid) windows, frontmost first — for tests."""
+
+    def __init__(self, windows=()):
+        self._windows = list(windows)
+        self.queries  = 0
+
+    def set_windows(self, windows):
+        self._windows = list(windows)
+
+    def windows(self):
+        self.queries += 1
+        return iter(self._windows)
+
+
+class NullBackend:
+    def windows(self):
+        return iter(())
+
+
+def _choose_backend():
+    if sys.platform == "win32":
+        return WindowsBackend()
+    if os.environ.get("DISPLAY"):
+        return X11Backend()
+    return NullBackend()
+
+
+def set_backend(backend):
+    """Swap the window backend, e.g. for a FakeBackend in tests."""
+    global _backend, _cache
     with _lock:
-        return _last_known_window
+        _backend = backend
+        _cache = (float("-inf"), "")
+
 
+def _query() -> str:
+    for title, process, pid in _backend.windows():
+        title, process = title.strip(), process.strip().lower()
+        if _is_own_window(title, process, pid):
+            continue
+        info = _format_window(title, process)
+        if info:
+            return info
+    return ""
 
-# Start background monitor automatically when module is imported
-_monitor = threading.Thread(target=_poll_active_window, daemon=True)
-_monitor.start()
\ No newline at end of file
+
+def get_active_window_info() -> str:
+    """Describe the window the user is looking at, queried on demand and cached briefly."""
+    global _backend, _cache, _last_known_window
+    with _lock:
+        at, info = _cache
+        if time.monotonic() - at < CACHE_SECONDS:
+            return info
+        try:
+            if _backend is None:
+                _backend = _choose_backend()
+            info = _query()
+        except Exception:
+            info = ""
+        if info:
+            _last_known_window = info
+        else:
+            info = _last_known_window
+        _cache = (time.monotonic(), info)
+        return info
@@ -3,6 +3,10 @@ import re
 import subprocess
 import psutil
 import datetime
+import threading
+
+from tools.file_index import FileIndex
+from tools.file_search import ParallelFileSearch
 
 # ── Directories to always skip ─────────────────────────────────────────────
 SKIP_DIRS = {
@@ -14,6 +18,10 @@ SKIP_DIRS = {
     'dist', '.next', '.nuxt', 'coverage'
 }
 
+MAX_RESULTS = 15
+SHOWN_RESULTS = 5
+FILE_INDEX_PATH = "file_index.json"
+
 FILLER_WORDS = {
     "my", "the", "a", "an", "this", "that", "some", "any",
     "of", "mine", "please", "can", "you"
@@ -39,6 +47,11 @@ VAGUE_PATTERNS = [
 ]
 
 
+_file_index = FileIndex(FILE_INDEX_PATH, SKIP_DIRS)
+_active_search = None
+_search_lock = threading.Lock()
+
+
 def is_natural_language(query: str) -> bool:
     q = query.lower()
     for pattern in NATURAL_LANGUAGE_PATTERNS:
@@ -100,21 +113,60 @@ def matches(name: str, term: str) -> bool:
     )
 
 
-def format_result(icon: str, path: str) -> str:
+def format_result(icon: str, path: str, size=None) -> str:
     name = os.path.basename(path)
-    is_dir = os.path.isdir(path)
+    is_dir = icon == "📁"
     label = "FOLDER" if is_dir else "FILE"
     line = f"{icon} {name} [{label}]\n📍 {path}\n"
     if not is_dir:
         try:
-            size = os.path.getsize(path)
+            if size is None:
+                size = os.path.getsize(path)
             line += f"📦 {size // 1024} KB\n" if size > 1024 else f"📦 {size} B\n"
         except Exception:
             pass
     return line + "\n"
 
 
-def find_file(raw_query: str):
+def _walk_search(search_term: str, on_match=None, roots=None):
+    """
+    Live parallel walk used while the file index is still cold. Starting a new
+    walk cancels the one before it; returns None if this walk was cancelled.
+    """
+    global _active_search
+    search = ParallelFileSearch(roots or get_search_paths(), search_term, matches, SKIP_DIRS,
+                                limit=MAX_RESULTS, on_match=on_match)
+    with _search_lock:
+        if _active_search:
+            _active_search.cancel()
+        _active_search = search
+    found = search.run()
+    with _search_lock:
+        if _active_search is search:
+            _active_search = None
+    return None if search.cancelled else found
+
+
+def cancel_file_search():
+    """Stop a live walk that is still running, if any."""
+    with _search_lock:
+        if _active_search:
+            _active_search.cancel()
+
+
+def start_file_index():
+    """Build the filename index in the background and keep it refreshed."""
+    _file_index.start(get_search_paths)
+
+
+def find_file(raw_query: str, on_result=None, roots=None):
+    """
+    Returns None when the query isn't a filename, otherwise (text, folder).
+    With on_result, each of the first few matches is passed to it as formatted
+    text the moment it is found and the returned text is only the summary.
+    A search cancelled by a newer one returns ("", None). roots replaces the
+    usual search folders and skips the index (used by the benchmarks).
+    """
     if is_natural_language(raw_query) or is_vague_query(raw_query):
         return None
 
@@ -122,41 +174,46 @@ def find_file(raw_query: str):
     if not search_term:
         return ("Please tell me the filename you're looking for.", None)
 
+    shown = []
+
+    def _emit(icon, path, size):
+        if on_result and len(shown) < SHOWN_RESULTS:
+            shown.append(path)
+            on_result(format_result(icon, path, size))
+
     found = []
-    found_paths = set()
-
-    for base_path in get_search_paths():
-        for root, dirs, files in os.walk(base_path):
-            dirs[:] = [d for d in dirs if d not in SKIP_DIRS and not d.startswith('.')]
-            for d in dirs:
-                if matches(d, search_term):
-                    full = os.path.normpath(os.path.join(root, d))
-                    if full not in found_paths:
-                        found.append(("📁", full))
-                        found_paths.add(full)
-            for f in files:
-                if matches(f, search_term):
-                    full = os.path.normpath(os.path.join(root, f))
-                    if full not in found_paths:
-                        found.append(("📄", full))
-                        found_paths.add(full)
-            if len(found) >= 15:
-                break
-        if len(found) >= 15:
-            break
+    indexed = roots is None and _file_index.is_ready()
+    if indexed:
+        cancel_file_search()
+        for icon, path in _file_index.search(search_term, matches, MAX_RESULTS):
+            if os.path.exists(path):
+                found.append((icon, path, None))
+                _emit(icon, path, None)
+            else:
+                _file_index.request_refresh()
+    # The index can be older than the file being looked for, so when it has
+    # nothing the folders are walked as if there were no index
+    if not found:
+        if indexed:
+            _file_index.request_refresh()
+        found = _walk_search(search_term, on_match=_emit, roots=roots)
+        if found is None:
+            return ("", None)
 
     if not found:
         return (f"Could not find '{search_term}'. Check the spelling or try a shorter name.", None)
 
-    output = f"Found {len(found)} match(es) for '{search_term}':\n\n"
-    for icon, path in found[:5]:
-        output += format_result(icon, path)
-    if len(found) > 5:
-        output += f"...and {len(found) - 5} more. Be more specific to narrow results.\n"
-
-    first_folder = None
-    for icon, path in found[:1]:
-        first_folder = path if os.path.isdir(path) else os.path.dirname(path)
+    if on_result:
+        output = f"Found {len(found)} match(es) for '{search_term}'.\n"
+    else:
+        output = f"Found {len(found)} match(es) for '{search_term}':\n\n"
+        for icon, path, size in found[:SHOWN_RESULTS]:
+            output += format_result(icon, path, size)
+    if len(found) > SHOWN_RESULTS:
+        output += f"...and {len(found) - SHOWN_RESULTS} more. Be more specific to narrow results.\n"
+
+    icon, path, _ = found[0]
+    first_folder = path if icon == "📁" else os.path.dirname(path)
 
     return (output.strip(), first_folder)
 
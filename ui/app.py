@@ -1,37 +1,37 @@
 import customtkinter as ctk
 import threading
-import sounddevice as sd
-import soundfile as sf
-import whisper
-import numpy as np
 import os
 import sys
+import time
 import random
+import itertools
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from core.tts import speak
-from core.llm import chat
-from core.rag import load_or_build_index, get_context
+from config import WATCH_KNOWLEDGE_BASE
+
+from core.startup import timed, mark, startup_report
+from core.trace import start_trace, perf_report, NULL_TRACE
+from core.stt import Transcriber, load_model as load_whisper, is_model_loaded as is_whisper_loaded
+from core.tts import speak, speech_stream, cancel_speech, PRIORITY_BACKGROUND
+from core.llm import chat, summarize_conversation, warm_up, is_model_loaded, start_keep_alive_monitor
+from core.history import ConversationHistory
+from core.rag import (load_or_build_index, get_context, watch_knowledge_base, embed_query, embed_texts,
+                      get_kb_version, lexical_search, is_decisive, precompute_queries, query_cache_stats)
+from core.router import IntentRouter
+from core.dictionary import Dictionary, DefinitionCache
+from core.orchestrator import Orchestrator, RequestCancelled, PRIORITY_INTERACTIVE, PRIORITY_CLIPBOARD, PRIORITY_IDLE
+from core.prefetch import Prefetcher, PREFETCH_CLIPBOARD, PREFETCH_HOVER
+from core.response_cache import ResponseCache, context_hash
 from core.memory import load_memory, get_memory_context, add_confusion, add_note
 from tools.screen_context import get_active_window_info
-from tools.system_tools import find_file, open_folder, is_vague_query, is_natural_language, get_system_vitals, stash_clipboard
-from tools.clipboard import ClipboardWatcher, get_clipboard
-
-TASK_KEYWORDS = [
-    "how to", "how do i", "help me", "steps to",
-    "whatsapp", "wifi", "zoom", "call", "message",
-    "settings", "connect", "send", "open", "install",
-    "shortcut", "keyboard", "unity", "editor"
-]
-SCREEN_KEYWORDS = [
-    "which screen", "what screen", "where am i", "which app",
-    "what is open", "what am i looking at", "what is this",
-    "i am confused", "i'm confused", "lost", "what do i see"
-]
+from tools.system_tools import find_file, open_folder, get_system_vitals, stash_clipboard, start_file_index
+from tools.clipboard import ClipboardWatcher, get_clipboard, clipboard_key
+
 CONFUSION_KEYWORDS = ["whatsapp", "wifi", "zoom", "camera", "shortcut", "unity"]
-FIND_TRIGGERS = ["find me", "search for", "locate", "find"]
-FILLER_WORDS = {"my", "the", "a", "an", "this", "that", "some", "any", "of", "mine"}
+
+STREAM_FLUSH_MS = 30  # batch streamed tokens into one chat box update per frame
+HOVER_PREFETCH_MS = 400  # a quick action hovered this long starts answering in the background
 
 QUICK_ACTIONS = [
     ("📱 WhatsApp Call",  "How do I make a video call on WhatsApp?"),
@@ -43,27 +43,81 @@ QUICK_ACTIONS = [
 ]
 
 
-def needs_rag(text):
-    return any(k in text.lower() for k in TASK_KEYWORDS)
-
-
-def needs_screen_context(text):
-    return any(k in text.lower() for k in SCREEN_KEYWORDS)
-
-
-def extract_filename(user_input):
-    text = user_input.lower().strip().rstrip("?!.")
-    user_input = user_input.rstrip("?!.")
-    if is_vague_query(text) or is_natural_language(text):
-        return None
-    for trigger in FIND_TRIGGERS:
-        if text.startswith(trigger):
-            result = user_input[len(trigger):].strip()
-            words = result.split()
-            while words and words[0].lower() in FILLER_WORDS:
-                words.pop(0)
-            return " ".join(words)
-    return None
+def _question_key(text: str) -> str:
+    return "ask:" + " ".join(text.lower().split())
+
+
+class ReplyStream:
+    _ids = itertools.count()
+
+    def __init__(self, app, placeholder="Thinking..."):
+        """
+        Writes one Zigsy reply into the chat box in place as tokens arrive.
+
+        The reply lives between two text marks, so each batch of tokens is a
+        single insert at the end mark — the rest of the transcript is never
+        read back or rewritten. write() may be called from any thread; tokens
+        are batched and flushed on the Tk thread.
+        """
+        n = next(self._ids)
+        self.app        = app
+        self.start_mark = f"reply{n}_start"
+        self.end_mark   = f"reply{n}_end"
+        self._pending   = []
+        self._lock      = threading.Lock()
+        self._scheduled = False
+        self._started   = False
+        self.app.after(0, lambda: self._begin(placeholder))
+
+    def _begin(self, placeholder):
+        box = self.app.chat_box
+        box.configure(state="normal")
+        box.insert("end", "// ZIGSY > ")
+        box.mark_set(self.start_mark, "end-1c")
+        box.mark_gravity(self.start_mark, "left")
+        box.insert("end", placeholder + "\n\n")
+        # The end mark sits before the separator, so the reply grows in place
+        # even after later messages are appended below it
+        box.mark_set(self.end_mark, "end-3c")
+        box.mark_gravity(self.end_mark, "right")
+        box.see("end")
+        box.configure(state="disabled")
+
+    def write(self, text):
+        with self._lock:
+            self._pending.append(text)
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self.app.after(STREAM_FLUSH_MS, self._flush)
+
+    def _flush(self):
+        with self._lock:
+            text = "".join(self._pending)
+            self._pending.clear()
+            self._scheduled = False
+        if not text:
+            return
+        box = self.app.chat_box
+        box.configure(state="normal")
+        if not self._started:
+            box.delete(self.start_mark, self.end_mark)
+            self._started = True
+        box.insert(self.end_mark, text)
+        box.see("end")
+        box.configure(state="disabled")
+
+    def close(self):
+        def _close():
+            self._flush()
+            box = self.app.chat_box
+            if not self._started:
+                box.configure(state="normal")
+                box.delete(self.start_mark, self.end_mark)
+                box.configure(state="disabled")
+            box.mark_unset(self.start_mark)
+            box.mark_unset(self.end_mark)
+        self.app.after(0, _close)
 
 
 class ZigsyApp(ctk.CTk):
@@ -82,24 +136,44 @@ class ZigsyApp(ctk.CTk):
         self.configure(fg_color=self.color_space_bg)
         ctk.set_appearance_mode("dark")
 
-        self.history       = []
+        self.orchestrator  = Orchestrator().start()
+        self.history       = ConversationHistory(summarize=self._summarize)
+        # A prepared answer is only served while the conversation and the knowledge base are unchanged
+        self.prefetcher    = Prefetcher(self.orchestrator,
+                                        context=lambda: (self.history.version, get_kb_version()))
+        self._hover_timer  = None
         self.memory        = load_memory()
-        self.whisper_model = None
+        with timed("open dictionary"):
+            self.dictionary = Dictionary().open()
+        self.definition_cache = DefinitionCache()
+        self.transcriber   = Transcriber()
+        self.backend_ready = threading.Event()
         self.recording     = False
-        self.audio_data    = []
         self.index         = None
         self.open_btn      = None
         self.font_size     = 15
         self.ghost_mode    = False
+        self.response_cache = None
+        self.router        = IntentRouter()
 
         self.setup_ui()
 
+        # Deterministic commands work straight away; the knowledge base and
+        # models load in the background (see load_backend)
+        self.enable_input()
+        self.mic_btn.configure(state="normal")
+        self.set_status("WARMING UP...")
+        self.append_chat("Zigsy", "SYSTEM READY. How can I help you today?")
+        self.after(0, lambda: mark("window ready"))
+
         self.clipboard_watcher = ClipboardWatcher(
             on_word=self.on_clipboard_word,
-            on_phrase=self.on_clipboard_phrase
+            on_phrase=self.on_clipboard_phrase,
+            on_change=self.on_clipboard_change
         )
         self.clipboard_watcher.start()
 
+        start_file_index()
         threading.Thread(target=self.load_backend, daemon=True).start()
 
     def setup_ui(self):
@@ -149,6 +223,8 @@ class ZigsyApp(ctk.CTk):
                 corner_radius=5,
                 command=lambda m=message: self.send_message(m)
             )
+            btn.bind("<Enter>", lambda e, m=message: self.on_quick_action_hover(m))
+            btn.bind("<Leave>", lambda e: self.on_quick_action_leave())
             btn.grid(row=0, column=i, padx=4, sticky="ew")
             qa_frame.grid_columnconfigure(i, weight=1)
 
@@ -209,6 +285,15 @@ class ZigsyApp(ctk.CTk):
             self.chat_box.configure(state="disabled")
         self.after(0, _append)
 
+    def append_text(self, text):
+        """Append raw text to the transcript, without a sender prefix."""
+        def _append():
+            self.chat_box.configure(state="normal")
+            self.chat_box.insert("end", text)
+            self.chat_box.see("end")
+            self.chat_box.configure(state="disabled")
+        self.after(0, _append)
+
     def set_status(self, text):
         self.after(0, lambda: self.header_label.configure(
             text=f"[ ZIGSY // COMMAND BRIDGE  •  {text} ]"
@@ -245,30 +330,192 @@ class ZigsyApp(ctk.CTk):
     # ── Clipboard handlers ────────────────────────────────────────────────────
 
     def on_clipboard_word(self, text):
+        # Most copied words are in the bundled dictionary or were defined
+        # before — only a miss goes to the model
+        definition = self.dictionary.lookup(text) or self.definition_cache.get(text)
+        if definition:
+            self.orchestrator.cancel_group("clipboard")
+            self.append_chat("Zigsy", f"📖 {text}: {definition}")
+            speak(definition, PRIORITY_BACKGROUND)
+            return
+
         prompt = f"Define this word or term in simple, clear language in 2-3 sentences maximum: '{text}'"
         self.append_chat("Zigsy", f"📖 Defining: \"{text}\"")
-        threading.Thread(target=self._clipboard_response, args=(prompt,), daemon=True).start()
+        # A newer copied word replaces this one rather than queueing behind it
+        self.orchestrator.submit(
+            lambda request: self._clipboard_response(text, prompt, request),
+            priority=PRIORITY_CLIPBOARD, group="clipboard", cancels=("clipboard",)
+        )
+
+    def on_clipboard_change(self, key):
+        # An explanation being prepared for what was copied before is no longer wanted
+        self.prefetcher.cancel(PREFETCH_CLIPBOARD, keep=key)
 
     def on_clipboard_phrase(self, text):
         self._pending_clipboard = text
         preview = text[:80] + "..." if len(text) > 80 else text
         self.append_chat("Zigsy", f"📋 Copied: \"{preview}\"\nType 'explain' if you want me to explain this.")
+        # Start on the explanation now, so 'explain' can answer straight away
+        self._speculate(clipboard_key(text), f"Explain this in simple terms: {text}", PREFETCH_CLIPBOARD)
+
+    def _clipboard_response(self, term, prompt, request):
+        reply = ReplyStream(self, placeholder="...")
+        speech = speech_stream(PRIORITY_BACKGROUND)
+
+        def _on_token(text):
+            reply.write(text)
+            speech.feed(text)
+
+        definition = ""
+        try:
+            with request.model_slot():
+                definition = chat(prompt, [], context="", on_token=_on_token, cancel=request.cancel_event)
+        except RequestCancelled:
+            pass
+        if request.cancelled:
+            reply.write(" — (skipped)")
+        else:
+            self.definition_cache.put(term, definition)
+        reply.close()
+        speech.close()
 
-    def _clipboard_response(self, prompt):
-        response = chat(prompt, [], context="")
-        self.append_chat("Zigsy", response)
-        speak(response)
+    # ── Speculation ───────────────────────────────────────────────────────────
+
+    def on_quick_action_hover(self, message):
+        self.on_quick_action_leave()
+        self._hover_timer = self.after(
+            HOVER_PREFETCH_MS, lambda: self._speculate(_question_key(message), message, PREFETCH_HOVER)
+        )
+
+    def on_quick_action_leave(self):
+        if self._hover_timer is not None:
+            self.after_cancel(self._hover_timer)
+            self._hover_timer = None
+
+    def _speculate(self, key, question, group):
+        """Answer question in the background at idle priority, for send_message to pick up by key."""
+        if not self.backend_ready.is_set():
+            return
+        route = self.router.route(question)
+        # The screen may look different by the time the user asks
+        if not route.needs_llm or route.needs_screen:
+            return
+        self.prefetcher.start(key, question, lambda speculation, request:
+                              self._produce_speculation(question, route, speculation, request), group)
+
+    def _produce_speculation(self, question, route, speculation, request):
+        parts = []
+        memory_context = get_memory_context(self.memory, question)
+        if memory_context:
+            parts.append(memory_context)
+        if route.needs_rag and self.index:
+            rag_context, speculation.query_embedding, cached = self._knowledge_context(
+                question, memory_context, use_cache=True, trace=NULL_TRACE
+            )
+            if cached:
+                speculation.feed(cached)
+                return cached
+            if rag_context:
+                parts.append(rag_context)
+        with request.model_slot():
+            return chat(question, self.history.messages(), context="\n\n".join(parts),
+                        on_token=speculation.feed, cancel=request.cancel_event)
+
+    def _answer_from_speculation(self, user_input, route, speculation, request):
+        """Show and speak a speculative answer: what is ready at once, the rest as it is generated."""
+        trace = start_trace("get_response", intent=route.intent, via="prefetch")
+        started = time.perf_counter()
+        streams = []
+
+        def _on_token(text):
+            if not streams:
+                trace.record("first_token", time.perf_counter() - started)
+                streams.extend([ReplyStream(self), speech_stream()])
+            streams[0].write(text)
+            streams[1].feed(text)
+
+        try:
+            self.set_status("PROCESSING...")
+            response = speculation.follow(_on_token, cancel=request.cancel_event)
+            if response is None and not streams and not request.cancelled:
+                # Nothing was shown yet — answer the ordinary way instead
+                self._respond(user_input, route, request, trace)
+                return
+            if response is None:
+                speculation.request.cancel()
+                if streams:
+                    streams[0].write(" — (stopped)")
+            for stream in streams:
+                stream.close()
+            if request.cancelled:
+                return
+            if response is None:
+                self.set_status("STATUS: NOMINAL")
+                return
+            self._finish_response(user_input, response, spoken=True)
+            self._cache_answer(user_input, route, "", speculation.query_embedding, response)
+        finally:
+            trace.finish(cancelled=request.cancelled)
+
+    def _summarize(self, previous_summary, turns):
+        """History folding goes through the orchestrator so it never holds the model ahead of a question."""
+        def _job(request):
+            with request.model_slot():
+                return summarize_conversation(previous_summary, turns)
+        return self.orchestrator.run(_job, PRIORITY_IDLE)
 
     # ── Backend ───────────────────────────────────────────────────────────────
 
+    def _warm_model(self):
+        """Have Ollama load the model in the background unless it should still be loaded."""
+        if is_model_loaded():
+            return
+
+        def _job(request):
+            with request.model_slot():
+                if not is_model_loaded():
+                    try:
+                        print(f"[LLM] Model loaded in {warm_up():.1f}s")
+                    except Exception as e:
+                        print(f"[LLM] Warm-up failed: {e}")
+
+        self.orchestrator.submit(_job, priority=PRIORITY_IDLE)
+
     def load_backend(self):
-        self.set_status("SYNCING...")
-        self.append_chat("Zigsy", "SYNCING TACTICAL DATA...")
-        self.index = load_or_build_index()
-        self.enable_input()
-        self.after(0, lambda: self.mic_btn.configure(state="normal"))
-        self.set_status("STATUS: NOMINAL")
-        self.append_chat("Zigsy", "SYSTEM READY. How can I help you today?")
+        def _on_progress(stats):
+            self.set_status(stats.status_line())
+
+        # Ollama loads the model in its own process while the knowledge base loads here
+        self._warm_model()
+        start_keep_alive_monitor()
+        # Questions waiting on the knowledge base are released even if it
+        # fails to load — without self.index they are answered as plain chat
+        try:
+            index = load_or_build_index(on_progress=_on_progress)
+            with timed("embed quick actions"):
+                precompute_queries([message for _, message in QUICK_ACTIONS])
+            self.router.prepare(embed_texts)
+            self.response_cache = ResponseCache()
+            self.response_cache.invalidate(get_kb_version())
+            self.index = index
+            if WATCH_KNOWLEDGE_BASE:
+                def _on_change():
+                    self.response_cache.invalidate(get_kb_version())
+                    self.set_status("STATUS: NOMINAL")
+
+                watch_knowledge_base(self.index, on_change=_on_change, on_progress=_on_progress)
+            self.set_status("STATUS: NOMINAL")
+        except Exception as e:
+            print(f"[Backend] Knowledge base failed to load: {e}")
+            self.index = None
+            self.set_status("KNOWLEDGE BASE UNAVAILABLE")
+        finally:
+            self.backend_ready.set()
+
+        # Idle warm-up — get the voice model ready before the user needs it
+        load_whisper()
+        mark("warm-up finished")
+        print(startup_report())
 
     def send_message(self, text=None):
         user_input = text or self.input_field.get().strip()
@@ -276,30 +523,63 @@ class ZigsyApp(ctk.CTk):
             return
         self.input_field.delete(0, "end")
         self.append_chat("You", user_input)
+        cancel_speech()  # the user has moved on — stop reading out the last answer
+
+        # Patterns are matched here; a short message only the embedding
+        # fallback could match is routed on a worker, off the Tk thread
+        route = self.router.route(user_input, embed=False)
+        if route.via == "pending":
+            self.orchestrator.submit(
+                lambda request: self._route_and_dispatch(user_input, request),
+                priority=PRIORITY_INTERACTIVE, group="chat"
+            )
+            return
+        self._dispatch(user_input, route)
 
-        lower = user_input.lower().strip()
+    def _route_and_dispatch(self, user_input, request):
+        route = self.router.route(user_input)
+        # A question sent after this one supersedes it, as it would have had it been routed at once
+        if route.needs_llm and request.cancelled:
+            return
+        self._dispatch(user_input, route)
 
-        # ── Special commands (no LLM needed) ─────────────────────────────
-        if lower.startswith("remember that"):
-            note = user_input[len("remember that"):].strip()
-            add_note(self.memory, note)
+    def _dispatch(self, user_input, route):
+        """Run a command, or submit the question to the model. Safe from any thread."""
+        # ── Commands (no LLM needed) ─────────────────────────────────────
+        if route.intent == "remember":
+            add_note(self.memory, route.args["note"])
             self.append_chat("Zigsy", "Got it, I'll remember that!")
             return
 
-        if lower in ["ghost", "ghost mode"]:
+        if route.intent == "ghost":
             self.ghost_mode = not self.ghost_mode
             alpha = 0.5 if self.ghost_mode else 1.0
-            self.attributes("-alpha", alpha)
+            self.after(0, lambda: self.attributes("-alpha", alpha))
             state = "ON — I'm semi-transparent now." if self.ghost_mode else "OFF — Back to full opacity."
             self.append_chat("Zigsy", f"👻 Ghost Mode {state}")
             return
 
-        if lower in ["status", "vitals", "system status"]:
+        if route.intent == "status":
             result = get_system_vitals()
             self.append_chat("Zigsy", result)
             return
 
-        if lower in ["stash", "stash this"]:
+        if route.intent == "startup":
+            self.append_chat("Zigsy", startup_report())
+            return
+
+        if route.intent == "perf":
+            report = perf_report()
+            embeddings = query_cache_stats()
+            report += (f"\nQuery embeddings: {embeddings['hits']} hits, {embeddings['misses']} misses "
+                       f"({embeddings['size']} cached)")
+            if self.response_cache:
+                report += (f"\nAnswer cache: {self.response_cache.hits} hits, "
+                           f"{self.response_cache.misses} misses")
+            self.append_chat("Zigsy", report)
+            return
+
+        if route.intent == "stash":
             clipboard_text = get_clipboard()
             if clipboard_text:
                 result = stash_clipboard(clipboard_text)
@@ -308,107 +588,217 @@ class ZigsyApp(ctk.CTk):
                 self.append_chat("Zigsy", "Nothing in clipboard to stash.")
             return
 
-        if lower in ["explain", "yes explain", "yes"]:
+        key = _question_key(user_input)
+        if route.intent == "explain":
             clipboard_text = get_clipboard()
             if clipboard_text:
                 user_input = f"Explain this in simple terms: {clipboard_text}"
+                route = self.router.route(user_input)
+                key = clipboard_key(clipboard_text)
             else:
                 self.append_chat("Zigsy", "Nothing in clipboard to explain.")
                 return
 
-        self.disable_input()
-        threading.Thread(target=self.get_response, args=(user_input,), daemon=True).start()
+        # A copied phrase or a hovered quick action may already be answered
+        speculation = self.prefetcher.take(key, PRIORITY_INTERACTIVE) if not route.needs_screen else None
+        if speculation is not None:
+            job = lambda request: self._answer_from_speculation(user_input, route, speculation, request)
+        else:
+            job = lambda request: self.get_response(user_input, route, request)
+
+        # Input stays live: a new question cancels the answer still being
+        # generated, any definition in progress and all speculation
+        self.orchestrator.submit(
+            job, priority=PRIORITY_INTERACTIVE, group="chat",
+            cancels=("chat", "clipboard", PREFETCH_CLIPBOARD, PREFETCH_HOVER)
+        )
+
+    def get_response(self, user_input, route, request):
+        trace = start_trace("get_response", intent=route.intent, via=route.via)
+        try:
+            self._respond(user_input, route, request, trace)
+        finally:
+            trace.finish(cancelled=request.cancelled)
 
-    def get_response(self, user_input):
+    def _respond(self, user_input, route, request, trace):
         self.set_status("PROCESSING...")
 
         # File search
-        filename = extract_filename(user_input)
-        if filename:
-            result = find_file(filename)
+        if route.intent == "find":
+            filename = route.args["term"]
+            streamed = []
+
+            def _on_result(text):
+                if not streamed:
+                    self.append_chat("Zigsy", f"🔎 Searching for '{filename}'...")
+                streamed.append(text)
+                self.append_text(text)
+
+            with trace.span("file_search"):
+                result = find_file(filename, on_result=_on_result)
             if result is not None:
                 result_text, folder_path = result
-                self.after(0, lambda: self.append_chat("Zigsy", result_text))
+                if not result_text:
+                    return  # superseded by a newer search
+                self.append_chat("Zigsy", result_text)
                 if folder_path:
                     self.show_open_button(folder_path)
-                self.enable_input()
                 self.set_status("STATUS: NOMINAL")
                 return
 
         # Build LLM context
         context_parts = []
 
-        memory_context = get_memory_context(self.memory)
+        with trace.span("memory_context"):
+            memory_context = get_memory_context(self.memory, user_input)
         if memory_context:
             context_parts.append(memory_context)
 
-        if needs_screen_context(user_input):
-            screen_info = get_active_window_info()
+        screen_info = ""
+        if route.needs_screen:
+            with trace.span("screen_context"):
+                screen_info = get_active_window_info()
             if screen_info:
                 context_parts.append(screen_info)
 
-        if needs_rag(user_input) and self.index:
-            rag_context = get_context(user_input, self.index)
+        query_embedding = None
+        if route.needs_rag and not self.backend_ready.is_set():
+            self.set_status("LOADING KNOWLEDGE BASE...")
+            with trace.span("backend_wait"):
+                while not self.backend_ready.wait(0.1):
+                    if request.cancelled:
+                        return
+        if route.needs_rag and self.index:
+            rag_context, query_embedding, cached = self._knowledge_context(
+                user_input, memory_context, use_cache=not screen_info, trace=trace
+            )
+            if cached:
+                if request.cancelled:
+                    return  # superseded while retrieving
+                self.append_chat("Zigsy", cached)
+                self._finish_response(user_input, cached)
+                return
             if rag_context:
                 context_parts.append(rag_context)
             for keyword in CONFUSION_KEYWORDS:
                 if keyword in user_input.lower():
                     add_confusion(self.memory, keyword)
 
-        context = "\n\n".join(context_parts)
+        with trace.span("prompt_build"):
+            context = "\n\n".join(context_parts)
+            history = self.history.messages()
+
+        # Show and speak the reply sentence by sentence as it is generated
+        timing = {}
+        reply = ReplyStream(self)
+        speech = speech_stream(
+            on_start=lambda: trace.record("speech_start", time.perf_counter() - timing["first_token"])
+        )
 
-        self.append_chat("Zigsy", "Thinking...")
-        response = chat(user_input, self.history, context=context)
+        def _on_token(text):
+            if "first_token" not in timing:
+                timing["first_token"] = time.perf_counter()
+                trace.record("first_token", timing["first_token"] - timing["generation"])
+            reply.write(text)
+            speech.feed(text)
+
+        response = ""
+        waiting = time.perf_counter()
+        try:
+            with request.model_slot():
+                timing["generation"] = time.perf_counter()
+                trace.record("model_wait", timing["generation"] - waiting)
+                with trace.span("generation"):
+                    response = chat(user_input, history, context=context,
+                                    on_token=_on_token, cancel=request.cancel_event)
+        except RequestCancelled:
+            pass
+        if request.cancelled:
+            reply.write(" — (stopped)")
+        reply.close()
+        speech.close()
+        if request.cancelled:
+            return  # a newer question took over the status line
+
+        self._finish_response(user_input, response, spoken=True)
+        self._cache_answer(user_input, route, screen_info, query_embedding, response)
+
+    def _knowledge_context(self, user_input, memory_context, use_cache, trace):
+        """
+        Knowledge-base context for a task question: (context, query embedding
+        or None, cached answer or None). Task questions without screen context
+        are answered the same way every time, so use_cache lets them come
+        straight from the semantic cache.
+        """
+        # Questions naming exact manual terms are answered from the keyword
+        # index without embedding the query at all
+        query_embedding = None
+        with trace.span("keyword_search"):
+            hits = lexical_search(user_input)
+        if not is_decisive(user_input, hits):
+            with trace.span("embed_query"):
+                query_embedding = embed_query(user_input)
+        if use_cache:
+            with trace.span("cache_lookup"):
+                if query_embedding is None:
+                    cached = self.response_cache.lookup_text(
+                        user_input, get_kb_version(), context_hash(memory_context)
+                    )
+                else:
+                    cached = self.response_cache.lookup(
+                        query_embedding, get_kb_version(), context_hash(memory_context)
+                    )
+            if cached:
+                return "", query_embedding, cached
+
+        with trace.span("rag_retrieval"):
+            rag_context = get_context(user_input, self.index, query_embedding=query_embedding,
+                                      lexical_hits=hits)
+        return rag_context, query_embedding, None
+
+    def _cache_answer(self, user_input, route, screen_info, query_embedding, response):
+        if not (route.needs_rag and self.index) or screen_info:
+            return
+        # The cache matches by meaning, so a keyword-answered question is
+        # embedded now, after the user already has the answer
+        if query_embedding is None:
+            query_embedding = embed_query(user_input)
+        self.response_cache.store(
+            user_input, query_embedding, get_kb_version(),
+            context_hash(get_memory_context(self.memory, user_input)), response
+        )
 
+    def _finish_response(self, user_input, response, spoken=False):
         def _update():
-            self.chat_box.configure(state="normal")
-            content = self.chat_box.get("1.0", "end")
-            content = content.replace("// ZIGSY > Thinking...\n\n", "")
-            self.chat_box.delete("1.0", "end")
-            self.chat_box.insert("1.0", content)
-            self.chat_box.configure(state="disabled")
-            self.append_chat("Zigsy", response)
-            speak(response)
-            self.enable_input()
+            if not spoken:
+                speak(response)
             self.set_status("STATUS: NOMINAL")
 
         self.after(0, _update)
-        self.history.append({"role": "user", "content": user_input})
-        self.history.append({"role": "assistant", "content": response})
+        self.history.add_turn(user_input, response)
 
     def toggle_recording(self):
         if not self.recording:
+            cancel_speech()
             self.recording = True
-            self.audio_data = []
+            self.transcriber.start()
+            self._warm_model()   # reload while the user is still speaking, if it was unloaded
             self.mic_btn.configure(text="REC", fg_color="#7F1D1D", text_color="white")
-            threading.Thread(target=self.record_audio, daemon=True).start()
         else:
             self.recording = False
             self.mic_btn.configure(text="VOX", fg_color="transparent", text_color=self.color_orange_neon)
             threading.Thread(target=self.transcribe_audio, daemon=True).start()
 
-    def record_audio(self):
-        with sd.InputStream(samplerate=16000, channels=1, dtype="float32") as stream:
-            while self.recording:
-                chunk, _ = stream.read(1024)
-                self.audio_data.append(chunk)
-
     def transcribe_audio(self):
-        if not self.audio_data:
-            return
-        if self.whisper_model is None:
+        # Most of the recording was transcribed while the user spoke; stop()
+        # only has the last few seconds left to decode
+        if not is_whisper_loaded():
             self.append_chat("Zigsy", "Loading voice model for first time...")
-            self.whisper_model = whisper.load_model("tiny")
         self.append_chat("Zigsy", "Transcribing...")
-        audio = np.concatenate(self.audio_data, axis=0).flatten()
-        sf.write("temp_audio.wav", audio, 16000)
-        result = self.whisper_model.transcribe("temp_audio.wav")
-        text = result["text"].strip()
-        os.remove("temp_audio.wav")
+        text = self.transcriber.stop()
         if text:
             self.after(0, lambda: self.send_message(text))
 
-
 if __name__ == "__main__":
     app = ZigsyApp()
     app.mainloop()
\ No newline at end of file